@@ -0,0 +1,17 @@
+# api/batching.py
+
+from itertools import islice
+
+
+# تعداد ردیف در هر دسته خواندن یا نوشتن گروهی (bulk_create، iterator و IN)
+CHUNK_SIZE = 1000
+
+
+def chunks(iterable, size=CHUNK_SIZE):
+    """تقسیم یک iterable (مثلاً queryset.iterator()) به لیست‌های حداکثر size عضوی بدون نگه داشتن کل آن در حافظه."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
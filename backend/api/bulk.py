@@ -0,0 +1,131 @@
+# api/bulk.py
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+
+from .fanout import fan_out_profiles
+from .models import Apollonyar, Log, Profile, Term
+from .tasks import run_in_background
+
+
+# تعریف هر عملیات گروهی: ستون هدف، عنوان و کد لاگ و ستون‌هایی که برای نام مقدار قبلی خوانده می‌شوند
+PROFILE_OPERATIONS = {
+    'status': {
+        'column': 'status',
+        'subject': 'وضعیت',
+        'action': 'تغییر وضعیت هنرجو',
+        'action_code': 'status_changed',
+        'old_columns': ('status',),
+    },
+    'type': {
+        'column': 'type',
+        'subject': 'نوع',
+        'action': 'تغییر نوع هنرجو',
+        'action_code': 'type_changed',
+        'old_columns': ('type',),
+    },
+    'term': {
+        'column': 'term_id',
+        'subject': 'ترم',
+        'action': 'تغییر ترم',
+        'action_code': 'term_changed',
+        'old_columns': ('term__name',),
+    },
+    'apollonyar': {
+        'column': 'apollonyar_id',
+        'subject': 'آپولون‌یار',
+        'action': 'تغییر آپولون‌یار',
+        'action_code': 'apollonyar_changed',
+        'old_columns': ('apollonyar__first_name', 'apollonyar__last_name'),
+    },
+}
+
+STATUS_LABELS = dict(Profile.STATUS_CHOICES)
+TYPE_LABELS = dict(Profile.TYPE_CHOICES)
+
+
+def _full_name(first_name, last_name):
+    return f"{first_name or ''} {last_name or ''}".strip() or "نامشخص"
+
+
+def _choice_value(labels, raw, name):
+    """مقدار ستون انتخابی؛ هم کد انگلیسی (active) و هم برچسب فارسی (آزاد) پذیرفته می‌شود."""
+    if raw in labels:
+        return raw, labels[raw]
+    for code, label in labels.items():
+        if raw == label:
+            return code, label
+    raise ValidationError({'value': f"{name} نامعتبر است"})
+
+
+def resolve_value(operation, raw):
+    """مقدار جدید عملیات و نام قابل نمایش آن برای لاگ."""
+    if operation == 'status':
+        return _choice_value(STATUS_LABELS, raw, 'وضعیت')
+    if operation == 'type':
+        return _choice_value(TYPE_LABELS, raw, 'نوع')
+    try:
+        object_id = int(raw)
+    except (TypeError, ValueError):
+        raise ValidationError({'value': 'شناسه باید عدد باشد'})
+    if operation == 'term':
+        term = Term.objects.filter(id=object_id).only('id', 'name').first()
+        if term is None:
+            raise NotFound('ترم مورد نظر یافت نشد')
+        return term.id, term.name
+    apollonyar = Apollonyar.objects.filter(id=object_id).only('id', 'first_name', 'last_name').first()
+    if apollonyar is None:
+        raise NotFound('آپولون‌یار مورد نظر یافت نشد')
+    return apollonyar.id, _full_name(apollonyar.first_name, apollonyar.last_name)
+
+
+def _old_label(operation, row):
+    if operation == 'status':
+        return STATUS_LABELS.get(row['status'], row['status'])
+    if operation == 'type':
+        return TYPE_LABELS.get(row['type'], row['type'])
+    if operation == 'term':
+        return row['term__name'] or "نامشخص"
+    return _full_name(row['apollonyar__first_name'], row['apollonyar__last_name'])
+
+
+def bulk_change_profiles(queryset, operation, raw_value, apollonyar=None, actor=None):
+    """
+    اعمال یک تغییر (status, type, term یا apollonyar) روی همه پروفایل‌های queryset در یک تراکنش.
+    پروفایل‌هایی که مقدارشان همین حالا برابر مقدار جدید است کنار گذاشته می‌شوند؛ بقیه با یک UPDATE
+    تغییر می‌کنند و لاگ همه آن‌ها با یک bulk_create ثبت می‌شود. خروجی: شناسه پروفایل‌های تغییر کرده.
+    """
+    spec = PROFILE_OPERATIONS[operation]
+    column = spec['column']
+    new_value, new_label = resolve_value(operation, raw_value)
+
+    with transaction.atomic():
+        rows = list(
+            queryset.exclude(**{column: new_value})
+            .select_for_update(of=('self',))
+            .values('id', *spec['old_columns'], 'user__first_name', 'user__last_name', 'user__phone_number')
+        )
+        if not rows:
+            return []
+        ids = [row['id'] for row in rows]
+        Profile.objects.filter(id__in=ids).update(**{column: new_value, 'updated_at': timezone.now()})
+
+        Log.objects.bulk_create([
+            Log(
+                action=spec['action'],
+                action_code=spec['action_code'],
+                profile_id=row['id'],
+                issuer_apollonyar=apollonyar,
+                actor=actor,
+                description=(
+                    f"{spec['subject']} هنرجو {_full_name(row['user__first_name'], row['user__last_name'])} "
+                    f"({row['user__phone_number'] or 'نامشخص'}) از {_old_label(operation, row)} به {new_label} تغییر یافت"
+                ),
+            )
+            for row in rows
+        ])
+        # update() سیگنال post_save را اجرا نمی‌کند؛ تکالیف ترم جدید صریحاً ساخته می‌شوند
+        if operation == 'term':
+            run_in_background(fan_out_profiles, ids)
+    return ids
@@ -0,0 +1,124 @@
+# api/call_stats.py
+
+from collections import Counter
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .batching import CHUNK_SIZE, chunks
+from .models import Call, CallDailyStat
+
+
+# ستون‌های کلید جدول خلاصه، به ترتیب
+STAT_KEY_FIELDS = ('day', 'caller_id', 'call_def_id', 'type', 'status')
+# ستون‌هایی که داشبوردها می‌توانند بر اساس آن‌ها گروه‌بندی کنند: نام -> (ستون، نام در خروجی)؛ term از تعریف تماس می‌آید
+GROUP_FIELDS = {
+    'day': ('day', 'day'),
+    'caller': ('caller_id', 'callerId'),
+    'call_def': ('call_def_id', 'callDefId'),
+    'term': ('call_def__term_id', 'termId'),
+    'type': ('type', 'type'),
+    'status': ('status', 'status'),
+}
+
+
+def stat_key(call):
+    """کلید ردیف خلاصه یک تماس؛ None اگر زمان تماس هنوز مشخص نباشد. روز به وقت TIME_ZONE پروژه حساب می‌شود."""
+    values = call if isinstance(call, dict) else call.__dict__
+    timestamp = values.get('call_timestamp')
+    if timestamp is None:
+        return None
+    day = timezone.localdate(timestamp) if timezone.is_aware(timestamp) else timestamp.date()
+    return (day, values.get('caller_id'), values.get('call_def_id'), values.get('type'), values.get('status'))
+
+
+def apply_deltas(deltas):
+    """
+    افزودن تغییرات {کلید: تغییر تعداد} به جدول خلاصه با UPDATE اتمی روی count.
+    ردیفی که هنوز نیست ساخته می‌شود؛ اگر همزمان درخواست دیگری آن را بسازد دوباره UPDATE می‌شود.
+    """
+    for key, delta in deltas.items():
+        if key is None or not delta:
+            continue
+        lookup = dict(zip(STAT_KEY_FIELDS, key))
+        if CallDailyStat.objects.filter(**lookup).update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                CallDailyStat.objects.create(count=delta, **lookup)
+        except IntegrityError:
+            CallDailyStat.objects.filter(**lookup).update(count=F('count') + delta)
+
+
+def record_calls(calls):
+    """ثبت تماس‌های جدیدی که با bulk_create ساخته شده‌اند (سیگنال post_save برای آن‌ها اجرا نمی‌شود)."""
+    apply_deltas(Counter(stat_key(call) for call in calls))
+
+
+def fold_stats(field, value):
+    """
+    انتقال آمار یک تماس گیرنده یا تعریف تماس در حال حذف به ردیف‌های بدون آن (مثل SET_NULL روی خود تماس‌ها)،
+    پیش از آن‌که ردیف‌هایش با CASCADE حذف شوند.
+    """
+    index = STAT_KEY_FIELDS.index(field)
+    rows = CallDailyStat.objects.filter(**{field: value}).values_list(*STAT_KEY_FIELDS, 'count')
+    deltas = Counter()
+    for *key, count in rows:
+        key[index] = None
+        deltas[tuple(key)] += count
+    CallDailyStat.objects.filter(**{field: value}).delete()
+    apply_deltas(deltas)
+
+
+def rebuild_stats(since=None):
+    """
+    بازسازی جدول خلاصه از جدول تماس‌ها (کل جدول یا از روز since به بعد).
+    جدول خلاصه در طول بازسازی قفل می‌شود تا به‌روزرسانی‌های همزمان نه گم شوند و نه دو بار شمرده شوند.
+    خروجی: تعداد ردیف‌های خلاصه ساخته شده
+    """
+    calls = Call.objects.annotate(day=TruncDate('call_timestamp'))
+    stats = CallDailyStat.objects.all()
+    if since is not None:
+        calls = calls.filter(day__gte=since)
+        stats = stats.filter(day__gte=since)
+    rows = (
+        calls.order_by().values(*STAT_KEY_FIELDS).annotate(count=Count('id'))
+        .values_list(*STAT_KEY_FIELDS, 'count')
+    )
+    created = 0
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {CallDailyStat._meta.db_table} IN EXCLUSIVE MODE')
+        stats.delete()
+        for chunk in chunks(rows.iterator(chunk_size=CHUNK_SIZE)):
+            CallDailyStat.objects.bulk_create([
+                CallDailyStat(count=count, **dict(zip(STAT_KEY_FIELDS, key)))
+                for *key, count in chunk
+            ])
+            created += len(chunk)
+    return created
+
+
+def call_stats(group_by, **filters):
+    """
+    جمع تعداد تماس‌ها از جدول خلاصه به تفکیک ستون‌های group_by (کلیدهای GROUP_FIELDS)،
+    مثلاً [{'callerId': 3, 'status': 'pending', 'total': 42}, ...]
+    filters: day_from، day_to، caller، call_def، term، type و status
+    """
+    stats = CallDailyStat.objects.all()
+    if filters.get('day_from'):
+        stats = stats.filter(day__gte=filters['day_from'])
+    if filters.get('day_to'):
+        stats = stats.filter(day__lte=filters['day_to'])
+    for name in ('caller', 'call_def', 'term', 'type', 'status'):
+        if filters.get(name) is not None:
+            stats = stats.filter(**{GROUP_FIELDS[name][0]: filters[name]})
+    aliases = [GROUP_FIELDS[name][1] for name in group_by]
+    plain = [column for column, alias in map(GROUP_FIELDS.get, group_by) if column == alias]
+    renamed = {alias: F(column) for column, alias in map(GROUP_FIELDS.get, group_by) if column != alias}
+    return list(
+        stats.values(*plain, **renamed).annotate(total=Sum('count')).filter(total__gt=0).order_by(*aliases)
+    )
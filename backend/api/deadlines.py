@@ -0,0 +1,82 @@
+# api/deadlines.py
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Assignment, AssignmentDef, Log
+
+
+def parse_shift(data):
+    """
+    میزان جابجایی مهلت و استثناها از بدنه درخواست:
+    {"days": 3, "hours": 0, "excludeGroupIds": [...], "excludeProfileIds": [...], "reason": "..."}
+    """
+    try:
+        delta = timedelta(days=int(data.get('days') or 0), hours=int(data.get('hours') or 0))
+        exclude_groups = [int(group_id) for group_id in data.get('excludeGroupIds') or []]
+        exclude_profiles = [int(profile_id) for profile_id in data.get('excludeProfileIds') or []]
+    except (TypeError, ValueError):
+        raise ValidationError({'days': 'days, hours و شناسه‌های استثنا باید عدد باشند'})
+    if not delta:
+        raise ValidationError({'days': 'میزان جابجایی (days یا hours) الزامی است'})
+    return delta, exclude_groups, exclude_profiles
+
+
+def describe_shift(delta):
+    days, seconds = delta.days, delta.seconds
+    if days < 0:
+        # timedelta منفی به صورت (روز منفی، ثانیه مثبت) نگه داشته می‌شود
+        total_hours = -int(delta.total_seconds() // 3600)
+        direction, days, hours = 'عقب', total_hours // 24, total_hours % 24
+    else:
+        direction, hours = 'جلو', seconds // 3600
+    parts = []
+    if days:
+        parts.append(f"{days} روز")
+    if hours:
+        parts.append(f"{hours} ساعت")
+    return f"{' و '.join(parts)} به {direction}"
+
+
+def shift_deadlines(assignment_defs, delta, exclude_group_ids=(), exclude_profile_ids=(),
+                    label='', reason='', apollonyar=None, actor=None):
+    """
+    جابجایی مهلت همه تکالیف ساخته شده از assignment_defs (queryset تعریف‌ها) به اندازه delta.
+    مهلت تکالیف با یک UPDATE ... SET deadline = deadline + interval تغییر می‌کند و مهلت خود تعریف‌ها
+    هم جابجا می‌شود تا تکالیفی که بعداً ساخته می‌شوند مهلت جدید را بگیرند.
+    پروفایل‌های گروه‌ها و شناسه‌های استثنا دست نمی‌خورند. برای هر هنرجوی تغییر کرده یک لاگ با bulk_create ثبت می‌شود.
+    خروجی: (تعداد تکالیف تغییر کرده، تعداد هنرجویان)
+    """
+    assignments = Assignment.objects.filter(assignment_def__in=assignment_defs)
+    if exclude_group_ids:
+        assignments = assignments.exclude(profile__group_id__in=exclude_group_ids)
+    if exclude_profile_ids:
+        assignments = assignments.exclude(profile_id__in=exclude_profile_ids)
+
+    now = timezone.now()
+    description = f"مهلت تکالیف {label} {describe_shift(delta)} جابجا شد"
+    if reason:
+        description += f" (دلیل: {reason})"
+
+    with transaction.atomic():
+        profile_ids = list(assignments.order_by().values_list('profile_id', flat=True).distinct())
+        updated = assignments.update(deadline=F('deadline') + delta, updated_at=now)
+        AssignmentDef.objects.filter(id__in=assignment_defs.values('id')).update(
+            deadline=F('deadline') + delta, updated_at=now
+        )
+        Log.objects.bulk_create([
+            Log(
+                action="تغییر مهلت تکلیف",
+                action_code='deadline_changed',
+                profile_id=profile_id,
+                issuer_apollonyar=apollonyar,
+                actor=actor,
+                description=description,
+            )
+            for profile_id in profile_ids
+        ], batch_size=1000)
+    return updated, len(profile_ids)
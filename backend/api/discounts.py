@@ -0,0 +1,52 @@
+# api/discounts.py
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import DiscountCode, DiscountRedemption
+
+
+def redeemable(now=None):
+    """شرط قابل استفاده بودن کد: سقف استفاده پر نشده و منقضی نشده."""
+    now = now or timezone.now()
+    return Q(usage_count__lt=F('max_usage')) & (Q(expiration_date__isnull=True) | Q(expiration_date__gt=now))
+
+
+def _rejection(code, now):
+    """علت رد شدن کدی که UPDATE شرطی روی آن اثر نکرد."""
+    if code.expiration_date is not None and code.expiration_date <= now:
+        return 'کد تخفیف منقضی شده است.'
+    return 'ظرفیت استفاده از این کد تخفیف تمام شده است.'
+
+
+def redeem(code, profile, kind='cash', redeemed_by=None):
+    """
+    استفاده از کد تخفیف برای یک پروفایل.
+    سقف استفاده و تاریخ انقضا با یک UPDATE شرطی (usage_count = usage_count + 1 WHERE usage_count < max_usage
+    AND منقضی نشده) کنترل می‌شود؛ بنابراین درخواست‌های همزمان نه کد را بیش از سقف مصرف می‌کنند و نه
+    پشت قفل ردیف منتظر خواندن و نوشتن دوباره می‌مانند. ردیف DiscountRedemption در همان تراکنش ساخته می‌شود
+    و در صورت خطا افزایش شمارنده هم برمی‌گردد.
+    خروجی: DiscountRedemption
+    """
+    if kind not in dict(DiscountRedemption.KIND_CHOICES):
+        raise ValidationError({'kind': f"مقدار نامعتبر: {kind}"})
+    discount = DiscountCode.objects.filter(code=(code or '').strip()).first()
+    if discount is None:
+        raise ValidationError({'code': 'کد تخفیف پیدا نشد.'})
+
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            claimed = DiscountCode.objects.filter(redeemable(now), pk=discount.pk).update(
+                usage_count=F('usage_count') + 1, updated_at=now
+            )
+            if not claimed:
+                raise ValidationError({'code': _rejection(discount, now)})
+            return DiscountRedemption.objects.create(
+                discount_code=discount, profile=profile, kind=kind, redeemed_by=redeemed_by,
+                amount=discount.cash_price if kind == 'cash' else discount.installment_price,
+            )
+    except IntegrityError:
+        raise ValidationError({'code': 'این کد تخفیف قبلاً برای این پروفایل استفاده شده است.'})
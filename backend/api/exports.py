@@ -0,0 +1,134 @@
+# api/exports.py
+
+import os
+import zipfile
+
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+
+from .models import AssignmentSubmissionFile
+from .storage import blob_storage, is_blob
+
+
+# حجم هر بار خواندن از فایل ارسالی هنگام نوشتن در آرشیو
+EXPORT_BLOCK_SIZE = 64 * 1024
+
+
+class ZipRenderer(BaseRenderer):
+    """
+    فقط برای پذیرفتن درخواست‌هایی با Accept: application/zip؛
+    پاسخ خود اکشن StreamingHttpResponse است و از renderer عبور نمی‌کند.
+    """
+    media_type = 'application/zip'
+    format = 'zip'
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class _ZipStream:
+    """
+    مقصد غیر قابل seek برای zipfile: بایت‌های نوشته شده تا خوانده شدن توسط generator نگه داشته می‌شوند.
+    zipfile در این حالت اندازه و CRC هر فایل را پس از داده‌های آن (data descriptor) می‌نویسد.
+    """
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _clean(value):
+    return str(value or '').replace('/', '-').replace('\\', '-').strip() or 'نامشخص'
+
+
+def submission_file_rows(assignment_def):
+    """
+    ردیف‌های سبک (values) فایل‌های ارسالی یک تعریف تکلیف، مرتب بر اساس هنرجو و زمان ارسال.
+    با iterator() خوانده می‌شوند تا کل نتیجه هیچ‌وقت در حافظه نباشد.
+    """
+    return (
+        AssignmentSubmissionFile.objects
+        .filter(submission__assignment__assignment_def=assignment_def)
+        .order_by('submission__assignment__profile_id', 'submission__submission_timestamp', 'id')
+        .values_list(
+            'file',
+            'template__title',
+            'submission__submission_timestamp',
+            'submission__assignment__profile_id',
+            'submission__assignment__profile__user__first_name',
+            'submission__assignment__profile__user__last_name',
+            'submission__assignment__profile__user__phone_number',
+        )
+        .iterator(chunk_size=500)
+    )
+
+
+def archive_name(assignment_def):
+    return f"{_clean(assignment_def.title)}.zip"
+
+
+def stream_submissions_zip(assignment_def):
+    """
+    Generator ساخت آرشیو ZIP همه فایل‌های ارسالی یک تعریف تکلیف به صورت لحظه‌ای.
+    ساختار آرشیو: {نام هنرجو - شماره}/{عنوان تکلیف}/{زمان ارسال}_{عنوان فایل الگو}.{پسوند}
+    هر فایل بلوک به بلوک از storage خوانده و فشرده می‌شود و خروجی بلافاصله به پاسخ فرستاده می‌شود؛
+    هیچ فایل موقتی روی دیسک ساخته نمی‌شود. فایل‌هایی که در storage وجود ندارند نادیده گرفته می‌شوند.
+    """
+    stream = _ZipStream()
+    storage = blob_storage()
+    title = _clean(assignment_def.title)
+    current_profile, seen = None, set()
+
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        for name, template_title, submitted_at, profile_id, first_name, last_name, phone in submission_file_rows(assignment_def):
+            # نام‌های تکراری فقط در پوشه یک هنرجو بررسی می‌شوند تا حافظه ثابت بماند
+            if profile_id != current_profile:
+                current_profile, seen = profile_id, set()
+            student = _clean(f"{first_name or ''} {last_name or ''}".strip())
+            if phone:
+                student = f"{student} - {_clean(phone)}"
+            submitted_at = timezone.localtime(submitted_at)
+            # نام فایل‌های storage محتوا-محور فقط hash است و در آرشیو فقط پسوند آن نگه داشته می‌شود
+            filename = os.path.splitext(name)[1] if is_blob(name) else f"_{os.path.basename(name)}"
+            entry = f"{student}/{title}/{submitted_at:%Y-%m-%d_%H-%M}_{_clean(template_title)}{filename}"
+            base, ext = os.path.splitext(entry)
+            counter = 1
+            while entry in seen:
+                counter += 1
+                entry = f"{base} ({counter}){ext}"
+            seen.add(entry)
+
+            try:
+                source = storage.open(name, 'rb')
+            except FileNotFoundError:
+                continue
+            with source:
+                info = zipfile.ZipInfo(entry, date_time=submitted_at.timetuple()[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.file_size = source.size
+                with archive.open(info, 'w') as target:
+                    while True:
+                        block = source.read(EXPORT_BLOCK_SIZE)
+                        if not block:
+                            break
+                        target.write(block)
+                        data = stream.drain()
+                        if data:
+                            yield data
+            data = stream.drain()
+            if data:
+                yield data
+    # فهرست مرکزی آرشیو هنگام بستن ZipFile نوشته می‌شود
+    yield stream.drain()
@@ -0,0 +1,75 @@
+# api/fanout.py
+
+from .batching import CHUNK_SIZE, chunks
+from .models import Assignment, AssignmentDef, Profile
+
+
+def _bulk_insert(rows):
+    """
+    درج گروهی تکالیف؛ ردیف‌هایی که (profile, assignment_def) آن‌ها از قبل هست کنار گذاشته می‌شوند.
+    خروجی: تعداد ردیف‌های درج شده. قید یکتا با ignore_conflicts جلوی تکرار در اجرای همزمان را می‌گیرد؛
+    در آن حالت ردیفی که همزمان توسط کار دیگری درج شده ممکن است در هر دو شمرده شود.
+    """
+    created = 0
+    for chunk in chunks(rows):
+        existing = set(
+            Assignment.objects.filter(
+                profile_id__in={row.profile_id for row in chunk},
+                assignment_def_id__in={row.assignment_def_id for row in chunk},
+            ).values_list('profile_id', 'assignment_def_id')
+        )
+        new = [row for row in chunk if (row.profile_id, row.assignment_def_id) not in existing]
+        if new:
+            Assignment.objects.bulk_create(new, batch_size=CHUNK_SIZE, ignore_conflicts=True)
+        created += len(new)
+    return created
+
+
+def fan_out_assignment_defs(assignment_def_ids):
+    """
+    ساخت تکلیف هر تعریف برای همه پروفایل‌های ترم آن.
+    خروجی: تعداد تکالیف ساخته شده (تکالیف موجود کنار گذاشته می‌شوند).
+    """
+    total = 0
+    for assignment_def in AssignmentDef.objects.filter(id__in=assignment_def_ids).only('id', 'term_id', 'deadline'):
+        profile_ids = (
+            Profile.objects.filter(term_id=assignment_def.term_id)
+            .values_list('id', flat=True).order_by('id').iterator(chunk_size=CHUNK_SIZE)
+        )
+        total += _bulk_insert(
+            Assignment(profile_id=profile_id, assignment_def_id=assignment_def.id, deadline=assignment_def.deadline)
+            for profile_id in profile_ids
+        )
+    return total
+
+
+def fan_out_profiles(profile_ids):
+    """ساخت تکالیف همه تعریف‌های ترم فعلی هر پروفایل (مثلاً پس از ثبت‌نام یا تغییر ترم)."""
+    profile_terms = dict(
+        Profile.objects.filter(id__in=profile_ids, term__isnull=False).values_list('id', 'term_id')
+    )
+    if not profile_terms:
+        return 0
+    defs_by_term = {}
+    for def_id, term_id, deadline in AssignmentDef.objects.filter(
+        term_id__in=set(profile_terms.values())
+    ).values_list('id', 'term_id', 'deadline'):
+        defs_by_term.setdefault(term_id, []).append((def_id, deadline))
+
+    return _bulk_insert(
+        Assignment(profile_id=profile_id, assignment_def_id=def_id, deadline=deadline)
+        for profile_id, term_id in profile_terms.items()
+        for def_id, deadline in defs_by_term.get(term_id, ())
+    )
+
+
+def fan_out_terms(term_ids=None):
+    """
+    همگام‌سازی کامل تکالیف یک یا چند ترم (یا همه ترم‌ها)؛ برای پر کردن داده‌های قبلی.
+    کارهای پس‌زمینه run_in_background در حافظه پروسه‌اند و با restart یا deploy از بین می‌روند؛
+    فرمان fanout_assignments (که این تابع را صدا می‌زند) باید به صورت دوره‌ای اجرا شود تا تکالیف جا مانده ساخته شوند.
+    """
+    defs = AssignmentDef.objects.all()
+    if term_ids:
+        defs = defs.filter(term_id__in=term_ids)
+    return fan_out_assignment_defs(list(defs.values_list('id', flat=True)))
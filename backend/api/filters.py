@@ -0,0 +1,83 @@
+# api/filters.py
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+# پارامترهای قابل فیلتر لیست پروفایل‌ها
+# ستون‌های متنی با مقدار خام و کلیدهای خارجی با شناسه (یا none برای مقدار خالی) فیلتر می‌شوند
+PROFILE_CHOICE_FILTERS = ('status', 'type')
+PROFILE_RELATION_FILTERS = {
+    'term': 'term_id',
+    'group': 'group_id',
+    'course': 'course_id',
+    'apollonyar': 'apollonyar_id',
+}
+# فیلتر بدهی از خلاصه مالی پروفایل (api.ledger) خوانده می‌شود: ?debt=overdue یا ?debt=outstanding
+PROFILE_DEBT_FILTERS = {
+    'overdue': 'ledger__overdue__gt',
+    'outstanding': 'ledger__outstanding__gt',
+}
+# جستجوی متنی در نام و شماره تلفن هنرجو: ?search=...
+PROFILE_SEARCH_FIELDS = ('user__first_name', 'user__last_name', 'user__phone_number')
+PROFILE_FILTER_PARAMS = PROFILE_CHOICE_FILTERS + tuple(PROFILE_RELATION_FILTERS) + ('debt', 'search')
+
+
+def _split(raw):
+    return [part.strip() for part in raw.split(',') if part.strip()]
+
+
+def filter_profiles(queryset, params):
+    """
+    اعمال فیلترهای status, type, term, group, course, apollonyar, debt و search روی queryset پروفایل‌ها.
+    هر پارامتر می‌تواند چند مقدار جدا شده با کاما داشته باشد (مثلاً ?status=active,suspended).
+    """
+    for name in PROFILE_CHOICE_FILTERS:
+        raw = params.get(name)
+        if not raw:
+            continue
+        values = _split(raw)
+        valid = {choice for choice, _ in queryset.model._meta.get_field(name).choices}
+        invalid = [value for value in values if value not in valid]
+        if invalid:
+            raise ValidationError({name: f"مقدار نامعتبر: {', '.join(invalid)}"})
+        queryset = queryset.filter(**{f'{name}__in': values})
+
+    for name, column in PROFILE_RELATION_FILTERS.items():
+        raw = params.get(name)
+        if not raw:
+            continue
+        values = _split(raw)
+        if values == ['none']:
+            queryset = queryset.filter(**{f'{column}__isnull': True})
+            continue
+        try:
+            ids = [int(value) for value in values]
+        except ValueError:
+            raise ValidationError({name: 'شناسه باید عدد باشد.'})
+        queryset = queryset.filter(**{f'{column}__in': ids})
+
+    raw = params.get('debt')
+    if raw:
+        if raw not in PROFILE_DEBT_FILTERS:
+            raise ValidationError({'debt': f"مقدار نامعتبر: {raw}"})
+        queryset = queryset.filter(**{PROFILE_DEBT_FILTERS[raw]: 0})
+
+    # هر کلمه باید در یکی از ستون‌های نام یا تلفن باشد
+    for word in params.get('search', '').split():
+        condition = Q()
+        for field in PROFILE_SEARCH_FIELDS:
+            condition |= Q(**{f'{field}__icontains': word})
+        queryset = queryset.filter(condition)
+
+    return queryset
+
+
+class ProfileFilterBackend(BaseFilterBackend):
+    """فیلتر سمت سرور لیست پروفایل‌ها بر اساس پارامترهای آدرس."""
+
+    def filter_queryset(self, request, queryset, view):
+        if getattr(view, 'action', None) != 'list':
+            return queryset
+        return filter_profiles(queryset, request.query_params)
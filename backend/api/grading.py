@@ -0,0 +1,72 @@
+# api/grading.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import AssignmentSubmission
+
+
+MAX_CLAIM = 50
+
+
+def lease_duration():
+    return timedelta(seconds=getattr(settings, 'GRADING_LEASE_SECONDS', 900))
+
+
+def claimable(apollonyar, now):
+    """ارسال‌های نمره‌نخورده‌ای که lease فعال ندارند یا lease آن‌ها متعلق به همین ارزیاب است."""
+    return AssignmentSubmission.objects.filter(grade__isnull=True).filter(
+        Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now) | Q(claimed_by=apollonyar)
+    )
+
+
+def claim_submissions(apollonyar, limit, assignment_def_id=None):
+    """
+    برداشتن limit ارسال قدیمی‌تر از صف نمره‌دهی برای یک ارزیاب.
+    ردیف‌ها با SELECT ... FOR UPDATE SKIP LOCKED انتخاب می‌شوند؛ ردیف‌هایی که همزمان توسط ارزیاب دیگری
+    در حال برداشتن هستند بدون انتظار رد می‌شوند و هیچ ارسالی به دو نفر داده نمی‌شود.
+    lease های قبلی همین ارزیاب تمدید می‌شوند و lease های منقضی شده دوباره قابل برداشتن هستند.
+    خروجی: شناسه ارسال‌های برداشته شده و زمان پایان lease
+    """
+    if not 1 <= limit <= MAX_CLAIM:
+        raise ValidationError({'limit': f'limit باید بین 1 و {MAX_CLAIM} باشد'})
+    now = timezone.now()
+    expires_at = now + lease_duration()
+
+    with transaction.atomic():
+        queryset = claimable(apollonyar, now)
+        if assignment_def_id:
+            queryset = queryset.filter(assignment__assignment_def_id=assignment_def_id)
+        ids = list(
+            queryset.select_for_update(skip_locked=True, of=('self',))
+            .order_by('submission_timestamp', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if ids:
+            AssignmentSubmission.objects.filter(id__in=ids).update(
+                claimed_by=apollonyar, lease_expires_at=expires_at, updated_at=now
+            )
+    return ids, expires_at
+
+
+def release_submissions(apollonyar, submission_ids):
+    """آزاد کردن lease ارسال‌هایی که این ارزیاب برداشته ولی نمره نداده است."""
+    return AssignmentSubmission.objects.filter(id__in=submission_ids, claimed_by=apollonyar).update(
+        claimed_by=None, lease_expires_at=None, updated_at=timezone.now()
+    )
+
+
+def held_by_other(submission, apollonyar, now=None):
+    """آیا lease فعال این ارسال در دست ارزیاب دیگری است؟"""
+    now = now or timezone.now()
+    return (
+        submission.claimed_by_id is not None
+        and submission.claimed_by_id != apollonyar.id
+        and submission.lease_expires_at is not None
+        and submission.lease_expires_at > now
+    )
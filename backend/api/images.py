@@ -0,0 +1,191 @@
+# api/images.py
+
+import logging
+import re
+import xml.etree.ElementTree as ET
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from .models import MedalDef, Transaction, User
+from .storage import derivative_name
+from .tasks import run_in_background, run_in_process
+
+logger = logging.getLogger(__name__)
+
+
+# فیلدهای تصویری که نسخه‌های کوچک دارند: مدل -> (فیلد فایل اصلی، فیلد JSON نسخه‌ها)
+IMAGE_FIELDS = {
+    User: ('photo', 'photo_variants'),
+    Transaction: ('receipt_image', 'receipt_variants'),
+    MedalDef: ('icon', 'icon_variants'),
+}
+# نام فایل‌های مشتق: {اصلی}.{اندازه}.{webp|jpg} و {اصلی}.min.svg
+DERIVATIVE_RE = re.compile(r'^(?P<source>.+)\.(?:\w+\.(?:webp|jpg)|min\.svg)$')
+
+# پیکسل‌های بیشتر از این مقدار (مثلاً فایل‌های decompression bomb) پردازش نمی‌شوند
+MAX_IMAGE_PIXELS = 80_000_000
+MAX_SVG_SIZE = 1024 * 1024
+
+SVG_NS = 'http://www.w3.org/2000/svg'
+XLINK_NS = 'http://www.w3.org/1999/xlink'
+SVG_ELEMENTS = {
+    'svg', 'g', 'defs', 'symbol', 'use', 'path', 'rect', 'circle', 'ellipse', 'line', 'polyline', 'polygon',
+    'text', 'tspan', 'linearGradient', 'radialGradient', 'stop', 'clipPath', 'mask', 'pattern',
+    'filter', 'feGaussianBlur', 'feOffset', 'feBlend', 'feColorMatrix', 'feFlood', 'feComposite', 'feMerge', 'feMergeNode',
+}
+# مقادیری که می‌توانند اسکریپت اجرا کنند یا منبع خارجی بارگذاری کنند
+UNSAFE_VALUE_RE = re.compile(r'javascript:|vbscript:|data:|expression\s*\(|@import|url\s*\(\s*[\'"]?(?!#)', re.IGNORECASE)
+
+
+def source_name(name):
+    """نام فایل اصلی یک فایل مشتق (برای فایل غیر مشتق همان نام)."""
+    match = DERIVATIVE_RE.match(name)
+    return match.group('source') if match else name
+
+
+def thumbnail_sizes():
+    return getattr(settings, 'IMAGE_THUMBNAIL_SIZES', {'small': 160, 'large': 1024})
+
+
+# === توابع اجرا شونده در pool پروسه‌ها (بدون دسترسی به ORM) ===
+
+def render_thumbnails(source_path, targets):
+    """
+    ساخت نسخه‌های کوچک WebP و JPEG یک تصویر.
+    targets: {نام اندازه: (حداکثر ضلع، مسیر webp، مسیر jpeg)}؛ از بزرگ‌ترین اندازه شروع می‌شود
+    و هر اندازه از نسخه قبلی کوچک می‌شود. متادیتای EXIF (مثلاً موقعیت مکانی) در نسخه‌ها نوشته نمی‌شود.
+    """
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    with Image.open(source_path) as original:
+        largest = max(size for size, _, _ in targets.values())
+        # برای JPEG تصویر از همان ابتدا در مقیاس کوچک‌تر decode می‌شود (بسیار سریع‌تر برای عکس‌های دوربین)
+        original.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if image.mode in ('P', 'LA', 'PA') or 'transparency' in image.info else 'RGB')
+
+        for label, (size, webp_path, jpeg_path) in sorted(targets.items(), key=lambda item: -item[1][0]):
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+            image.save(webp_path, 'WEBP', quality=80, method=4)
+            if image.mode == 'RGBA':
+                # JPEG شفافیت ندارد؛ روی زمینه سفید قرار می‌گیرد
+                flat = Image.new('RGB', image.size, (255, 255, 255))
+                flat.paste(image, mask=image.getchannel('A'))
+            else:
+                flat = image
+            flat.save(jpeg_path, 'JPEG', quality=82, optimize=True, progressive=True)
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _clean_svg_element(element):
+    for name, value in list(element.attrib.items()):
+        namespace = name[1:].split('}')[0] if name.startswith('{') else ''
+        local = _local(name)
+        safe = (
+            (namespace == '' or (namespace == XLINK_NS and local == 'href'))
+            and not local.lower().startswith('on')
+            and not UNSAFE_VALUE_RE.search(value)
+            and (local != 'href' or value.startswith('#'))
+        )
+        if not safe:
+            del element.attrib[name]
+
+    keep_text = _local(element.tag) in ('text', 'tspan')
+    element.text = element.text.strip() or None if keep_text and element.text else None
+    for child in list(element):
+        if not child.tag.startswith(f'{{{SVG_NS}}}') or _local(child.tag) not in SVG_ELEMENTS:
+            # script، foreignObject، style، metadata، عناصر ویرایشگرها و ...
+            element.remove(child)
+            continue
+        child.tail = None
+        _clean_svg_element(child)
+
+
+def sanitize_svg(source_path, target_path):
+    """
+    پاک‌سازی و کوچک‌سازی یک فایل SVG: فقط عناصر و ویژگی‌های گرافیکی مجاز نگه داشته می‌شوند
+    (بدون اسکریپت، event handler، لینک خارجی، style و متادیتا) و فاصله‌های اضافه حذف می‌شوند.
+    فایل‌های دارای DOCTYPE یا ENTITY پذیرفته نمی‌شوند.
+    """
+    with open(source_path, 'rb') as source:
+        raw = source.read(MAX_SVG_SIZE + 1)
+    if len(raw) > MAX_SVG_SIZE:
+        raise ValueError('SVG file is too large')
+    if re.search(rb'<!(DOCTYPE|ENTITY)', raw, re.IGNORECASE):
+        raise ValueError('SVG files with DOCTYPE or ENTITY declarations are not accepted')
+    root = ET.fromstring(raw)
+    if root.tag != f'{{{SVG_NS}}}svg':
+        raise ValueError('Not an SVG document')
+    _clean_svg_element(root)
+    ET.register_namespace('', SVG_NS)
+    ET.register_namespace('xlink', XLINK_NS)
+    with open(target_path, 'wb') as target:
+        target.write(ET.tostring(root, encoding='utf-8', xml_declaration=False))
+
+
+# === هماهنگ‌کننده (در worker پس‌زمینه api.tasks اجرا می‌شود) ===
+
+def process_image(model, pk):
+    """
+    ساخت نسخه‌های کوچک تصویر یک ردیف در pool پروسه‌ها و ثبت آن‌ها در فیلد JSON نسخه‌ها.
+    تصاویر: {"small": {"webp": ..., "jpeg": ...}, "large": {...}}؛ SVG: {"svg": ...}
+    نسخه‌های فایل قبلی (در صورت تعویض فایل) پس از ثبت نسخه‌های جدید حذف می‌شوند.
+    """
+    field, variants_field = IMAGE_FIELDS[model]
+    row = model.objects.filter(pk=pk).values(field, variants_field).first()
+    if row is None:
+        return
+    name, old_variants = row[field], row[variants_field] or {}
+    try:
+        if not name:
+            variants = {}
+        elif name.lower().endswith('.svg'):
+            variants = {'svg': derivative_name(name, 'min.svg')}
+            run_in_process(sanitize_svg, default_storage.path(name), default_storage.path(variants['svg']))
+        else:
+            variants = {
+                label: {'webp': derivative_name(name, f'{label}.webp'), 'jpeg': derivative_name(name, f'{label}.jpg')}
+                for label in thumbnail_sizes()
+            }
+            targets = {
+                label: (size, default_storage.path(variants[label]['webp']), default_storage.path(variants[label]['jpeg']))
+                for label, size in thumbnail_sizes().items()
+            }
+            run_in_process(render_thumbnails, default_storage.path(name), targets)
+    except Exception:
+        logger.exception("ساخت نسخه‌های کوچک %s شماره %s ناموفق بود", model.__name__, pk)
+        return
+
+    # اگر فایل در همین فاصله دوباره عوض شده باشد نتیجه کنار گذاشته می‌شود (کار بعدی آن را می‌سازد)
+    if not model.objects.filter(pk=pk, **{field: name}).update(**{variants_field: variants}):
+        return
+    new_names = set(_variant_names(variants))
+    for old_name in _variant_names(old_variants):
+        if old_name not in new_names and default_storage.exists(old_name):
+            default_storage.delete(old_name)
+
+
+def _variant_names(variants):
+    for value in variants.values():
+        if isinstance(value, dict):
+            yield from value.values()
+        else:
+            yield value
+
+
+def schedule_image_variants(model, pk):
+    run_in_background(process_image, model, pk)
+
+
+def pending_image_rows():
+    """(مدل، شناسه) ردیف‌هایی که فایل دارند ولی نسخه‌های کوچکشان ساخته نشده است."""
+    for model, (field, variants_field) in IMAGE_FIELDS.items():
+        queryset = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).filter(**{variants_field: {}})
+        for pk in queryset.values_list('pk', flat=True).iterator(chunk_size=2000):
+            yield model, pk
@@ -0,0 +1,308 @@
+# api/index_advisor.py
+
+import json
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DatabaseError, connection, models, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+# فقط این دستورها EXPLAIN می‌شوند (INSERT و دستورهای مدیریتی ایندکس لازم ندارند)
+EXPLAINABLE_RE = re.compile(r'^\s*\(?\s*(SELECT|WITH|UPDATE|DELETE)\b', re.IGNORECASE)
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\$\d+|\b\d+(?:\.\d+)?\b")
+IN_LIST_RE = re.compile(r'\bIN \((?:\?, )*\?\)')
+# یک شرط ساده روی ستون در خروجی EXPLAIN، مثلاً (profile_id = 5) یا ((status)::text = ANY (...))
+CONDITION_RE = re.compile(
+    r'(?:\b(?P<alias>\w+)\.)?\(?"?\b(?P<column>[a-z_]\w*)"?\)?(?:::[a-z ]+(?:\[\])?)?\)?\s+'
+    r'(?P<op>=|<=|>=|<|>|IS NULL)(?=[\s)])',
+    re.IGNORECASE,
+)
+SORT_KEY_RE = re.compile(r'^(?:(?P<alias>\w+)\.)?"?(?P<column>[a-z_]\w*)"?(?:\s+(?P<direction>ASC|DESC))?(?:\s+NULLS \w+)?$', re.IGNORECASE)
+SCAN_NODES = ('Seq Scan', 'Index Scan', 'Index Only Scan', 'Bitmap Heap Scan')
+MAX_INDEX_COLUMNS = 4
+
+
+def normalize_sql(sql):
+    """شکل کلی کوئری بدون مقادیر ثابت، برای گروه کردن اجراهای یک کوئری با پارامترهای مختلف."""
+    return IN_LIST_RE.sub('IN (...)', LITERAL_RE.sub('?', ' '.join(sql.split())))
+
+
+# === جمع‌آوری بار کاری ===
+
+def workload_from_pg_stat_statements(limit):
+    """
+    پرهزینه‌ترین کوئری‌های دیتابیس جاری از pg_stat_statements به ترتیب کل زمان اجرا.
+    خروجی: لیست {'sql', 'calls', 'total_ms', 'mean_ms'}؛ پارامترها به صورت $1 و ... هستند.
+    """
+    total, mean = ('total_exec_time', 'mean_exec_time') if connection.pg_version >= 130000 else ('total_time', 'mean_time')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT query, calls, {total}, {mean} FROM pg_stat_statements
+            WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+              AND query ~* '^\\s*\\(?\\s*(select|with|update|delete)\\M'
+            ORDER BY {total} DESC LIMIT %s
+            """,
+            [limit],
+        )
+        return [
+            {'sql': sql, 'calls': calls, 'total_ms': float(total_ms), 'mean_ms': float(mean_ms)}
+            for sql, calls, total_ms, mean_ms in cursor.fetchall()
+        ]
+
+
+def workload_from_requests(paths, user):
+    """
+    اجرای درخواست‌های GET روی API به نام کاربر داده شده و جمع‌آوری کوئری‌های آن‌ها از connection.queries.
+    اجراهای یک کوئری با مقادیر مختلف یکی می‌شوند؛ یک نمونه با مقادیر واقعی برای EXPLAIN نگه داشته می‌شود.
+    """
+    from rest_framework.test import APIClient
+
+    host = next((h for h in settings.ALLOWED_HOSTS if h not in ('*',) and not h.startswith('.')), 'localhost')
+    client = APIClient(HTTP_HOST=host)
+    client.force_authenticate(user)
+    grouped = {}
+    with CaptureQueriesContext(connection) as captured:
+        for path in paths:
+            client.get(path)
+    for query in captured.captured_queries:
+        if not EXPLAINABLE_RE.match(query['sql']):
+            continue
+        entry = grouped.setdefault(normalize_sql(query['sql']), {'sql': query['sql'], 'calls': 0, 'total_ms': 0.0})
+        entry['calls'] += 1
+        entry['total_ms'] += float(query['time']) * 1000
+    workload = list(grouped.values())
+    for entry in workload:
+        entry['mean_ms'] = entry['total_ms'] / entry['calls']
+    workload.sort(key=lambda entry: entry['total_ms'], reverse=True)
+    return workload
+
+
+# === تحلیل plan ها ===
+
+def explain(sql, analyze=False):
+    """
+    plan کوئری به صورت JSON. کوئری‌های پارامتری pg_stat_statements با GENERIC_PLAN (PostgreSQL 16+) بررسی می‌شوند.
+    ANALYZE فقط برای SELECT و داخل تراکنشی که rollback می‌شود اجرا می‌شود.
+    """
+    options = ['FORMAT JSON']
+    if '$1' in sql:
+        if connection.pg_version < 160000:
+            raise ValueError('parameterized statement (EXPLAIN GENERIC_PLAN needs PostgreSQL 16+)')
+        options.append('GENERIC_PLAN')
+    elif analyze and EXPLAINABLE_RE.match(sql).group(1).upper() == 'SELECT':
+        options.append('ANALYZE')
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN ({', '.join(options)}) {sql}")
+            plan = cursor.fetchone()[0]
+        transaction.set_rollback(True)
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def _walk(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from _walk(child)
+
+
+def _conditions(expression, alias, columns):
+    """ستون‌های شرط‌های مساوی (شامل IN و IS NULL) و بازه‌ای یک عبارت Filter / Index Cond روی همین جدول."""
+    equality, ranges = [], []
+    for match in CONDITION_RE.finditer(expression or ''):
+        column = match.group('column')
+        if match.group('alias') not in (None, alias) or column not in columns:
+            continue
+        target = equality if match.group('op') in ('=', 'IS NULL') else ranges
+        if column not in target:
+            target.append(column)
+    return equality, ranges
+
+
+def _sort_keys(sort_node):
+    """کلیدهای مرتب‌سازی یک گره Sort به همراه گره scan زیر آن (اگر Sort مستقیماً روی یک جدول باشد)."""
+    node = sort_node
+    while len(node.get('Plans', ())) == 1 and node['Node Type'] not in SCAN_NODES:
+        node = node['Plans'][0]
+    if node['Node Type'] not in SCAN_NODES:
+        return None, []
+    keys = []
+    for key in sort_node.get('Sort Key', ()):
+        match = SORT_KEY_RE.match(key.strip('()'))
+        if not match or match.group('alias') not in (None, node.get('Alias')):
+            return node, []
+        keys.append(match.group('column'))
+    return node, keys
+
+
+def candidate_indexes(plan, tables):
+    """
+    ایندکس‌های پیشنهادی برای یک plan: هر scan جدولی که شرط Filter دارد (Seq Scan یا ایندکسی که فقط بخشی از شرط را پوشش می‌دهد).
+    ستون‌ها: اول شرط‌های مساوی، بعد یک ستون بازه‌ای یا کلیدهای مرتب‌سازی (برای حذف Sort).
+    tables: {نام جدول: مدل}؛ خروجی: لیست (مدل، ستون‌ها، تعداد ستون‌های مساوی ابتدای آن، نوع گره)
+    """
+    sorts = {}
+    for node in _walk(plan):
+        if node['Node Type'] in ('Sort', 'Incremental Sort'):
+            scan, keys = _sort_keys(node)
+            if scan is not None and keys:
+                sorts[id(scan)] = keys
+
+    candidates = []
+    for node in _walk(plan):
+        if node['Node Type'] not in SCAN_NODES or node.get('Relation Name') not in tables:
+            continue
+        model = tables[node['Relation Name']]
+        columns = {field.column for field in model._meta.concrete_fields}
+        alias = node.get('Alias')
+        index_condition = node.get('Index Cond') or node.get('Recheck Cond')
+        if node['Node Type'] == 'Bitmap Heap Scan' and not index_condition:
+            index_condition = ' AND '.join(child.get('Index Cond', '') for child in _walk(node) if child is not node)
+        indexed_equality, indexed_ranges = _conditions(index_condition, alias, columns)
+        equality, ranges = _conditions(node.get('Filter'), alias, columns)
+        sort_keys = sorts.get(id(node), [])
+        if not equality and not ranges and not sort_keys:
+            continue
+        leading = indexed_equality + [column for column in equality if column not in indexed_equality]
+        trailing = (indexed_ranges + ranges)[:1] or [key for key in sort_keys if key not in leading]
+        index_columns = (leading + trailing)[:MAX_INDEX_COLUMNS]
+        if index_columns:
+            candidates.append((model, tuple(index_columns), min(len(leading), len(index_columns)), node['Node Type']))
+    return candidates
+
+
+# === مقایسه با ایندکس‌های موجود ===
+
+def existing_indexes(table):
+    """ستون‌های همه ایندکس‌ها و کلیدهای یکتای موجود روی جدول (از خود دیتابیس، نه از Meta مدل)."""
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [
+        tuple(info['columns'])
+        for info in constraints.values()
+        if (info['index'] or info['unique'] or info['primary_key']) and info['columns'] and None not in info['columns']
+    ]
+
+
+def is_covered(columns, equality_count, indexes):
+    """ایندکس موجودی که ستون‌های مساوی را (به هر ترتیبی) در ابتدا و بقیه ستون‌ها را به همان ترتیب دارد."""
+    leading, trailing = set(columns[:equality_count]), list(columns[equality_count:])
+    for index in indexes:
+        if len(index) < len(columns):
+            continue
+        if set(index[:equality_count]) == leading and list(index[equality_count:len(columns)]) == trailing:
+            return True
+    return False
+
+
+def table_rows(table):
+    """تعداد تقریبی ردیف‌های جدول از آمار PostgreSQL (None اگر جدول هنوز ANALYZE نشده)."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [connection.ops.quote_name(table)])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+def advise(workload, top=20, min_table_rows=1000, analyze=False):
+    """
+    EXPLAIN پرهزینه‌ترین کوئری‌های بار کاری و پیشنهاد ایندکس‌هایی که در دیتابیس وجود ندارند.
+    هر پیشنهاد به اندازه کل زمان کوئری‌هایی که به آن نیاز دارند امتیاز می‌گیرد.
+    خروجی: (گزارش کوئری‌ها، پیشنهادها به ترتیب امتیاز)
+    """
+    tables = {model._meta.db_table: model for model in apps.get_models() if not model._meta.proxy}
+    indexes_cache, rows_cache = {}, {}
+    suggestions = {}
+    report = []
+    for entry in sorted(workload, key=lambda entry: entry['total_ms'], reverse=True)[:top]:
+        item = dict(entry, nodes=[], error=None)
+        report.append(item)
+        try:
+            plan = explain(entry['sql'], analyze=analyze)
+        except (DatabaseError, ValueError) as error:
+            item['error'] = str(error).strip().splitlines()[0]
+            continue
+        item['cost'] = plan.get('Total Cost')
+        for model, columns, equality_count, node_type in candidate_indexes(plan, tables):
+            table = model._meta.db_table
+            if table not in rows_cache:
+                rows_cache[table] = table_rows(table)
+            if rows_cache[table] is not None and rows_cache[table] < min_table_rows:
+                continue
+            if table not in indexes_cache:
+                indexes_cache[table] = existing_indexes(table)
+            if is_covered(columns, equality_count, indexes_cache[table]):
+                continue
+            item['nodes'].append(f"{node_type} on {table} ({', '.join(columns)})")
+            suggestion = suggestions.setdefault((model, columns), {
+                'model': model, 'columns': columns, 'total_ms': 0.0, 'queries': 0, 'rows': rows_cache[table],
+            })
+            suggestion['total_ms'] += entry['total_ms']
+            suggestion['queries'] += 1
+    ranked = sorted(suggestions.values(), key=lambda suggestion: suggestion['total_ms'], reverse=True)
+    return report, _drop_prefixes(ranked)
+
+
+def _drop_prefixes(suggestions):
+    """پیشنهادی که پیشوند پیشنهاد دیگری روی همان جدول است جدا ساخته نمی‌شود (ایندکس بلندتر آن را پوشش می‌دهد)."""
+    kept = []
+    for suggestion in suggestions:
+        longer = [
+            other for other in suggestions
+            if other['model'] is suggestion['model'] and len(other['columns']) > len(suggestion['columns'])
+            and other['columns'][:len(suggestion['columns'])] == suggestion['columns']
+        ]
+        if longer:
+            longer[0]['total_ms'] += suggestion['total_ms']
+            longer[0]['queries'] += suggestion['queries']
+        else:
+            kept.append(suggestion)
+    return sorted(kept, key=lambda suggestion: suggestion['total_ms'], reverse=True)
+
+
+# === خروجی ===
+
+def index_for(suggestion):
+    """models.Index معادل یک پیشنهاد با نام فیلدهای مدل (مثلاً profile به جای profile_id)."""
+    by_column = {field.column: field.name for field in suggestion['model']._meta.concrete_fields}
+    index = models.Index(fields=[by_column[column] for column in suggestion['columns']])
+    index.set_name_with_model(suggestion['model'])
+    return index
+
+
+def write_migration(suggestions, name, app_label='api'):
+    """
+    ساخت فایل مهاجرت با AddIndexConcurrently (بدون قفل نوشتن روی جدول) برای پیشنهادهای مدل‌های یک app.
+    ایندکس‌ها باید به Meta.indexes مدل‌ها هم اضافه شوند تا makemigrations آن‌ها را حذف نکند.
+    خروجی: مسیر فایل ساخته شده (None اگر پیشنهادی برای این app نباشد)
+    """
+    from django.contrib.postgres.operations import AddIndexConcurrently
+    from django.db.migrations import Migration
+    from django.db.migrations.autodetector import MigrationAutodetector
+    from django.db.migrations.loader import MigrationLoader
+    from django.db.migrations.writer import MigrationWriter
+
+    operations = [
+        AddIndexConcurrently(model_name=suggestion['model']._meta.model_name, index=index_for(suggestion))
+        for suggestion in suggestions
+        if suggestion['model']._meta.app_label == app_label
+    ]
+    if not operations:
+        return None
+    leaves = MigrationLoader(None, ignore_no_migrations=True).graph.leaf_nodes(app_label)
+    number = max((MigrationAutodetector.parse_number(leaf) or 0 for _, leaf in leaves), default=0) + 1
+    migration = Migration(f'{number:04d}_{name}', app_label)
+    migration.dependencies = leaves
+    migration.atomic = False
+    migration.operations = operations
+    writer = MigrationWriter(migration)
+    # MigrationWriter ویژگی atomic را نمی‌نویسد؛ CREATE INDEX CONCURRENTLY بیرون از تراکنش اجرا می‌شود
+    source = writer.as_string().replace(
+        'class Migration(migrations.Migration):\n', 'class Migration(migrations.Migration):\n\n    atomic = False\n', 1
+    )
+    with open(writer.path, 'w', encoding='utf-8') as migration_file:
+        migration_file.write(source)
+    return writer.path
@@ -0,0 +1,214 @@
+# api/installments.py
+
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import BooleanField, Case, CharField, DateField, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .ledger import batched_refresh, ledgers_changed
+from .models import Call, Installment, Transaction
+from .reconciliation import DIGITS, jalali_to_gregorian
+
+
+INSTALLMENT_ID_PREFIX = 'installment_'
+STATUS_CODES = {code for code, _ in Installment.STATUS_CHOICES}
+STATUS_BY_LABEL = {label: code for code, label in Installment.STATUS_CHOICES}
+# ستون‌هایی که در به‌روزرسانی گروهی مقایسه و نوشته می‌شوند
+PLAN_FIELDS = ('due_amount', 'due_date', 'status', 'transaction_id')
+BATCH_SIZE = 500
+
+
+def _parse_id(raw):
+    """شناسه قسط موجود (عدد یا installment_<id>)؛ شناسه‌های موقت فرانت‌اند (مثلاً new_...) یعنی قسط جدید."""
+    if raw in (None, ''):
+        return None
+    if isinstance(raw, int):
+        return raw
+    raw = str(raw)
+    if raw.startswith(INSTALLMENT_ID_PREFIX):
+        raw = raw[len(INSTALLMENT_ID_PREFIX):]
+    return int(raw) if raw.isdigit() else None
+
+
+def _parse_date(raw):
+    """
+    تاریخ سررسید میلادی (YYYY-MM-DD یا YYYY/MM/DD) یا شمسی (سال ۱۳۰۰ تا ۱۶۹۹، مثلاً ۱۴۰۳/۰۵/۱۰).
+    تاریخ شمسی صریحاً به میلادی تبدیل می‌شود تا ۱۴۰۳/۰۵/۱۰ به اشتباه سال ۱۴۰۳ میلادی ذخیره نشود.
+    """
+    if isinstance(raw, date):
+        return raw
+    text = str(raw or '').translate(DIGITS).strip().replace('/', '-')
+    value = parse_date(text)
+    if value is not None and value.year >= 1700:
+        return value
+    parts = text.split('-')
+    if len(parts) == 3 and all(part.isdigit() for part in parts):
+        year, month, day = (int(part) for part in parts)
+        if 1300 <= year < 1700 and 1 <= month <= 12 and 1 <= day <= (31 if month <= 6 else 30):
+            return jalali_to_gregorian(year, month, day)
+    raise ValueError(f"تاریخ سررسید نامعتبر است: {raw}")
+
+
+def _parse_status(raw):
+    raw = (raw or 'pending').strip()
+    code = raw.lower().replace(' ', '_')
+    if code in STATUS_CODES:
+        return code
+    # برچسب‌های فارسی (مثلاً «پرداخت شده») هم پذیرفته می‌شوند؛ هر مقدار دیگری یعنی قسط هنوز پرداخت نشده
+    return STATUS_BY_LABEL.get(raw, 'pending')
+
+
+def parse_plan(rows):
+    """
+    تبدیل ردیف‌های ارسالی فرانت‌اند ({id, amount, dueDate, paymentStatus, transactionId})
+    به دیکشنری‌های آماده مقایسه با اقساط موجود.
+    """
+    if not isinstance(rows, list):
+        raise ValidationError({'installments': 'لیست اقساط باید آرایه باشد.'})
+    parsed = []
+    for index, row in enumerate(rows):
+        try:
+            amount = Decimal(str(row.get('amount', 0)).replace(',', ''))
+            parsed.append({
+                'id': _parse_id(row.get('id')),
+                'due_amount': amount.quantize(Decimal('0.01')),
+                'due_date': _parse_date(row.get('dueDate')),
+                'status': _parse_status(row.get('paymentStatus')),
+                'transaction_id': int(row['transactionId']) if row.get('transactionId') else None,
+            })
+        except (AttributeError, TypeError, ValueError, InvalidOperation) as e:
+            raise ValidationError({'installments': f"ردیف {index + 1}: {e}"})
+    return parsed
+
+
+def apply_installment_plans(plans):
+    """
+    اعمال برنامه اقساط چند پروفایل به صورت تفاضلی و در یک تراکنش.
+    plans دیکشنری profile -> لیست ردیف‌های parse_plan است. ردیف‌های با شناسه موجود در صورت تغییر
+    به‌روزرسانی، ردیف‌های بدون شناسه ایجاد و اقساطی که در برنامه نیامده‌اند حذف می‌شوند؛
+    بنابراین شناسه و تاریخچه اقساط پرداخت شده حفظ می‌شود.
+    تعداد دستورات دیتابیس مستقل از تعداد اقساط و پروفایل‌هاست (خواندن، UPDATE، INSERT و DELETE گروهی).
+    خروجی: profile_id -> {'created', 'updated', 'deleted', 'unchanged'}
+    """
+    profiles = {profile.id: profile for profile in plans}
+    summary = {profile_id: {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0} for profile_id in profiles}
+    now = timezone.now()
+
+    # bulk_create و bulk_update سیگنال ندارند؛ خلاصه مالی پروفایل‌ها یک بار در انتهای تراکنش محاسبه می‌شود
+    with transaction.atomic(), batched_refresh():
+        ledgers_changed(profile_ids=profiles)
+        existing = {}
+        for installment in Installment.objects.select_for_update().filter(profile_id__in=profiles):
+            existing.setdefault(installment.profile_id, {})[installment.id] = installment
+
+        # تراکنش‌های ارجاع شده باید متعلق به همان هنرجو باشند
+        referenced = {row['transaction_id'] for rows in plans.values() for row in rows if row['transaction_id']}
+        owners = dict(Transaction.objects.filter(id__in=referenced).values_list('id', 'target_user_id'))
+
+        to_create, to_update, to_delete = [], [], []
+        for profile, rows in plans.items():
+            current = existing.get(profile.id, {})
+            kept = set()
+            for row in rows:
+                transaction_id = row['transaction_id']
+                if transaction_id and owners.get(transaction_id) != profile.user_id:
+                    raise ValidationError({'installments': f"تراکنش {transaction_id} متعلق به این هنرجو نیست."})
+                if row['id'] is None:
+                    to_create.append(Installment(
+                        profile=profile, created_at=now, updated_at=now,
+                        **{field: row[field] for field in PLAN_FIELDS},
+                    ))
+                    summary[profile.id]['created'] += 1
+                    continue
+                installment = current.get(row['id'])
+                if installment is None or row['id'] in kept:
+                    raise ValidationError({'installments': f"قسط {row['id']} متعلق به این پروفایل نیست."})
+                kept.add(row['id'])
+                changed = False
+                for field in PLAN_FIELDS:
+                    if getattr(installment, field) != row[field]:
+                        setattr(installment, field, row[field])
+                        changed = True
+                if changed:
+                    installment.updated_at = now
+                    to_update.append(installment)
+                    summary[profile.id]['updated'] += 1
+                else:
+                    summary[profile.id]['unchanged'] += 1
+            removed = [installment_id for installment_id in current if installment_id not in kept]
+            to_delete.extend(removed)
+            summary[profile.id]['deleted'] += len(removed)
+
+        if to_update:
+            Installment.objects.bulk_update(to_update, PLAN_FIELDS + ('updated_at',), batch_size=BATCH_SIZE)
+        if to_create:
+            Installment.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        if to_delete:
+            Installment.objects.filter(id__in=to_delete).delete()
+
+    return summary
+
+
+# === لیست پیگیری اقساط ===
+
+UNKNOWN_LABEL = 'نامشخص'
+# وضعیت دوره در لیست پیگیری بر اساس وضعیت پروفایل
+COURSE_STATUS_LABELS = {'active': 'فعال', 'suspended': 'مسدود'}
+
+
+def _label(field, labels):
+    return Case(
+        *(When(**{field: code}, then=Value(label)) for code, label in labels.items()),
+        default=Value(UNKNOWN_LABEL), output_field=CharField(),
+    )
+
+
+def _full_name(prefix):
+    full_name = Trim(Concat(F(f'{prefix}first_name'), Value(' '), F(f'{prefix}last_name'), output_field=CharField()))
+    return Coalesce(NullIf(full_name, Value('')), Value(UNKNOWN_LABEL), output_field=CharField())
+
+
+def tracking_queryset(today=None, overdue=False, due_within=None, apollonyar_id=None, status=None):
+    """
+    اقساط به صورت ردیف‌های تخت برای صفحه پیگیری اقساط؛ همه ستون‌های نمایشی (نام هنرجو، دوره، روزهای مانده،
+    سررسید گذشته و آخرین تماس پیگیری) با عبارات دیتابیس در همان یک کوئری محاسبه می‌شوند.
+    overdue: فقط اقساط پرداخت نشده با سررسید گذشته؛ due_within: اقساط پرداخت نشده با سررسید تا چند روز آینده.
+    """
+    today = today or timezone.localdate()
+    installments = Installment.objects.all()
+    if overdue or due_within is not None:
+        status = 'pending'
+    if status:
+        installments = installments.filter(status=status)
+    if overdue:
+        installments = installments.filter(due_date__lt=today)
+    if due_within is not None:
+        installments = installments.filter(due_date__gte=today, due_date__lte=today + timedelta(days=due_within))
+    if apollonyar_id is not None:
+        installments = installments.filter(profile__apollonyar_id=apollonyar_id)
+
+    last_contact = (
+        Call.objects.filter(profile=OuterRef('profile_id'), type='installment').exclude(status='pending')
+        .order_by('-call_timestamp').values('call_timestamp')[:1]
+    )
+    return installments.only('id', 'profile_id', 'due_amount', 'due_date', 'status').annotate(
+        student_name=_full_name('profile__user__'),
+        phone=Coalesce(F('profile__user__phone_number'), Value(UNKNOWN_LABEL), output_field=CharField()),
+        term_name=Coalesce(F('profile__term__name'), Value(UNKNOWN_LABEL), output_field=CharField()),
+        course_name=Coalesce(F('profile__term__course__name'), Value(UNKNOWN_LABEL), output_field=CharField()),
+        apollonyar_id=F('profile__apollonyar_id'),
+        apollonyar_name=_full_name('profile__apollonyar__'),
+        days_remaining=F('due_date') - Value(today, output_field=DateField()),
+        is_overdue=Case(
+            When(status='pending', due_date__lt=today, then=Value(True)),
+            default=Value(False), output_field=BooleanField(),
+        ),
+        payment_status=_label('status', dict(Installment.STATUS_CHOICES)),
+        course_status=_label('profile__status', COURSE_STATUS_LABELS),
+        last_contact=Subquery(last_contact),
+    )
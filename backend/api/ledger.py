@@ -0,0 +1,197 @@
+# api/ledger.py
+
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .batching import CHUNK_SIZE, chunks
+from .models import Installment, Profile, ProfileLedger, Transaction, User, UserLedger
+
+
+ZERO = Decimal('0.00')
+PROFILE_LEDGER_FIELDS = ('total_due', 'paid', 'outstanding', 'overdue', 'next_due_date')
+USER_LEDGER_FIELDS = (
+    'total_due', 'installments_paid', 'deposits', 'withdrawals', 'balance', 'overdue', 'next_due_date',
+)
+# اعداد جمع شده بزرگ‌تر از مبلغ یک قسط یا تراکنش هستند
+AMOUNT = DecimalField(max_digits=14, decimal_places=2)
+
+_batch = threading.local()
+
+
+def _sum(field, condition=None):
+    return Coalesce(Sum(field, filter=condition), Value(ZERO), output_field=AMOUNT)
+
+
+def _installment_totals(installments, group_by, today):
+    """جمع اقساط (بدون اقساط عودت شده) به تفکیک group_by: {شناسه: {...}}"""
+    rows = (
+        installments.exclude(status='refund').order_by().values(group_by).annotate(
+            total_due=_sum('due_amount'),
+            paid=_sum('due_amount', Q(status='paid')),
+            overdue=_sum('due_amount', Q(status='pending', due_date__lt=today)),
+            next_due_date=Min('due_date', filter=Q(status='pending', due_date__gte=today)),
+        )
+    )
+    return {row.pop(group_by): row for row in rows}
+
+
+def compute_profile_ledgers(profile_ids, today=None):
+    """مقادیر خلاصه مالی پروفایل‌ها از روی جدول اقساط: {profile_id: {...}}"""
+    today = today or timezone.localdate()
+    totals = _installment_totals(Installment.objects.filter(profile_id__in=profile_ids), 'profile_id', today)
+    ledgers = {}
+    for profile_id in profile_ids:
+        row = totals.get(profile_id, {'total_due': ZERO, 'paid': ZERO, 'overdue': ZERO, 'next_due_date': None})
+        ledgers[profile_id] = {**row, 'outstanding': row['total_due'] - row['paid']}
+    return ledgers
+
+
+def compute_user_ledgers(user_ids, today=None):
+    """
+    مقادیر خلاصه مالی کاربران: اقساط همه پروفایل‌های کاربر در برابر واریزها و برداشت‌های تایید شده او.
+    balance مثبت یعنی بدهی و منفی یعنی بستانکاری. خروجی: {user_id: {...}}
+    """
+    today = today or timezone.localdate()
+    installments = _installment_totals(
+        Installment.objects.filter(profile__user_id__in=user_ids), 'profile__user_id', today
+    )
+    payments = {
+        row.pop('target_user_id'): row
+        for row in Transaction.objects.filter(target_user_id__in=user_ids, verification_status='valid')
+        .order_by().values('target_user_id').annotate(
+            deposits=_sum('amount', Q(type='deposit')),
+            withdrawals=_sum('amount', Q(type='withdrawal')),
+        )
+    }
+    ledgers = {}
+    for user_id in user_ids:
+        due = installments.get(user_id, {'total_due': ZERO, 'paid': ZERO, 'overdue': ZERO, 'next_due_date': None})
+        paid = payments.get(user_id, {'deposits': ZERO, 'withdrawals': ZERO})
+        ledgers[user_id] = {
+            'total_due': due['total_due'],
+            'installments_paid': due['paid'],
+            'deposits': paid['deposits'],
+            'withdrawals': paid['withdrawals'],
+            'balance': due['total_due'] - paid['deposits'] + paid['withdrawals'],
+            'overdue': due['overdue'],
+            'next_due_date': due['next_due_date'],
+        }
+    return ledgers
+
+
+def _save(model, key, ledgers, fields, today):
+    if not ledgers:
+        return
+    model.objects.bulk_create(
+        [model(**{key: pk}, as_of=today, **values) for pk, values in ledgers.items()],
+        update_conflicts=True, unique_fields=[key], update_fields=fields + ('as_of', 'updated_at'),
+    )
+
+
+def refresh_ledgers(profile_ids=(), user_ids=()):
+    """
+    محاسبه دوباره و ذخیره خلاصه مالی پروفایل‌ها و کاربرانشان در تراکنش جاری.
+    ردیف پروفایل‌ها و کاربران قفل می‌شوند تا دو تغییر همزمان، خلاصه را از روی داده قدیمی بازنویسی نکنند.
+    """
+    profile_ids, user_ids = set(profile_ids), set(user_ids)
+    if not profile_ids and not user_ids:
+        return
+    today = timezone.localdate()
+    with transaction.atomic():
+        profile_ids = set(
+            Profile.objects.select_for_update().filter(id__in=profile_ids).order_by('id').values_list('id', flat=True)
+        )
+        user_ids |= set(Profile.objects.filter(id__in=profile_ids).values_list('user_id', flat=True))
+        user_ids = set(
+            User.objects.select_for_update().filter(id__in=user_ids).order_by('id').values_list('id', flat=True)
+        )
+        _save(ProfileLedger, 'profile_id', compute_profile_ledgers(profile_ids, today), PROFILE_LEDGER_FIELDS, today)
+        _save(UserLedger, 'user_id', compute_user_ledgers(user_ids, today), USER_LEDGER_FIELDS, today)
+
+
+@contextmanager
+def batched_refresh():
+    """
+    جمع کردن به‌روزرسانی‌های خلاصه مالی در تغییرات گروهی (مثلاً حذف چند قسط) و اجرای یکباره آن‌ها در انتهای بلوک.
+    بلوک باید داخل همان تراکنشی باشد که تغییرات را می‌نویسد.
+    """
+    if getattr(_batch, 'pending', None) is not None:
+        yield
+        return
+    _batch.pending = (set(), set())
+    try:
+        yield
+        profile_ids, user_ids = _batch.pending
+    finally:
+        _batch.pending = None
+    refresh_ledgers(profile_ids, user_ids)
+
+
+def ledgers_changed(profile_ids=(), user_ids=()):
+    """اعلام تغییر داده‌های مالی؛ داخل batched_refresh جمع و در غیر این صورت همان لحظه اعمال می‌شود."""
+    pending = getattr(_batch, 'pending', None)
+    if pending is None:
+        refresh_ledgers(profile_ids, user_ids)
+    else:
+        pending[0].update(profile_ids)
+        pending[1].update(user_ids)
+
+
+def refresh_due_ledgers(today=None):
+    """
+    به‌روزرسانی روزانه مبلغ سررسید گذشته: فقط خلاصه‌هایی که سررسید بعدی‌شان گذشته است دوباره محاسبه می‌شوند
+    (بقیه تا تغییر اقساطشان درست می‌مانند). خروجی: (تعداد پروفایل‌ها، تعداد کاربران)
+    """
+    today = today or timezone.localdate()
+    profile_ids = list(ProfileLedger.objects.filter(next_due_date__lt=today).values_list('profile_id', flat=True))
+    user_ids = list(UserLedger.objects.filter(next_due_date__lt=today).values_list('user_id', flat=True))
+    for chunk in chunks(profile_ids):
+        refresh_ledgers(profile_ids=chunk)
+    for chunk in chunks(user_ids):
+        refresh_ledgers(user_ids=chunk)
+    return len(profile_ids), len(user_ids)
+
+
+def _drift(model, key, expected, fields):
+    stored = {
+        row[key]: row for row in model.objects.filter(**{f'{key}__in': list(expected)}).values(key, *fields)
+    }
+    drift = []
+    for pk, values in expected.items():
+        current = stored.get(pk)
+        if current is None:
+            if any(values[field] for field in fields):
+                drift.append({key: pk, 'missing': True})
+            continue
+        changed = {field: (str(current[field]), str(values[field])) for field in fields if current[field] != values[field]}
+        if changed:
+            drift.append({key: pk, 'fields': changed})
+    return drift
+
+
+def verify_ledgers(fix=False):
+    """
+    محاسبه دوباره همه خلاصه‌های مالی از جدول اقساط و تراکنش‌ها و گزارش اختلاف با مقادیر ذخیره شده.
+    با fix=True ردیف‌های دارای اختلاف (یا ساخته نشده) اصلاح می‌شوند.
+    خروجی: {'profiles': [...], 'users': [...]} که هر مورد {شناسه، fields: {فیلد: (ذخیره شده، درست)}} یا missing است.
+    """
+    today = timezone.localdate()
+    report = {'profiles': [], 'users': []}
+    for model, key, ids, compute, fields, section, refresh_key in (
+        (ProfileLedger, 'profile_id', Profile.objects.values_list('id', flat=True),
+         compute_profile_ledgers, PROFILE_LEDGER_FIELDS, 'profiles', 'profile_ids'),
+        (UserLedger, 'user_id', User.objects.values_list('id', flat=True),
+         compute_user_ledgers, USER_LEDGER_FIELDS, 'users', 'user_ids'),
+    ):
+        for chunk in chunks(ids.order_by('id').iterator(chunk_size=CHUNK_SIZE)):
+            drift = _drift(model, key, compute(chunk, today), fields)
+            report[section].extend(drift)
+            if fix and drift:
+                refresh_ledgers(**{refresh_key: [item[key] for item in drift]})
+    return report
@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+
+from api.index_advisor import (
+    advise, index_for, workload_from_pg_stat_statements, workload_from_requests, write_migration,
+)
+from api.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Rank the query workload by total time, EXPLAIN the most expensive queries and propose '
+        'indexes that are missing from the database (optionally writing a migration for them)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source', choices=['pg_stat_statements', 'requests'], default='pg_stat_statements',
+            help='Where the workload comes from: the pg_stat_statements view or API requests replayed here',
+        )
+        parser.add_argument(
+            '--path', action='append', default=[],
+            help='API path to request with --source=requests (repeatable), e.g. /api/profiles/?status=active',
+        )
+        parser.add_argument('--user', help='Phone number of the user the requests are made as (--source=requests)')
+        parser.add_argument('--top', type=int, default=20, help='Number of most expensive queries to analyze')
+        parser.add_argument(
+            '--min-table-rows', type=int, default=1000,
+            help='Ignore tables with fewer estimated rows (sequential scans are cheaper there)',
+        )
+        parser.add_argument('--analyze', action='store_true', help='Use EXPLAIN ANALYZE for SELECT queries')
+        parser.add_argument('--write', action='store_true', help='Write a migration that creates the proposed indexes')
+        parser.add_argument('--name', default='advised_indexes', help='Name of the written migration')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The index advisor needs PostgreSQL (EXPLAIN FORMAT JSON and pg_class statistics)')
+
+        if options['source'] == 'requests':
+            if not options['path'] or not options['user']:
+                raise CommandError('--source=requests needs at least one --path and --user')
+            user = User.objects.filter(phone_number=options['user']).first()
+            if user is None:
+                raise CommandError(f"No user with phone number {options['user']}")
+            workload = workload_from_requests(options['path'], user)
+        else:
+            try:
+                workload = workload_from_pg_stat_statements(options['top'])
+            except DatabaseError as error:
+                raise CommandError(
+                    f'Could not read pg_stat_statements ({error}). Enable it with shared_preload_libraries '
+                    'and CREATE EXTENSION pg_stat_statements, or use --source=requests.'
+                )
+
+        report, suggestions = advise(
+            workload, top=options['top'], min_table_rows=options['min_table_rows'], analyze=options['analyze'],
+        )
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Queries by total time:'))
+        for rank, item in enumerate(report, 1):
+            sql = ' '.join(item['sql'].split())
+            self.stdout.write(
+                f"{rank:3}. {item['total_ms']:10.1f} ms total  {item['calls']:7} calls  "
+                f"{item['mean_ms']:8.2f} ms mean  {sql[:110]}"
+            )
+            if item['error']:
+                self.stdout.write(self.style.WARNING(f'       not analyzed: {item["error"]}'))
+            for node in item['nodes']:
+                self.stdout.write(f'       needs index: {node}')
+
+        if not suggestions:
+            self.stdout.write(self.style.SUCCESS('No missing indexes found for this workload'))
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Proposed indexes (add to Meta.indexes):'))
+        for suggestion in suggestions:
+            index = index_for(suggestion)
+            rows = 'unknown' if suggestion['rows'] is None else f"~{int(suggestion['rows'])}"
+            self.stdout.write(
+                f"  {suggestion['model'].__name__}: models.Index(fields={index.fields!r})  "
+                f"# {suggestion['total_ms']:.1f} ms over {suggestion['queries']} queries, {rows} rows"
+            )
+
+        if options['write']:
+            path = write_migration(suggestions, options['name'])
+            if path:
+                self.stdout.write(self.style.SUCCESS(f'Wrote {path}; add the indexes above to the models\' Meta.indexes'))
+            else:
+                self.stdout.write('None of the proposed indexes belong to the api app; no migration written')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.images import pending_image_rows, process_image
+
+
+class Command(BaseCommand):
+    help = 'Build thumbnails and sanitized SVGs for user photos, receipts and medal icons that have none yet'
+
+    def handle(self, *args, **options):
+        count = 0
+        for model, pk in pending_image_rows():
+            process_image(model, pk)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Processed {count} images'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from api.fanout import fan_out_terms
+
+
+class Command(BaseCommand):
+    help = (
+        'Create missing assignments for every profile from its term assignment definitions. '
+        'Background fan-out jobs live in process memory and are lost on restart or deploy, '
+        'so run this periodically (e.g. hourly from cron) to catch up'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--term',
+            type=int,
+            action='append',
+            dest='terms',
+            help='Only fan out this term id (can be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        created = fan_out_terms(options['terms'])
+        self.stdout.write(self.style.SUCCESS(f'Created {created} missing assignments'))
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from api.storage import collect_garbage, recount_references
+
+
+class Command(BaseCommand):
+    help = 'Delete content-addressed files that are no longer referenced by any template, submission or upload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recount', action='store_true', help='Rebuild reference counts from the database first')
+        parser.add_argument('--grace-hours', type=float, help='Only delete files unreferenced for at least this long')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            fixed = recount_references()
+            self.stdout.write(f'Corrected reference counts of {fixed} files')
+        grace = timedelta(hours=options['grace_hours']) if options['grace_hours'] is not None else None
+        removed, freed = collect_garbage(grace)
+        self.stdout.write(self.style.SUCCESS(f'Deleted {removed} unreferenced files ({freed} bytes)'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.worklist import generate_worklists
+
+
+class Command(BaseCommand):
+    help = 'Create pending calls for call definition windows that opened since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all-open',
+            action='store_true',
+            help='Also re-check open windows that were already generated (e.g. for newly enrolled profiles)',
+        )
+
+    def handle(self, *args, **options):
+        results = generate_worklists(include_generated=options['all_open'])
+        created = sum(results.values())
+        self.stdout.write(self.style.SUCCESS(f'Created {created} pending calls for {len(results)} call windows'))
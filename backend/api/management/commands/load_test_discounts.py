@@ -0,0 +1,115 @@
+import queue
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.exceptions import ValidationError
+
+from api.discounts import redeem
+from api.models import DiscountCode, DiscountRedemption, Profile
+
+
+def naive_redeem(code, profile):
+    """خواندن، بررسی و نوشتن دوباره شمارنده؛ فقط برای مقایسه در آزمون بار (همزمان بیش از سقف مصرف می‌شود)."""
+    with transaction.atomic():
+        discount = DiscountCode.objects.get(code=code)
+        if discount.usage_count >= discount.max_usage:
+            raise ValidationError({'code': 'ظرفیت استفاده از این کد تخفیف تمام شده است.'})
+        discount.usage_count += 1
+        discount.save(update_fields=['usage_count'])
+        return DiscountRedemption.objects.create(discount_code=discount, profile=profile)
+
+
+class Command(BaseCommand):
+    help = (
+        'Optional contention check (the redeem rules are covered by api/tests/test_discounts.py): '
+        'redeem a temporary discount code from many threads at once and check that usage_count, '
+        'the redemption rows and the successful requests all agree with max_usage'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=300, help='Number of redemptions (one per profile)')
+        parser.add_argument('--max-usage', type=int, default=100, help='max_usage of the temporary code')
+        parser.add_argument(
+            '--workers', type=int, default=50,
+            help='Concurrent threads, each with its own database connection (keep below max_connections)',
+        )
+        parser.add_argument(
+            '--naive', action='store_true',
+            help='Use a read-modify-write increment instead of api.discounts.redeem, for comparison',
+        )
+        parser.add_argument('--keep', action='store_true', help='Do not delete the temporary code afterwards')
+
+    def handle(self, *args, **options):
+        attempts, workers = options['attempts'], options['workers']
+        profiles = list(Profile.objects.order_by('id')[:attempts])
+        if len(profiles) < attempts:
+            raise CommandError(f'Need {attempts} profiles (one redemption each), found {len(profiles)}')
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite serializes all writers; run against PostgreSQL for real contention'))
+
+        code = f'LOADTEST-{uuid.uuid4().hex[:8]}'
+        discount = DiscountCode.objects.create(code=code, max_usage=options['max_usage'], cash_price=1)
+        redeem_one = naive_redeem if options['naive'] else redeem
+        pending = queue.Queue()
+        for profile in profiles:
+            pending.put(profile)
+        start = threading.Event()
+        outcomes = Counter()
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                start.wait()
+                while True:
+                    try:
+                        profile = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        redeem_one(code, profile)
+                        outcome = 'redeemed'
+                    except ValidationError:
+                        outcome = 'rejected'
+                    except Exception as error:
+                        outcome = f'error: {type(error).__name__}'
+                    with lock:
+                        outcomes[outcome] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        began = time.monotonic()
+        start.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - began
+
+        try:
+            discount.refresh_from_db()
+            rows = discount.redemptions.count()
+            expected = min(options['max_usage'], attempts)
+            self.stdout.write(
+                f"{attempts} redemptions with {workers} workers in {elapsed:.2f}s "
+                f"({attempts / elapsed:.0f}/s): {dict(outcomes)}"
+            )
+            self.stdout.write(
+                f'max_usage={discount.max_usage} usage_count={discount.usage_count} '
+                f"redemption rows={rows} successful requests={outcomes['redeemed']}"
+            )
+        finally:
+            if not options['keep']:
+                discount.delete()
+
+        consistent = discount.usage_count == rows == outcomes['redeemed'] == expected
+        if consistent:
+            self.stdout.write(self.style.SUCCESS('Counts are consistent'))
+        elif options['naive']:
+            self.stdout.write(self.style.WARNING('Counts disagree (expected for the read-modify-write increment)'))
+        else:
+            raise CommandError(f'Counts disagree: expected {expected} redemptions')
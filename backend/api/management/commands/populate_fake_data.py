@@ -11,6 +11,7 @@ from api.models import (
     Installment, Assignment, AssignmentSubmission, AssignmentSubmissionFile,
     Call, Note, Log, OTPCode
 )
+from api.fanout import fan_out_terms
 
 User = get_user_model()
 
@@ -333,24 +334,10 @@ class Command(BaseCommand):
         self.stdout.write(f'Created {len(profiles)} Profiles')
 
     def create_assignments(self):
-        """Create fake assignments for profiles"""
-        profiles = Profile.objects.filter(term__isnull=False)
-        assignment_defs = AssignmentDef.objects.all()
-        assignments = []
-        
-        for profile in profiles:
-            # Get assignments for this profile's term
-            term_assignments = assignment_defs.filter(term=profile.term)
-            
-            for assignment_def in term_assignments:
-                assignment = Assignment.objects.create(
-                    profile=profile,
-                    assignment_def=assignment_def,
-                    deadline=assignment_def.deadline
-                )
-                assignments.append(assignment)
-        
-        self.stdout.write(f'Created {len(assignments)} Assignments')
+        """Create assignments for every profile from its term's assignment definitions"""
+        # Same engine the signals use, so it is safe alongside the background fan-out jobs
+        created = fan_out_terms()
+        self.stdout.write(f'Created {created} Assignments ({Assignment.objects.count()} in total)')
 
     def create_transactions_and_installments(self):
         """Create fake transactions and installments"""
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.transcoding import process_pending
+
+
+class Command(BaseCommand):
+    help = 'Build preview renditions and waveform peaks for submission files still waiting for processing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true', help='Also retry files whose processing failed')
+
+    def handle(self, *args, **options):
+        count = process_pending(include_failed=options['retry_failed'])
+        self.stdout.write(self.style.SUCCESS(f'Processed {count} submission files'))
@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.call_stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily call statistics rollup from the calls table (all days, or from --since on)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only rebuild days on or after this date (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+        created = rebuild_stats(since)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {created} daily call statistics rows'))
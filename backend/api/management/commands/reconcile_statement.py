@@ -0,0 +1,61 @@
+import csv
+import io
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.reconciliation import MATCH_WINDOW_DAYS, check_encoding, reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        'Match a bank statement CSV against pending card-to-card and PAYA transactions by reference number, '
+        'amount and date, and verify the matched transactions in batches'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('statement', help='Path of the statement CSV file (first row is the header)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report matches, do not verify anything')
+        parser.add_argument(
+            '--window-days', type=int, default=MATCH_WINDOW_DAYS,
+            help='Maximum days between the transaction and the statement date',
+        )
+        parser.add_argument('--encoding', default='utf-8-sig', help='Encoding of the statement file')
+        parser.add_argument('--reference-column', help='Header of the reference number column')
+        parser.add_argument('--amount-column', help='Header of the credited amount column')
+        parser.add_argument('--date-column', help='Header of the date column')
+        parser.add_argument('--report', help='Write unmatched, ambiguous and invalid lines to this CSV file')
+
+    def handle(self, *args, **options):
+        columns = {
+            'reference': options['reference_column'], 'amount': options['amount_column'], 'date': options['date_column'],
+        }
+        try:
+            with open(options['statement'], 'rb') as raw:
+                # each batch commits on its own, so decode the whole file before verifying anything
+                check_encoding(raw, options['encoding'])
+                statement = io.TextIOWrapper(raw, encoding=options['encoding'], newline='')
+                report = reconcile(
+                    statement, apply=not options['dry_run'], window_days=options['window_days'], columns=columns,
+                )
+        except (OSError, LookupError, ValueError) as error:
+            raise CommandError(str(error))
+
+        problems = report['unmatched'] + report['ambiguous'] + report['invalid']
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8', newline='') as output:
+                writer = csv.DictWriter(
+                    output, fieldnames=['line', 'reference', 'amount', 'date', 'reason', 'error', 'transactions', 'matchedLine'],
+                )
+                writer.writeheader()
+                for row in sorted(problems, key=lambda row: row['line']):
+                    writer.writerow(row)
+        else:
+            for row in sorted(problems, key=lambda row: row['line'])[:50]:
+                self.stdout.write(f"  line {row['line']}: {row.get('reason') or row.get('error')} {row.get('reference', '')}")
+
+        verb = 'Would verify' if options['dry_run'] else 'Verified'
+        count = report['matched'] if options['dry_run'] else report['verified']
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {count} transactions from {report['lines']} lines: {len(report['unmatched'])} unmatched, "
+            f"{len(report['ambiguous'])} ambiguous, {len(report['invalid'])} invalid, {report['skipped']} skipped"
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.ledger import refresh_due_ledgers
+
+
+class Command(BaseCommand):
+    help = 'Recompute ledger summaries whose next due date has passed (run daily to roll pending installments into overdue)'
+
+    def handle(self, *args, **options):
+        profiles, users = refresh_due_ledgers()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {profiles} profile and {users} user ledgers'))
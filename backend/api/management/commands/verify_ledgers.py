@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from api.ledger import verify_ledgers
+
+
+class Command(BaseCommand):
+    help = 'Recompute every profile and user ledger from installments and transactions and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rewrite drifted or missing ledger rows')
+        parser.add_argument('--report', help='Write the full drift report as JSON to this path')
+
+    def handle(self, *args, **options):
+        report = verify_ledgers(fix=options['fix'])
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+        for section in ('profiles', 'users'):
+            for item in report[section][:20]:
+                self.stdout.write(f'{section}: {json.dumps(item, ensure_ascii=False)}')
+        drifted = len(report['profiles']) + len(report['users'])
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('All ledgers match'))
+            return
+        action = 'fixed' if options['fix'] else 'found'
+        style = self.style.SUCCESS if options['fix'] else self.style.WARNING
+        self.stdout.write(style(
+            f"Drift {action}: {len(report['profiles'])} profile and {len(report['users'])} user ledgers"
+        ))
@@ -0,0 +1,183 @@
+# api/media.py
+
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .images import source_name
+from .models import AssignmentDefTemplate, AssignmentSubmissionFile, Transaction, UploadSession
+from .storage import BLOB_PREFIX, is_blob
+
+
+mimetypes.add_type('audio/mp4', '.m4a')
+
+MEDIA_BLOCK_SIZE = 64 * 1024
+# پوشه‌هایی که هر کاربر وارد شده‌ای می‌تواند ببیند
+PUBLIC_PREFIXES = ('assignment_templates/', 'user_photos/', 'medal_icons/')
+SERVED_PREFIXES = PUBLIC_PREFIXES + ('submission_files/', 'receipts/', f'{BLOB_PREFIX}/')
+# فقط این نوع‌ها در مرورگر نمایش داده می‌شوند؛ بقیه (مثلاً HTML و SVG) همیشه دانلود می‌شوند
+INLINE_TYPES = re.compile(r'^(audio/|video/|image/(?!svg)|application/pdf$|application/json$|text/plain$)')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def request_user(request):
+    """کاربر درخواست از توکن JWT (هدر Authorization) یا session پنل مدیریت؛ None برای درخواست ناشناس."""
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        result = None
+    if result:
+        return result[0]
+    user = getattr(request, 'user', None)
+    return user if user is not None and user.is_authenticated else None
+
+
+def clean_name(name):
+    """
+    نام فایل درخواستی به شرط اینکه مسیر نسبی و نرمال باشد، وگرنه None.
+    بررسی پیشوند پوشه‌ها روی همین نام انجام می‌شود، پس «user_photos/../receipts/x.jpg» (که storage آن را به
+    receipts/x.jpg تبدیل می‌کند)، مسیر مطلق، بخش‌های . و .. و جداکننده \\ پذیرفته نمی‌شوند.
+    """
+    if not name or name.startswith('/') or '\\' in name or '\x00' in name:
+        return None
+    if posixpath.normpath(name) != name or '..' in name.split('/'):
+        return None
+    return name
+
+
+def can_access(user, name):
+    """
+    قوانین دسترسی به فایل‌ها: کارمندان به همه فایل‌ها، بقیه به فایل‌های عمومی، رسیدهای تراکنش‌های خود،
+    فایل‌های ارسالی و آپلودهای خود (و پیش‌نمایش و نسخه‌های کوچک آن‌ها) و فایل‌های الگوی تکالیف.
+    """
+    if user is None or clean_name(name) is None:
+        return False
+    if user.is_staff or name.startswith(PUBLIC_PREFIXES):
+        return True
+    if name.startswith('receipts/'):
+        return Transaction.objects.filter(target_user=user, receipt_image__in={name, source_name(name)}).exists()
+    if AssignmentSubmissionFile.objects.filter(
+        Q(file=name) | Q(preview=name) | Q(waveform=name),
+        submission__assignment__profile__user=user,
+    ).exists():
+        return True
+    if UploadSession.objects.filter(owner=user, file=name).exists():
+        return True
+    return is_blob(name) and AssignmentDefTemplate.objects.filter(file=name).exists()
+
+
+def parse_range(header, size):
+    """
+    بازه درخواستی هدر Range به صورت (شروع، پایان) شامل هر دو سر.
+    None یعنی کل فایل ارسال شود (هدر نیست یا چند بازه‌ای است)؛ بازه خارج از فایل RangeNotSatisfiable می‌دهد.
+    """
+    match = RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start == '':
+        # bytes=-N: N بایت آخر
+        length = int(end)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as source:
+        source.seek(start)
+        while length > 0:
+            block = source.read(min(MEDIA_BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def serve_media(request, name):
+    """
+    ارسال یک فایل با پشتیبانی از درخواست‌های شرطی (ETag / Last-Modified)، بازه‌های بایت (Range)
+    و در صورت تنظیم MEDIA_SENDFILE، سپردن ارسال بایت‌ها به وب‌سرور (X-Accel-Redirect یا X-Sendfile).
+    """
+    try:
+        path = default_storage.path(name)
+    except SuspiciousFileOperation:
+        return None
+    if not os.path.isfile(path):
+        return None
+
+    stat = os.stat(path)
+    size, last_modified = stat.st_size, int(stat.st_mtime)
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+    def with_headers(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # فایل‌های storage محتوا-محور هیچ‌وقت تغییر نمی‌کنند
+        response['Cache-Control'] = 'private, max-age=31536000, immutable' if is_blob(name) else 'private, no-cache'
+        return response
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional is not None:
+        return with_headers(conditional) if isinstance(conditional, HttpResponseNotModified) else conditional
+
+    sendfile = getattr(settings, 'MEDIA_SENDFILE', None)
+    if sendfile:
+        # Range و ارسال فایل توسط خود وب‌سرور انجام می‌شود
+        response = HttpResponse(content_type=content_type)
+        if sendfile == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_REDIRECT_PREFIX + name)
+        else:
+            response['X-Sendfile'] = path
+    else:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return with_headers(response)
+        if byte_range is not None and _if_range_matches(request, etag, last_modified):
+            start, end = byte_range
+            response = StreamingHttpResponse(_read_range(path, start, end - start + 1), status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = end - start + 1
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+            response['Content-Length'] = size
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Content-Disposition'] = content_disposition_header(
+        not INLINE_TYPES.match(content_type), os.path.basename(name)
+    )
+    return with_headers(response)
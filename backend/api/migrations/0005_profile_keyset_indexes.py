@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_update_status_choices'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['created_at', 'id'], name='api_profile_created_a3f243_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='api_profile_status_209c89_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['type', 'created_at', 'id'], name='api_profile_type_c925e5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['term', 'created_at', 'id'], name='api_profile_term_id_6efc74_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['group', 'created_at', 'id'], name='api_profile_group_i_5fc094_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['course', 'created_at', 'id'], name='api_profile_course__1a98e2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['apollonyar', 'created_at', 'id'], name='api_profile_apollon_641d62_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_profile_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='log',
+            name='action_code',
+            field=models.CharField(blank=True, choices=[('call_logged', 'ثبت تماس'), ('note_added', 'افزودن یادداشت'), ('note_removed', 'حذف یادداشت'), ('medal_awarded', 'اعطای مدال'), ('medal_removed', 'حذف مدال'), ('term_changed', 'تغییر ترم'), ('apollonyar_changed', 'تغییر آپولون\u200cیار'), ('type_changed', 'تغییر نوع هنرجو'), ('status_changed', 'تغییر وضعیت هنرجو'), ('deadline_changed', 'تغییر مهلت تکلیف')], max_length=50, verbose_name='کد اقدام'),
+        ),
+        migrations.AddField(
+            model_name='log',
+            name='actor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='کاربر انجام دهنده'),
+        ),
+        migrations.AddField(
+            model_name='log',
+            name='profile',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='logs', to='api.profile', verbose_name='پروفایل هدف'),
+        ),
+        migrations.AddIndex(
+            model_name='log',
+            index=models.Index(fields=['profile', 'timestamp', 'id'], name='api_log_profile_327c2e_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_log_profile_references'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='installment',
+            index=models.Index(fields=['profile', 'due_date', 'id'], name='api_install_profile_198d1c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['target_user', 'timestamp', 'id'], name='api_transac_target__96778a_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_payments_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignmentsubmission',
+            index=models.Index(fields=['assignment', 'submission_timestamp', 'id'], name='api_assignm_assignm_7f8f32_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignmentsubmission',
+            index=models.Index(condition=models.Q(('grade__isnull', True)), fields=['submission_timestamp', 'id'], name='submission_review_queue_idx'),
+        ),
+    ]
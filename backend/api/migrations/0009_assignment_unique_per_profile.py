@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:21
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def remove_duplicate_assignments(apps, schema_editor):
+    """
+    حذف تکالیف تکراری (profile, assignment_def) پیش از افزودن قید یکتا.
+    از هر گروه تکلیفی که بیشترین ارسال را دارد (در تساوی، قدیمی‌ترین) نگه داشته می‌شود و
+    ارسال‌های تکراری‌های دیگر به آن منتقل می‌شوند تا هیچ ارسال یا نمره‌ای از بین نرود.
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        # بررسی کلیدهای خارجی deferred همین حالا انجام شود؛ وگرنه ALTER TABLE بعدی با pending trigger events خطا می‌دهد
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+    Assignment = apps.get_model('api', 'Assignment')
+    AssignmentSubmission = apps.get_model('api', 'AssignmentSubmission')
+    groups = (
+        Assignment.objects.values('profile_id', 'assignment_def_id')
+        .annotate(rows=Count('id')).filter(rows__gt=1)
+    )
+    for group in list(groups):
+        ids = list(
+            Assignment.objects.filter(profile_id=group['profile_id'], assignment_def_id=group['assignment_def_id'])
+            .annotate(submission_count=Count('submissions')).order_by('-submission_count', 'id')
+            .values_list('id', flat=True)
+        )
+        kept, duplicates = ids[0], ids[1:]
+        AssignmentSubmission.objects.filter(assignment_id__in=duplicates).update(assignment_id=kept)
+        Assignment.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_submission_latest_and_review_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_assignments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='assignment',
+            constraint=models.UniqueConstraint(fields=('profile', 'assignment_def'), name='unique_assignment_per_profile'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_assignment_unique_per_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignmentsubmission',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_submissions', to='api.apollonyar', verbose_name='در دست بررسی توسط'),
+        ),
+        migrations.AddField(
+            model_name='assignmentsubmission',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='پایان مهلت بررسی'),
+        ),
+    ]
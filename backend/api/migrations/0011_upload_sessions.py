@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:27
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_submission_grading_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('description', models.TextField(blank=True, null=True, verbose_name='توضیحات')),
+                ('filename', models.CharField(max_length=255, verbose_name='نام فایل')),
+                ('total_size', models.BigIntegerField(verbose_name='حجم کل')),
+                ('chunk_size', models.PositiveIntegerField(verbose_name='حجم هر تکه')),
+                ('total_chunks', models.PositiveIntegerField(verbose_name='تعداد تکه\u200cها')),
+                ('sha256', models.CharField(blank=True, max_length=64, verbose_name='checksum فایل کامل')),
+                ('status', models.CharField(choices=[('open', 'در حال آپلود'), ('assembled', 'سرهم شده'), ('submitted', 'ثبت شده')], default='open', max_length=20, verbose_name='وضعیت')),
+                ('file', models.FileField(blank=True, null=True, upload_to='submission_files/', verbose_name='فایل سرهم شده')),
+                ('expires_at', models.DateTimeField(verbose_name='زمان انقضا')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='زمان ایجاد')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='زمان به\u200cروزرسانی')),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='api.assignment', verbose_name='تکلیف')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='کاربر')),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.assignmentdeftemplate', verbose_name='فایل الگو')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField(verbose_name='شماره تکه')),
+                ('size', models.PositiveIntegerField(verbose_name='حجم')),
+                ('sha256', models.CharField(max_length=64, verbose_name='checksum')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='زمان ایجاد')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='api.uploadsession', verbose_name='جلسه آپلود')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='uploadsession',
+            index=models.Index(fields=['status', 'expires_at'], name='api_uploads_status_660266_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='uploadchunk',
+            constraint=models.UniqueConstraint(fields=('session', 'index'), name='unique_upload_chunk'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignmentsubmissionfile',
+            name='duration',
+            field=models.FloatField(blank=True, null=True, verbose_name='مدت (ثانیه)'),
+        ),
+        migrations.AddField(
+            model_name='assignmentsubmissionfile',
+            name='media_error',
+            field=models.TextField(blank=True, verbose_name='خطای پردازش رسانه'),
+        ),
+        migrations.AddField(
+            model_name='assignmentsubmissionfile',
+            name='media_status',
+            field=models.CharField(choices=[('pending', 'در انتظار پردازش'), ('processing', 'در حال پردازش'), ('ready', 'آماده'), ('failed', 'ناموفق'), ('skipped', 'غیر رسانه\u200cای')], db_index=True, default='pending', max_length=20, verbose_name='وضعیت پردازش رسانه'),
+        ),
+        migrations.AddField(
+            model_name='assignmentsubmissionfile',
+            name='preview',
+            field=models.FileField(blank=True, max_length=255, upload_to='', verbose_name='پیش\u200cنمایش'),
+        ),
+        migrations.AddField(
+            model_name='assignmentsubmissionfile',
+            name='waveform',
+            field=models.FileField(blank=True, max_length=255, upload_to='', verbose_name='waveform'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:35
+
+import api.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_submission_file_media'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assignmentdeftemplate',
+            name='file',
+            field=models.FileField(storage=api.storage.blob_storage, upload_to='assignment_templates/', verbose_name='فایل'),
+        ),
+        migrations.AlterField(
+            model_name='assignmentsubmissionfile',
+            name='file',
+            field=models.FileField(storage=api.storage.blob_storage, upload_to='submission_files/', verbose_name='فایل ارسالی'),
+        ),
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=api.storage.blob_storage, upload_to='submission_files/', verbose_name='فایل سرهم شده'),
+        ),
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='نام فایل')),
+                ('sha256', models.CharField(max_length=64, verbose_name='checksum')),
+                ('size', models.BigIntegerField(verbose_name='حجم')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='تعداد ارجاع')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='زمان ایجاد')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='زمان به\u200cروزرسانی')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ref_count', 'updated_at'], name='api_storedb_ref_cou_d83f0a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medaldef',
+            name='icon_variants',
+            field=models.JSONField(blank=True, default=dict, verbose_name='نسخه پاک\u200cسازی شده آیکون'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='receipt_variants',
+            field=models.JSONField(blank=True, default=dict, verbose_name='نسخه\u200cهای کوچک عکس رسید'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='photo_variants',
+            field=models.JSONField(blank=True, default=dict, verbose_name='نسخه\u200cهای کوچک عکس'),
+        ),
+    ]
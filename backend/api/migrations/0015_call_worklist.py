@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calldef',
+            name='worklist_generated_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='زمان ساخت لیست تماس'),
+        ),
+        migrations.AddIndex(
+            model_name='call',
+            index=models.Index(fields=['caller', 'status', 'call_timestamp', 'id'], name='api_call_caller__92c157_idx'),
+        ),
+    ]
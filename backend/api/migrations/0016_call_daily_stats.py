@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:49
+
+import django.db.models.deletion
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_call_stats(apps, schema_editor):
+    """پر کردن جدول خلاصه از تماس‌های موجود (همان محاسبه api.call_stats.rebuild_stats با مدل‌های تاریخی)."""
+    Call = apps.get_model('api', 'Call')
+    CallDailyStat = apps.get_model('api', 'CallDailyStat')
+    keys = ('day', 'caller_id', 'call_def_id', 'type', 'status')
+    rows = (
+        Call.objects.filter(call_timestamp__isnull=False).annotate(day=TruncDate('call_timestamp'))
+        .order_by().values(*keys).annotate(count=Count('id')).values_list(*keys, 'count')
+    )
+    batch = []
+    for *key, count in rows.iterator(chunk_size=1000):
+        batch.append(CallDailyStat(count=count, **dict(zip(keys, key))))
+        if len(batch) == 1000:
+            CallDailyStat.objects.bulk_create(batch)
+            batch = []
+    CallDailyStat.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_call_worklist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CallDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='روز')),
+                ('type', models.CharField(choices=[('course', 'دوره'), ('installment', 'قسط'), ('cancellation', 'انصراف'), ('other', 'غیره')], max_length=20, verbose_name='نوع تماس')),
+                ('status', models.CharField(choices=[('pending', 'در انتظار'), ('not_answered', 'بی\u200cپاسخ'), ('successful', 'موفق'), ('lost', 'سوخته')], max_length=20, verbose_name='وضعیت')),
+                ('count', models.IntegerField(default=0, verbose_name='تعداد')),
+                ('call_def', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='api.calldef', verbose_name='تعریف تماس')),
+                ('caller', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='api.apollonyar', verbose_name='تماس گیرنده')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['caller', 'day'], name='api_calldai_caller__f2d13f_idx')],
+                'constraints': [models.UniqueConstraint(models.F('day'), django.db.models.functions.comparison.Coalesce('caller', models.Value(0), output_field=models.BigIntegerField()), django.db.models.functions.comparison.Coalesce('call_def', models.Value(0), output_field=models.BigIntegerField()), models.F('type'), models.F('status'), name='unique_call_daily_stat')],
+            },
+        ),
+        migrations.RunPython(backfill_call_stats, migrations.RunPython.noop),
+    ]
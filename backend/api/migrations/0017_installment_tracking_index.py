@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_call_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='installment',
+            index=models.Index(fields=['status', 'due_date', 'id'], name='api_install_status_77956f_idx'),
+        ),
+    ]
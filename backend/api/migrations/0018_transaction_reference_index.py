@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_installment_tracking_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['reference_number', 'verification_status'], name='api_transac_referen_6cd217_idx'),
+        ),
+    ]
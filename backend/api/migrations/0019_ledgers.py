@@ -0,0 +1,75 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+from api.batching import CHUNK_SIZE, chunks
+from api.ledger import (
+    PROFILE_LEDGER_FIELDS, USER_LEDGER_FIELDS, compute_profile_ledgers, compute_user_ledgers,
+)
+
+
+def backfill_ledgers(apps, schema_editor):
+    """
+    ساخت خلاصه مالی همه پروفایل‌ها و کاربران موجود؛ بدون آن فیلتر ?debt= تا اجرای verify_ledgers --fix چیزی برنمی‌گرداند.
+    مقادیر با همان توابع api.ledger (دسته‌های CHUNK_SIZE تایی) محاسبه و با مدل‌های تاریخی نوشته می‌شوند.
+    """
+    today = timezone.localdate()
+    for model_name, owner, key, compute, fields in (
+        ('ProfileLedger', 'Profile', 'profile_id', compute_profile_ledgers, PROFILE_LEDGER_FIELDS),
+        ('UserLedger', 'User', 'user_id', compute_user_ledgers, USER_LEDGER_FIELDS),
+    ):
+        model = apps.get_model('api', model_name)
+        ids = apps.get_model('api', owner).objects.order_by('id').values_list('id', flat=True)
+        for chunk in chunks(ids.iterator(chunk_size=CHUNK_SIZE)):
+            model.objects.bulk_create([
+                model(**{key: pk}, as_of=today, **{field: values[field] for field in fields})
+                for pk, values in compute(chunk, today).items()
+            ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_transaction_reference_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileLedger',
+            fields=[
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ledger', serialize=False, to='api.profile', verbose_name='پروفایل')),
+                ('total_due', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='جمع اقساط')),
+                ('paid', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='جمع پرداخت شده')),
+                ('outstanding', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='مانده')),
+                ('overdue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='سررسید گذشته')),
+                ('next_due_date', models.DateField(blank=True, null=True, verbose_name='سررسید بعدی')),
+                ('as_of', models.DateField(verbose_name='تاریخ محاسبه سررسید گذشته')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='زمان به\u200cروزرسانی')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['overdue'], name='api_profile_overdue_147e03_idx'), models.Index(fields=['outstanding'], name='api_profile_outstan_f0d6e4_idx'), models.Index(fields=['next_due_date'], name='api_profile_next_du_f70a7d_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserLedger',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ledger', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='کاربر')),
+                ('total_due', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='جمع اقساط')),
+                ('installments_paid', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='جمع اقساط پرداخت شده')),
+                ('deposits', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='جمع واریزها')),
+                ('withdrawals', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='جمع برداشت\u200cها')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='مانده حساب')),
+                ('overdue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='سررسید گذشته')),
+                ('next_due_date', models.DateField(blank=True, null=True, verbose_name='سررسید بعدی')),
+                ('as_of', models.DateField(verbose_name='تاریخ محاسبه سررسید گذشته')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='زمان به\u200cروزرسانی')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['overdue'], name='api_userled_overdue_4f0f69_idx'), models.Index(fields=['balance'], name='api_userled_balance_7a25d1_idx'), models.Index(fields=['next_due_date'], name='api_userled_next_du_c82a38_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_ledgers, migrations.RunPython.noop),
+    ]
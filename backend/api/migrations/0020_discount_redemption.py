@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_ledgers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiscountRedemption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('cash', 'نقدی'), ('installment', 'قسطی')], default='cash', max_length=20, verbose_name='نوع پرداخت')),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='مبلغ تخفیف')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='زمان استفاده')),
+                ('discount_code', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='redemptions', to='api.discountcode', verbose_name='کد تخفیف')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='discount_redemptions', to='api.profile', verbose_name='پروفایل')),
+                ('redeemed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='ثبت کننده')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('discount_code', 'profile'), name='unique_discount_redemption')],
+            },
+        ),
+    ]
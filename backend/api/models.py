@@ -1,8 +1,13 @@
+import uuid
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils import timezone
 from datetime import timedelta
 
+from .storage import blob_storage
+
 # === 0. UserManager برای مدل User ===
 class UserManager(BaseUserManager):
     def create_user(self, phone_number, password=None, **extra_fields):
@@ -45,6 +50,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     full_address = models.TextField(blank=True, null=True, verbose_name="آدرس کامل")
     postal_code = models.CharField(max_length=20, blank=True, null=True, verbose_name="کد پستی")
     photo = models.ImageField(upload_to='user_photos/', blank=True, null=True, verbose_name="عکس")
+    photo_variants = models.JSONField(default=dict, blank=True, verbose_name="نسخه‌های کوچک عکس")
     
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان ایجاد")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
@@ -116,7 +122,7 @@ class AssignmentDef(models.Model):
 class AssignmentDefTemplate(models.Model):
     assignment_def = models.ForeignKey(AssignmentDef, on_delete=models.CASCADE, related_name='templates', verbose_name="تعریف تکلیف")
     title = models.CharField(max_length=100, verbose_name="عنوان فایل الگو")
-    file = models.FileField(upload_to='assignment_templates/', verbose_name="فایل")
+    file = models.FileField(upload_to='assignment_templates/', storage=blob_storage, verbose_name="فایل")
     is_help_file = models.BooleanField(default=False, verbose_name="آیا فایل راهنما است؟")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان ایجاد")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
@@ -129,6 +135,8 @@ class CallDef(models.Model):
     title = models.CharField(max_length=200, verbose_name="موضوع تماس")
     start_due_date = models.DateTimeField(verbose_name="تاریخ شروع موعد")
     end_due_date = models.DateTimeField(verbose_name="تاریخ پایان موعد")
+    # زمان ساخت تماس‌های pending این بازه توسط api.worklist (خالی یعنی هنوز ساخته نشده)
+    worklist_generated_at = models.DateTimeField(null=True, blank=True, verbose_name="زمان ساخت لیست تماس")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان ایجاد")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
     
@@ -155,6 +163,19 @@ class Profile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان ایجاد")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
 
+    class Meta:
+        # ایندکس‌های ترکیبی برای صفحه‌بندی cursor روی (created_at, id)
+        # هر ستون قابل فیلتر/مرتب‌سازی یک ایندکس با همان ترتیب صفحه‌بندی دارد
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['status', 'created_at', 'id']),
+            models.Index(fields=['type', 'created_at', 'id']),
+            models.Index(fields=['term', 'created_at', 'id']),
+            models.Index(fields=['group', 'created_at', 'id']),
+            models.Index(fields=['course', 'created_at', 'id']),
+            models.Index(fields=['apollonyar', 'created_at', 'id']),
+        ]
+
     def __str__(self):
         return f"پروفایل {self.user.first_name} {self.user.last_name} برای دوره {self.course.name}"
 
@@ -164,6 +185,7 @@ class MedalDef(models.Model):
     title = models.CharField(max_length=100, verbose_name="عنوان مدال")
     description = models.TextField(verbose_name="توضیحات")
     icon = models.FileField(upload_to='medal_icons/', verbose_name="آیکون SVG")
+    icon_variants = models.JSONField(default=dict, blank=True, verbose_name="نسخه پاک‌سازی شده آیکون")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان ایجاد")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
 
@@ -192,6 +214,26 @@ class DiscountCode(models.Model):
     def __str__(self):
         return self.code
 
+class DiscountRedemption(models.Model):
+    """
+    هر بار استفاده از یک کد تخفیف (api/discounts.py). usage_count کد همراه با ساخت این ردیف
+    و در همان تراکنش با یک UPDATE شرطی افزایش می‌یابد.
+    """
+    KIND_CHOICES = [('cash', 'نقدی'), ('installment', 'قسطی')]
+
+    discount_code = models.ForeignKey(DiscountCode, on_delete=models.CASCADE, related_name='redemptions', verbose_name="کد تخفیف")
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='discount_redemptions', verbose_name="پروفایل")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='cash', verbose_name="نوع پرداخت")
+    amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name="مبلغ تخفیف")
+    redeemed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="ثبت کننده")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان استفاده")
+
+    class Meta:
+        # هر پروفایل از هر کد فقط یک بار استفاده می‌کند
+        constraints = [
+            models.UniqueConstraint(fields=['discount_code', 'profile'], name='unique_discount_redemption'),
+        ]
+
 # === 5. مالی ===
 
 class Transaction(models.Model):
@@ -207,9 +249,18 @@ class Transaction(models.Model):
     verification_status = models.CharField(max_length=20, choices=VERIFICATION_CHOICES, default='pending', verbose_name="وضعیت تایید")
     verification_timestamp = models.DateTimeField(blank=True, null=True, verbose_name="زمان تایید")
     receipt_image = models.ImageField(upload_to='receipts/', blank=True, null=True, verbose_name="عکس رسید")
+    receipt_variants = models.JSONField(default=dict, blank=True, verbose_name="نسخه‌های کوچک عکس رسید")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان ایجاد")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
 
+    class Meta:
+        indexes = [
+            # مسیر ایندکس شاخه تراکنش‌ها در فید پرداخت‌های هنرجو
+            models.Index(fields=['target_user', 'timestamp', 'id']),
+            # تطبیق خطوط صورت‌حساب بانکی بر اساس شماره پیگیری (api.reconciliation)
+            models.Index(fields=['reference_number', 'verification_status']),
+        ]
+
 class TransactionNote(models.Model):
     transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='notes', verbose_name="تراکنش")
     author_apollonyar = models.ForeignKey(Apollonyar, on_delete=models.SET_NULL, null=True, verbose_name="نویسنده")
@@ -231,6 +282,59 @@ class Installment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان ایجاد")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
 
+    class Meta:
+        indexes = [
+            # مسیر ایندکس شاخه اقساط در فید پرداخت‌های هنرجو
+            models.Index(fields=['profile', 'due_date', 'id']),
+            # لیست پیگیری اقساط با فیلتر وضعیت (سررسید گذشته، سررسید این هفته)
+            models.Index(fields=['status', 'due_date', 'id']),
+        ]
+
+class ProfileLedger(models.Model):
+    """
+    خلاصه مالی هر پروفایل از روی اقساط آن (api/ledger.py)؛ اقساط عودت شده حساب نمی‌شوند.
+    با هر تغییر اقساط در همان تراکنش دوباره محاسبه می‌شود و فرمان verify_ledgers اختلاف آن را گزارش می‌کند.
+    """
+    profile = models.OneToOneField(Profile, on_delete=models.CASCADE, primary_key=True, related_name='ledger', verbose_name="پروفایل")
+    total_due = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="جمع اقساط")
+    paid = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="جمع پرداخت شده")
+    outstanding = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="مانده")
+    overdue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="سررسید گذشته")
+    next_due_date = models.DateField(blank=True, null=True, verbose_name="سررسید بعدی")
+    as_of = models.DateField(verbose_name="تاریخ محاسبه سررسید گذشته")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
+
+    class Meta:
+        # فیلترهای بدهی در لیست پروفایل‌ها و به‌روزرسانی روزانه سررسیدها
+        indexes = [
+            models.Index(fields=['overdue']),
+            models.Index(fields=['outstanding']),
+            models.Index(fields=['next_due_date']),
+        ]
+
+class UserLedger(models.Model):
+    """
+    خلاصه مالی هر کاربر: اقساط همه پروفایل‌ها در برابر واریزها و برداشت‌های تایید شده (api/ledger.py).
+    balance مثبت یعنی بدهی و منفی یعنی بستانکاری.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='ledger', verbose_name="کاربر")
+    total_due = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="جمع اقساط")
+    installments_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="جمع اقساط پرداخت شده")
+    deposits = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="جمع واریزها")
+    withdrawals = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="جمع برداشت‌ها")
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="مانده حساب")
+    overdue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="سررسید گذشته")
+    next_due_date = models.DateField(blank=True, null=True, verbose_name="سررسید بعدی")
+    as_of = models.DateField(verbose_name="تاریخ محاسبه سررسید گذشته")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['overdue']),
+            models.Index(fields=['balance']),
+            models.Index(fields=['next_due_date']),
+        ]
+
 # === 6. فعالیت‌های هنرجو و آپولون‌یار ===
 
 class Assignment(models.Model):
@@ -240,6 +344,12 @@ class Assignment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان ایجاد")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
 
+    class Meta:
+        # هر هنرجو از هر تعریف تکلیف فقط یک تکلیف دارد (پایه bulk_create با ignore_conflicts)
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'assignment_def'], name='unique_assignment_per_profile'),
+        ]
+
 class AssignmentSubmission(models.Model):
     assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, related_name='submissions', verbose_name="تکلیف")
     assessor_apollonyar = models.ForeignKey(Apollonyar, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="ارزیاب")
@@ -247,17 +357,103 @@ class AssignmentSubmission(models.Model):
     grade = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="نمره")
     feedback = models.TextField(blank=True, null=True, verbose_name="بازخورد")
     assessment_timestamp = models.DateTimeField(null=True, blank=True, verbose_name="زمان ارزیابی")
+    # صف نمره‌دهی: ارسالی که یک ارزیاب برداشته تا پایان مهلت lease به دیگران داده نمی‌شود
+    claimed_by = models.ForeignKey(Apollonyar, on_delete=models.SET_NULL, null=True, blank=True, related_name='claimed_submissions', verbose_name="در دست بررسی توسط")
+    lease_expires_at = models.DateTimeField(null=True, blank=True, verbose_name="پایان مهلت بررسی")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان ایجاد")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
 
+    class Meta:
+        indexes = [
+            # آخرین ارسال هر تکلیف (Subquery در لیست تکالیف)
+            models.Index(fields=['assignment', 'submission_timestamp', 'id']),
+            # صف بررسی: فقط ارسال‌های نمره‌نخورده، قدیمی‌ترین اول
+            models.Index(
+                fields=['submission_timestamp', 'id'],
+                condition=models.Q(grade__isnull=True),
+                name='submission_review_queue_idx',
+            ),
+        ]
+
 class AssignmentSubmissionFile(models.Model):
     submission = models.ForeignKey(AssignmentSubmission, on_delete=models.CASCADE, related_name='files', verbose_name="ارسال")
     template = models.ForeignKey(AssignmentDefTemplate, on_delete=models.CASCADE, verbose_name="فایل الگو")
-    file = models.FileField(upload_to='submission_files/', verbose_name="فایل ارسالی")
+    file = models.FileField(upload_to='submission_files/', storage=blob_storage, verbose_name="فایل ارسالی")
+    description = models.TextField(blank=True, null=True, verbose_name="توضیحات")
+    # پیش‌نمایش فشرده و waveform فایل‌های صوتی/تصویری که در پس‌زمینه کنار فایل اصلی ساخته می‌شوند (api/transcoding.py)
+    MEDIA_STATUS_CHOICES = [
+        ('pending', 'در انتظار پردازش'),
+        ('processing', 'در حال پردازش'),
+        ('ready', 'آماده'),
+        ('failed', 'ناموفق'),
+        ('skipped', 'غیر رسانه‌ای'),
+    ]
+    preview = models.FileField(blank=True, max_length=255, verbose_name="پیش‌نمایش")
+    waveform = models.FileField(blank=True, max_length=255, verbose_name="waveform")
+    duration = models.FloatField(null=True, blank=True, verbose_name="مدت (ثانیه)")
+    media_status = models.CharField(max_length=20, choices=MEDIA_STATUS_CHOICES, default='pending', db_index=True, verbose_name="وضعیت پردازش رسانه")
+    media_error = models.TextField(blank=True, verbose_name="خطای پردازش رسانه")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان ایجاد")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
+
+class UploadSession(models.Model):
+    """
+    جلسه آپلود تکه‌تکه و قابل ادامه یک فایل ارسالی.
+    تکه‌ها جداگانه ارسال و با checksum بررسی می‌شوند؛ پس از رسیدن همه تکه‌ها فایل نهایی سرهم می‌شود
+    و در زمان ثبت ارسال تکلیف به AssignmentSubmissionFile تبدیل می‌شود.
+    """
+    STATUS_CHOICES = [('open', 'در حال آپلود'), ('assembled', 'سرهم شده'), ('submitted', 'ثبت شده')]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions', verbose_name="کاربر")
+    assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, related_name='upload_sessions', verbose_name="تکلیف")
+    template = models.ForeignKey(AssignmentDefTemplate, on_delete=models.CASCADE, verbose_name="فایل الگو")
     description = models.TextField(blank=True, null=True, verbose_name="توضیحات")
+    filename = models.CharField(max_length=255, verbose_name="نام فایل")
+    total_size = models.BigIntegerField(verbose_name="حجم کل")
+    chunk_size = models.PositiveIntegerField(verbose_name="حجم هر تکه")
+    total_chunks = models.PositiveIntegerField(verbose_name="تعداد تکه‌ها")
+    sha256 = models.CharField(max_length=64, blank=True, verbose_name="checksum فایل کامل")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open', verbose_name="وضعیت")
+    file = models.FileField(upload_to='submission_files/', storage=blob_storage, blank=True, null=True, verbose_name="فایل سرهم شده")
+    expires_at = models.DateTimeField(verbose_name="زمان انقضا")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان ایجاد")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks', verbose_name="جلسه آپلود")
+    index = models.PositiveIntegerField(verbose_name="شماره تکه")
+    size = models.PositiveIntegerField(verbose_name="حجم")
+    sha256 = models.CharField(max_length=64, verbose_name="checksum")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان ایجاد")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'index'], name='unique_upload_chunk'),
+        ]
+
+class StoredBlob(models.Model):
+    """
+    یک فایل در storage محتوا-محور (api/storage.py) و تعداد ردیف‌هایی که به آن ارجاع می‌دهند.
+    فایل‌های با ref_count صفر پس از مهلت BLOB_GC_GRACE_HOURS توسط فرمان gc_blobs حذف می‌شوند.
+    """
+    name = models.CharField(max_length=255, unique=True, verbose_name="نام فایل")
+    sha256 = models.CharField(max_length=64, verbose_name="checksum")
+    size = models.BigIntegerField(verbose_name="حجم")
+    ref_count = models.PositiveIntegerField(default=0, verbose_name="تعداد ارجاع")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان ایجاد")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'updated_at']),
+        ]
+
 class Call(models.Model):
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='calls', verbose_name="پروفایل")
     call_def = models.ForeignKey(CallDef, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="تعریف تماس")
@@ -273,6 +469,41 @@ class Call(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان ایجاد")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
 
+    class Meta:
+        # صف تماس‌های هر آپولون‌یار (api.worklist.worklist_for)
+        indexes = [
+            models.Index(fields=['caller', 'status', 'call_timestamp', 'id']),
+        ]
+
+class CallDailyStat(models.Model):
+    """
+    تعداد تماس‌های هر روز به تفکیک تماس گیرنده، تعریف تماس، نوع و وضعیت (api/call_stats.py).
+    با ثبت، تغییر و حذف هر تماس به‌روز می‌شود و فرمان rebuild_call_stats آن را از جدول تماس‌ها بازسازی می‌کند.
+    """
+    day = models.DateField(verbose_name="روز")
+    caller = models.ForeignKey(Apollonyar, on_delete=models.CASCADE, null=True, blank=True, verbose_name="تماس گیرنده")
+    call_def = models.ForeignKey(CallDef, on_delete=models.CASCADE, null=True, blank=True, verbose_name="تعریف تماس")
+    type = models.CharField(max_length=20, choices=Call.TYPE_CHOICES, verbose_name="نوع تماس")
+    status = models.CharField(max_length=20, choices=Call.STATUS_CHOICES, verbose_name="وضعیت")
+    count = models.IntegerField(default=0, verbose_name="تعداد")
+
+    class Meta:
+        # caller و call_def خالی با 0 مقایسه می‌شوند تا برای کلیدهای NULL هم فقط یک ردیف باشد
+        # (nulls_distinct=False در PostgreSQL پیش از 15 نادیده گرفته می‌شود)
+        constraints = [
+            models.UniqueConstraint(
+                'day',
+                Coalesce('caller', Value(0), output_field=models.BigIntegerField()),
+                Coalesce('call_def', Value(0), output_field=models.BigIntegerField()),
+                'type',
+                'status',
+                name='unique_call_daily_stat',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['caller', 'day']),
+        ]
+
 class Note(models.Model):
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='general_notes', verbose_name="پروفایل")
     author_apollonyar = models.ForeignKey(Apollonyar, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="نویسنده")
@@ -282,13 +513,35 @@ class Note(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
 
 class Log(models.Model):
+    ACTION_CODE_CHOICES = [
+        ('call_logged', 'ثبت تماس'),
+        ('note_added', 'افزودن یادداشت'),
+        ('note_removed', 'حذف یادداشت'),
+        ('medal_awarded', 'اعطای مدال'),
+        ('medal_removed', 'حذف مدال'),
+        ('term_changed', 'تغییر ترم'),
+        ('apollonyar_changed', 'تغییر آپولون‌یار'),
+        ('type_changed', 'تغییر نوع هنرجو'),
+        ('status_changed', 'تغییر وضعیت هنرجو'),
+        ('deadline_changed', 'تغییر مهلت تکلیف'),
+    ]
+
     action = models.CharField(max_length=255, verbose_name="اقدام")
+    action_code = models.CharField(max_length=50, choices=ACTION_CODE_CHOICES, blank=True, verbose_name="کد اقدام")
     timestamp = models.DateTimeField(auto_now_add=True, verbose_name="زمان")
+    profile = models.ForeignKey(Profile, on_delete=models.SET_NULL, null=True, blank=True, related_name='logs', verbose_name="پروفایل هدف")
     issuer_apollonyar = models.ForeignKey(Apollonyar, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="انجام دهنده")
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="کاربر انجام دهنده")
     description = models.TextField(blank=True, null=True, verbose_name="توضیحات")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان ایجاد")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="زمان به‌روزرسانی")
 
+    class Meta:
+        # تاریخچه هر هنرجو با cursor روی (timestamp, id) به صورت نزولی خوانده می‌شود
+        indexes = [
+            models.Index(fields=['profile', 'timestamp', 'id']),
+        ]
+
 class OTPCode(models.Model):
     phone_number = models.CharField(max_length=15, verbose_name="شماره تلفن")
     code = models.CharField(max_length=6, verbose_name="کد تایید")
@@ -0,0 +1,254 @@
+# api/pagination.py
+
+import base64
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .payments import KIND_INSTALLMENT, KIND_TRANSACTION, feed_cursor, payments_feed
+
+
+class KeysetPagination(BasePagination):
+    """
+    صفحه‌بندی مبتنی بر کلید (cursor) روی یک ترتیب ایندکس‌شده.
+    به جای OFFSET، مقدار کلیدهای آخرین ردیف صفحه در cursor ذخیره می‌شود و صفحه بعد
+    با یک شرط WHERE روی همان کلیدها خوانده می‌شود؛ بنابراین هزینه هر صفحه به عمق آن بستگی ندارد.
+
+    ترتیب پیش‌فرض در `ordering` تعریف می‌شود و آخرین کلید باید یکتا باشد (معمولاً id).
+    ستون‌هایی که کاربر می‌تواند با پارامتر ?ordering= بر اساس آن‌ها مرتب کند در
+    `ordering_fields` (نام عمومی -> نام فیلد مدل) تعریف می‌شوند و قبل از ترتیب پیش‌فرض قرار می‌گیرند.
+    """
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    ordering = ('created_at', 'id')
+    ordering_fields = {}
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keys, self.descending = self.get_ordering(request, view)
+        model = queryset.model
+        self.nullable = {key: self._is_nullable(model, key) for key in self.keys}
+
+        queryset = queryset.order_by(*self._order_by())
+        cursor = self.decode_cursor(request, model)
+        if cursor is not None:
+            queryset = queryset.filter(self._after(cursor))
+
+        # یک ردیف بیشتر می‌خوانیم تا وجود صفحه بعد را بدون COUNT تشخیص دهیم
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            size = int(raw)
+        except (TypeError, ValueError):
+            raise ValidationError({self.page_size_query_param: 'مقدار page_size باید عدد باشد.'})
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request, view=None):
+        """
+        کلیدهای ترتیب و جهت آن را برمی‌گرداند.
+        همه کلیدها یک جهت دارند تا ایندکس ترکیبی (field, created_at, id) در هر دو جهت قابل استفاده باشد.
+        """
+        raw = request.query_params.get(self.ordering_query_param, '').strip()
+        descending = self.ordering[0].startswith('-')
+        base = tuple(key.lstrip('-') for key in self.ordering)
+        if not raw:
+            return base, descending
+
+        descending = raw.startswith('-')
+        name = raw.lstrip('-')
+        if name not in self.ordering_fields:
+            raise ValidationError({
+                self.ordering_query_param: f"مرتب‌سازی بر اساس '{name}' پشتیبانی نمی‌شود."
+            })
+        field = self.ordering_fields[name]
+        if field in base:
+            return base, descending
+        return (field,) + base, descending
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        last = self.page[-1]
+        values = [getattr(last, key) for key in self.keys]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values))
+
+    def encode_cursor(self, values):
+        payload = json.dumps([self._to_json(value) for value in values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request, model):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(raw.encode('ascii')).decode('utf-8'))
+            if not isinstance(values, list) or len(values) != len(self.keys):
+                raise ValueError
+            return [
+                None if value is None else self._model_field(model, key).to_python(value)
+                for key, value in zip(self.keys, values)
+            ]
+        except (ValueError, TypeError, UnicodeError, DjangoValidationError):
+            raise ValidationError({self.cursor_query_param: 'cursor نامعتبر است.'})
+
+    # --- کمکی‌ها ---
+
+    def _order_by(self):
+        # ترتیب NULL ها با پیش‌فرض PostgreSQL (و ایندکس B-Tree) هماهنگ است:
+        # صعودی NULLS LAST و نزولی NULLS FIRST
+        if self.descending:
+            return [F(key).desc(nulls_first=True) for key in self.keys]
+        return [F(key).asc(nulls_last=True) for key in self.keys]
+
+    def _after(self, cursor):
+        """شرط (k1, k2, ...) > (v1, v2, ...) را به صورت OR از ANDها می‌سازد."""
+        condition = Q(pk__in=[])
+        prefix = Q()
+        for key, value in zip(self.keys, cursor):
+            condition |= prefix & self._beyond(key, value)
+            prefix &= Q(**{f'{key}__isnull': True}) if value is None else Q(**{key: value})
+        return condition
+
+    def _beyond(self, key, value):
+        nullable = self.nullable[key]
+        if self.descending:
+            if value is None:
+                return Q(**{f'{key}__isnull': False})
+            return Q(**{f'{key}__lt': value})
+        if value is None:
+            return Q(pk__in=[])
+        beyond = Q(**{f'{key}__gt': value})
+        if nullable:
+            beyond |= Q(**{f'{key}__isnull': True})
+        return beyond
+
+    @staticmethod
+    def _model_field(model, key):
+        for field in model._meta.concrete_fields:
+            if key in (field.name, field.attname):
+                return field.target_field if field.is_relation else field
+        return model._meta.get_field(key)
+
+    @staticmethod
+    def _is_nullable(model, key):
+        for field in model._meta.concrete_fields:
+            if key in (field.name, field.attname):
+                return field.null
+        return True
+
+    @staticmethod
+    def _to_json(value):
+        if isinstance(value, (datetime, date, time)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+
+class ProfileCursorPagination(KeysetPagination):
+    """صفحه‌بندی لیست پروفایل‌ها بر اساس (created_at, id) با امکان مرتب‌سازی روی ستون‌های ایندکس‌شده."""
+    page_size = 50
+    ordering = ('created_at', 'id')
+    ordering_fields = {
+        'created_at': 'created_at',
+        'status': 'status',
+        'type': 'type',
+        'term': 'term_id',
+        'group': 'group_id',
+        'course': 'course_id',
+        'apollonyar': 'apollonyar_id',
+    }
+
+
+class LogCursorPagination(KeysetPagination):
+    """صفحه‌بندی تاریخچه اقدامات یک هنرجو از جدیدترین به قدیمی‌ترین (ایندکس profile, timestamp, id)."""
+    page_size = 20
+    ordering = ('-timestamp', '-id')
+
+
+class ReviewQueuePagination(KeysetPagination):
+    """صفحه‌بندی صف بررسی تکالیف از قدیمی‌ترین ارسال (ایندکس جزئی grade IS NULL)."""
+    page_size = 50
+    ordering = ('submission_timestamp', 'id')
+
+
+class CallWorklistPagination(KeysetPagination):
+    """صفحه‌بندی صف تماس‌های یک آپولون‌یار (ایندکس caller, status, call_timestamp, id)."""
+    page_size = 50
+    ordering = ('call_timestamp', 'id')
+
+
+class InstallmentTrackingPagination(KeysetPagination):
+    """صفحه‌بندی لیست پیگیری اقساط از نزدیک‌ترین سررسید (ایندکس status, due_date, id)."""
+    page_size = 50
+    ordering = ('due_date', 'id')
+
+
+class PaymentsFeedPagination(KeysetPagination):
+    """
+    صفحه‌بندی فید یکپارچه پرداخت‌ها (api.payments.payments_feed).
+    cursor سه‌تایی (occurred_at, entry_kind, entry_id) آخرین ردیف است و هر دو شاخه UNION با آن محدود می‌شوند.
+    """
+    page_size = 50
+
+    def paginate_feed(self, profile, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        rows = payments_feed(profile, self.page_size + 1, after=self.decode_feed_cursor(request))
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(feed_cursor(self.page[-1])))
+
+    def decode_feed_cursor(self, request):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None
+        try:
+            occurred_at, kind, entry_id = json.loads(base64.urlsafe_b64decode(raw.encode('ascii')).decode('utf-8'))
+            occurred_at = datetime.fromisoformat(occurred_at)
+            if occurred_at.tzinfo is None or kind not in (KIND_INSTALLMENT, KIND_TRANSACTION):
+                raise ValueError
+            return occurred_at, kind, int(entry_id)
+        except (ValueError, TypeError, UnicodeError):
+            raise ValidationError({self.cursor_query_param: 'cursor نامعتبر است.'})
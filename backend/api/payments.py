@@ -0,0 +1,149 @@
+# api/payments.py
+
+from datetime import datetime, time, timezone as dt_timezone
+
+from django.db import connections
+from django.db.models import CharField, DateField, DateTimeField, F, Q, Value
+from django.db.models.functions import Cast
+
+from .models import Installment, Transaction
+
+
+# ستون‌های مشترک دو شاخه UNION ALL؛ ترتیب و نوع هر ستون در هر دو شاخه یکسان است
+FEED_COLUMNS = (
+    'entry_kind', 'entry_id', 'entry_amount', 'occurred_at',
+    'entry_type', 'entry_method', 'entry_status', 'transaction_ref', 'due_on',
+)
+# ترتیب فید: جدیدترین اول؛ در زمان برابر، تراکنش قبل از قسط و سپس شناسه بزرگ‌تر
+FEED_ORDERING = ('-occurred_at', '-entry_kind', '-entry_id')
+
+KIND_INSTALLMENT = 'installment'
+KIND_TRANSACTION = 'transaction'
+
+INSTALLMENT_STATUS_LABELS = dict(Installment.STATUS_CHOICES)
+TRANSACTION_TYPE_LABELS = dict(Transaction.TYPE_CHOICES)
+TRANSACTION_METHOD_LABELS = dict(Transaction.METHOD_CHOICES)
+TRANSACTION_STATUS_LABELS = dict(Transaction.VERIFICATION_CHOICES)
+
+
+def _installment_rows(profile):
+    return Installment.objects.filter(profile=profile).annotate(
+        entry_kind=Value(KIND_INSTALLMENT, output_field=CharField()),
+        entry_id=F('id'),
+        entry_amount=F('due_amount'),
+        occurred_at=Cast('due_date', DateTimeField()),
+        entry_type=Value(KIND_INSTALLMENT, output_field=CharField()),
+        entry_method=Value(KIND_INSTALLMENT, output_field=CharField()),
+        entry_status=F('status'),
+        transaction_ref=F('transaction_id'),
+        due_on=F('due_date'),
+    )
+
+
+def _transaction_rows(profile):
+    return Transaction.objects.filter(target_user_id=profile.user_id).annotate(
+        entry_kind=Value(KIND_TRANSACTION, output_field=CharField()),
+        entry_id=F('id'),
+        entry_amount=F('amount'),
+        occurred_at=F('timestamp'),
+        entry_type=F('type'),
+        entry_method=F('payment_method'),
+        entry_status=F('verification_status'),
+        transaction_ref=F('id'),
+        due_on=Value(None, output_field=DateField()),
+    )
+
+
+def _installments_after(cursor):
+    """
+    شرط «بعد از cursor» برای شاخه اقساط روی خود ستون due_date (نه مقدار Cast شده)
+    تا ایندکس (profile, due_date) قابل استفاده باشد. زمان هر قسط نیمه‌شب UTC روز سررسید است.
+    """
+    occurred_at, kind, entry_id = cursor
+    occurred_at = occurred_at.astimezone(dt_timezone.utc)
+    day = occurred_at.date()
+    if occurred_at != datetime.combine(day, time.min, tzinfo=dt_timezone.utc):
+        return Q(due_date__lte=day)
+    if kind == KIND_TRANSACTION:
+        return Q(due_date__lte=day)
+    return Q(due_date__lt=day) | Q(due_date=day, id__lt=entry_id)
+
+
+def _transactions_after(cursor):
+    """شرط «بعد از cursor» برای شاخه تراکنش‌ها روی ایندکس (target_user, timestamp)."""
+    occurred_at, kind, entry_id = cursor
+    if kind == KIND_TRANSACTION:
+        return Q(timestamp__lt=occurred_at) | Q(timestamp=occurred_at, id__lt=entry_id)
+    return Q(timestamp__lt=occurred_at)
+
+
+def payments_feed(profile, limit, after=None):
+    """
+    فید یکپارچه اقساط پروفایل و تراکنش‌های کاربر آن به صورت یک کوئری UNION ALL.
+    مرتب‌سازی، cursor و LIMIT در دیتابیس اعمال می‌شوند و خروجی لیستی از دیکشنری‌های FEED_COLUMNS است.
+    after سه‌تایی (occurred_at, entry_kind, entry_id) آخرین ردیف صفحه قبل است.
+    """
+    installments = _installment_rows(profile)
+    transactions = _transaction_rows(profile)
+    if after is not None:
+        installments = installments.filter(_installments_after(after))
+        transactions = transactions.filter(_transactions_after(after))
+
+    installments = installments.values(*FEED_COLUMNS)
+    transactions = transactions.values(*FEED_COLUMNS)
+
+    # در PostgreSQL هر شاخه جداگانه از ایندکس خودش مرتب و محدود می‌شود
+    # تا فقط limit ردیف از هر جدول خوانده شود
+    if connections[installments.db].features.supports_slicing_ordering_in_compound:
+        installments = installments.order_by('-due_date', '-id')[:limit]
+        transactions = transactions.order_by('-timestamp', '-id')[:limit]
+
+    feed = installments.union(transactions, all=True).order_by(*FEED_ORDERING)
+    return list(feed[:limit])
+
+
+def feed_cursor(row):
+    return (row['occurred_at'], row['entry_kind'], row['entry_id'])
+
+
+def serialize_payment(row):
+    """تبدیل یک ردیف فید به ساختار مورد انتظار فرانت‌اند."""
+    if row['entry_kind'] == KIND_INSTALLMENT:
+        type_label = method_label = 'قسط'
+        status_label = INSTALLMENT_STATUS_LABELS.get(row['entry_status'], row['entry_status'])
+        date = row['due_on']
+    else:
+        type_label = TRANSACTION_TYPE_LABELS.get(row['entry_type'], row['entry_type'])
+        method_label = TRANSACTION_METHOD_LABELS.get(row['entry_method'], row['entry_method'])
+        status_label = TRANSACTION_STATUS_LABELS.get(row['entry_status'], row['entry_status'])
+        date = row['occurred_at']
+    return {
+        'id': f"{row['entry_kind']}_{row['entry_id']}",
+        'type': type_label,
+        'amount': float(row['entry_amount']),
+        'date': date.strftime('%Y/%m/%d'),
+        'method': method_label,
+        'status': status_label,
+        'paymentStatus': status_label,
+        'transactionId': row['transaction_ref'],
+        'dueDate': row['due_on'].strftime('%Y/%m/%d') if row['due_on'] else None,
+    }
+
+
+def installment_plan_rows(profile):
+    """
+    همه اقساط پروفایل به ترتیب سررسید و بدون صفحه‌بندی، با همان ساختار ردیف‌های فید.
+    فرم ویرایش اقساط از این لیست ساخته می‌شود؛ چون apply_installment_plans هر قسطی را که در برنامه نباشد حذف
+    می‌کند، برنامه نباید از صفحه اول فید (که تراکنش‌ها هم در آن هستند) ساخته شود.
+    """
+    rows = _installment_rows(profile).order_by('due_date', 'id').values(*FEED_COLUMNS)
+    return [serialize_payment(row) for row in rows]
+
+
+def build_payments_feed(profile, limit):
+    """limit ردیف اول فید به همراه hasMore؛ برای نمای کامل هنرجو."""
+    rows = payments_feed(profile, limit + 1)
+    return {
+        'results': [serialize_payment(row) for row in rows[:limit]],
+        'hasMore': len(rows) > limit,
+    }
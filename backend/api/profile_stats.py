@@ -0,0 +1,64 @@
+# api/profile_stats.py
+
+from django.db.models import Count, F, Q
+
+from .models import Medal, Profile
+
+
+# ستون‌هایی که داشبوردها می‌توانند آمار پروفایل‌ها را بر اساس آن‌ها گروه‌بندی کنند: نام -> (ستون، نام در خروجی)
+PROFILE_GROUP_FIELDS = {
+    'apollonyar': ('apollonyar_id', 'apollonyarId'),
+    'term': ('term_id', 'termId'),
+    'course': ('course_id', 'courseId'),
+    'group': ('group_id', 'groupId'),
+    'status': ('status', 'status'),
+    'type': ('type', 'type'),
+}
+# شمارنده‌های هر گروه؛ بدهی معوق از خلاصه مالی پروفایل (api.ledger) خوانده می‌شود
+COUNTERS = {
+    'total': Count('id'),
+    'active': Count('id', filter=Q(status='active')),
+    'activeTermBased': Count('id', filter=Q(status='active', type='term-based')),
+    'suspended': Count('id', filter=Q(status='suspended')),
+    'suspendedOverdue': Count('id', filter=Q(status='suspended', ledger__overdue__gt=0)),
+    'optout': Count('id', filter=Q(status='optout')),
+}
+
+
+def _key(row, aliases):
+    return tuple(row[alias] for alias in aliases)
+
+
+def profile_stats(group_by, profiles=None):
+    """
+    تعداد پروفایل‌ها به تفکیک ستون‌های group_by (کلیدهای PROFILE_GROUP_FIELDS) با شمارنده‌های COUNTERS
+    و تعداد دارندگان هر مدال در medals، مثلاً
+    [{'apollonyarId': 3, 'termId': 7, 'total': 40, 'active': 31, ..., 'medals': {2: 5}}, ...]
+    بدون group_by یک ردیف برای کل پروفایل‌ها برمی‌گردد. profiles: queryset فیلتر شده (پیش‌فرض همه)
+    """
+    profiles = Profile.objects.all() if profiles is None else profiles
+    columns = [PROFILE_GROUP_FIELDS[name] for name in group_by]
+    aliases = [alias for _, alias in columns]
+    plain = [column for column, alias in columns if column == alias]
+    renamed = {alias: F(column) for column, alias in columns if column != alias}
+
+    if columns:
+        rows = list(profiles.order_by().values(*plain, **renamed).annotate(**COUNTERS).order_by(*aliases))
+    else:
+        rows = [profiles.aggregate(**COUNTERS)]
+    for row in rows:
+        row['medals'] = {}
+    by_key = {_key(row, aliases): row for row in rows}
+
+    medal_renamed = {alias: F(f'profile__{column}') for column, alias in columns}
+    medal_rows = (
+        Medal.objects.filter(profile__in=profiles.order_by().values('id'))
+        .values('medal_def_id', **medal_renamed)
+        .annotate(holders=Count('profile_id', distinct=True))
+        .order_by()
+    )
+    for medal_row in medal_rows:
+        row = by_key.get(_key(medal_row, aliases))
+        if row is not None:
+            row['medals'][medal_row['medal_def_id']] = medal_row['holders']
+    return rows
@@ -0,0 +1,265 @@
+# api/reconciliation.py
+
+import codecs
+import csv
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from .batching import chunks
+from .ledger import ledgers_changed
+from .models import Transaction, TransactionNote
+
+
+# تعداد خطوط صورت‌حساب که با یک کوئری تطبیق داده و با یک UPDATE تایید می‌شوند
+BATCH_SIZE = 1000
+# حداکثر فاصله روز ثبت تراکنش در سامانه با تاریخ واریز در صورت‌حساب
+MATCH_WINDOW_DAYS = 3
+# فقط واریزهای دستی نیاز به تطبیق با صورت‌حساب دارند (پرداخت‌های درگاه خودکار تایید می‌شوند)
+RECONCILABLE_METHODS = ('card', 'paya')
+DIGITS = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')
+# نام‌های قابل قبول ستون‌ها در سطر عنوان فایل CSV
+COLUMN_ALIASES = {
+    'reference': ('reference', 'reference_number', 'ref', 'شماره پیگیری', 'کد پیگیری', 'شماره مرجع'),
+    'amount': ('amount', 'credit', 'مبلغ', 'واریز', 'بستانکار'),
+    'date': ('date', 'تاریخ'),
+}
+
+
+def normalize_reference(raw):
+    return (raw or '').translate(DIGITS).strip()
+
+
+def parse_amount(raw):
+    cleaned = (raw or '').translate(DIGITS).replace(',', '').replace('٬', '').replace(' ', '')
+    try:
+        amount = Decimal(cleaned)
+    except InvalidOperation:
+        raise ValueError(f"مبلغ نامعتبر است: {raw}")
+    if amount <= 0:
+        raise ValueError(f"مبلغ باید مثبت باشد: {raw}")
+    return amount
+
+
+def jalali_to_gregorian(jy, jm, jd):
+    """تبدیل تاریخ شمسی به میلادی (الگوریتم حسابی تقویم جلالی)."""
+    jy += 1595
+    days = -355668 + 365 * jy + (jy // 33) * 8 + ((jy % 33) + 3) // 4 + jd
+    days += (jm - 1) * 31 if jm < 7 else (jm - 7) * 30 + 186
+    gy = 400 * (days // 146097)
+    days %= 146097
+    if days > 36524:
+        days -= 1
+        gy += 100 * (days // 36524)
+        days %= 36524
+        if days >= 365:
+            days += 1
+    gy += 4 * (days // 1461)
+    days %= 1461
+    if days > 365:
+        gy += (days - 1) // 365
+        days = (days - 1) % 365
+    leap = (gy % 4 == 0 and gy % 100 != 0) or gy % 400 == 0
+    month_days = [31, 29 if leap else 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+    gm = 0
+    while days >= month_days[gm]:
+        days -= month_days[gm]
+        gm += 1
+    return date(gy, gm + 1, days + 1)
+
+
+def parse_statement_date(raw):
+    """تاریخ خط صورت‌حساب (YYYY-MM-DD یا YYYY/MM/DD، شمسی یا میلادی؛ ساعت بعد از فاصله نادیده گرفته می‌شود)."""
+    text = (raw or '').translate(DIGITS).strip().split(' ')[0].replace('/', '-')
+    try:
+        year, month, day = (int(part) for part in text.split('-'))
+        return jalali_to_gregorian(year, month, day) if year < 1700 else date(year, month, day)
+    except (ValueError, IndexError):
+        raise ValueError(f"تاریخ نامعتبر است: {raw}")
+
+
+def _resolve_columns(header, columns=None):
+    names = [name.strip().lower() for name in header]
+    resolved = {}
+    for key, aliases in COLUMN_ALIASES.items():
+        wanted = ((columns or {}).get(key) or '').strip().lower()
+        candidates = (wanted,) if wanted else aliases
+        index = next((names.index(alias) for alias in candidates if alias in names), None)
+        if index is None:
+            raise ValueError(f"ستون «{wanted or aliases[0]}» در سطر عنوان فایل پیدا نشد")
+        resolved[key] = index
+    return resolved
+
+
+def check_encoding(stream, encoding='utf-8-sig', block_size=64 * 1024):
+    """
+    خواندن کامل فایل باینری و بررسی کدگذاری آن پیش از هر تاییدی؛ چون هر دسته جداگانه commit می‌شود،
+    خطای کدگذاری در میانه فایل نباید بعد از تایید دسته‌های قبلی کشف شود. stream به ابتدا برگردانده می‌شود.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        for block in iter(lambda: stream.read(block_size), b''):
+            decoder.decode(block)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        raise ValueError('کدگذاری فایل صورت‌حساب UTF-8 نیست')
+    finally:
+        stream.seek(0)
+
+
+def _rows(reader):
+    """جفت‌های (ردیف، خطا) از خواننده CSV؛ ردیف خراب (مثلاً با بایت NUL) به جای توقف کل فایل با پیام خطا برگردانده می‌شود."""
+    while True:
+        try:
+            yield next(reader), None
+        except StopIteration:
+            return
+        except csv.Error as error:
+            yield None, f"خط CSV نامعتبر است: {error}"
+
+
+def read_statement(lines, columns=None):
+    """
+    خواندن جریانی خطوط CSV صورت‌حساب (سطر اول عنوان ستون‌ها).
+    خروجی هر خط: {'line', 'reference', 'amount', 'date'} یا {'line', 'error'}؛ خطوط بدون شماره پیگیری
+    یا مبلغ (مثلاً برداشت‌ها) با {'line', 'skipped': True} برگردانده می‌شوند.
+    columns: نام ستون‌ها در صورتی که با COLUMN_ALIASES متفاوت باشد، مثلاً {'amount': 'credit_rial'}
+    """
+    reader = csv.reader(lines)
+    try:
+        header = next(reader, None)
+    except csv.Error as error:
+        raise ValueError(f"سطر عنوان فایل نامعتبر است: {error}")
+    if header is None:
+        raise ValueError('فایل صورت‌حساب خالی است')
+    resolved = _resolve_columns(header, columns)
+    for row, error in _rows(reader):
+        if error:
+            yield {'line': reader.line_num, 'error': error}
+            continue
+        if not any(cell.strip() for cell in row):
+            continue
+        line = reader.line_num
+        try:
+            reference, amount, day = (row[resolved[key]] for key in ('reference', 'amount', 'date'))
+        except IndexError:
+            yield {'line': line, 'error': 'تعداد ستون‌های خط کمتر از سطر عنوان است'}
+            continue
+        if not reference.strip() or not amount.strip():
+            yield {'line': line, 'skipped': True}
+            continue
+        try:
+            yield {
+                'line': line,
+                'reference': normalize_reference(reference),
+                'amount': parse_amount(amount),
+                'date': parse_statement_date(day),
+            }
+        except ValueError as error:
+            yield {'line': line, 'error': str(error)}
+
+
+def _report_row(entry, reason, **extra):
+    return {
+        'line': entry['line'], 'reference': entry['reference'], 'amount': str(entry['amount']),
+        'date': entry['date'].isoformat(), 'reason': reason, **extra,
+    }
+
+
+def _match_batch(entries, window_days, claimed, report):
+    """تطبیق یک دسته خط با تراکنش‌های در انتظار؛ خروجی: [(شناسه تراکنش، خط)]"""
+    candidates = defaultdict(list)
+    rows = Transaction.objects.filter(
+        reference_number__in={entry['reference'] for entry in entries},
+        verification_status='pending', type='deposit', payment_method__in=RECONCILABLE_METHODS,
+    ).values_list('id', 'reference_number', 'amount', 'timestamp')
+    for transaction_id, reference, amount, timestamp in rows:
+        candidates[reference].append((transaction_id, amount, timezone.localdate(timestamp)))
+
+    matches, missing = [], []
+    window = timedelta(days=window_days)
+    for entry in entries:
+        by_reference = candidates[entry['reference']]
+        same_amount = [(tid, day) for tid, amount, day in by_reference if amount == entry['amount']]
+        found = [tid for tid, day in same_amount if abs(day - entry['date']) <= window]
+        free = [tid for tid in found if tid not in claimed]
+        if len(free) == 1:
+            claimed[free[0]] = entry['line']
+            matches.append((free[0], entry['line']))
+        elif free:
+            report['ambiguous'].append(_report_row(entry, 'multiple_transactions', transactions=free))
+        elif found:
+            report['unmatched'].append(_report_row(entry, 'duplicate_line', matchedLine=claimed[found[0]]))
+        elif same_amount:
+            report['unmatched'].append(_report_row(entry, 'date_out_of_window'))
+        elif by_reference:
+            report['unmatched'].append(_report_row(entry, 'amount_mismatch'))
+        else:
+            missing.append(entry)
+
+    if missing:
+        # شماره پیگیری‌هایی که تراکنش آن‌ها قبلاً بررسی شده یا اصلاً ثبت نشده است
+        verified = set(
+            Transaction.objects.filter(reference_number__in={entry['reference'] for entry in missing})
+            .exclude(verification_status='pending').values_list('reference_number', flat=True)
+        )
+        for entry in missing:
+            reason = 'already_verified' if entry['reference'] in verified else 'not_found'
+            report['unmatched'].append(_report_row(entry, reason))
+    return matches
+
+
+def _verify(matches, author=None):
+    """تایید گروهی تراکنش‌های تطبیق یافته و ثبت یادداشت خط صورت‌حساب برای هر کدام؛ خروجی: تعداد تایید شده."""
+    now = timezone.now()
+    lines = dict(matches)
+    with db_transaction.atomic():
+        # تراکنش‌هایی که همزمان توسط کاربر دیگری بررسی شده‌اند کنار گذاشته می‌شوند
+        ids = list(
+            Transaction.objects.select_for_update()
+            .filter(id__in=lines, verification_status='pending').values_list('id', flat=True)
+        )
+        Transaction.objects.filter(id__in=ids).update(
+            verification_status='valid', verification_timestamp=now, updated_at=now
+        )
+        TransactionNote.objects.bulk_create([
+            TransactionNote(
+                transaction_id=transaction_id, author_apollonyar=author,
+                note=f"تایید خودکار با صورت‌حساب بانکی (خط {lines[transaction_id]})",
+            )
+            for transaction_id in ids
+        ])
+        # update() سیگنال post_save ندارد
+        ledgers_changed(user_ids=Transaction.objects.filter(id__in=ids).values_list('target_user_id', flat=True))
+    return len(ids)
+
+
+def reconcile(lines, apply=True, window_days=MATCH_WINDOW_DAYS, columns=None, author=None):
+    """
+    تطبیق خطوط صورت‌حساب بانکی با تراکنش‌های کارت به کارت و پایای در انتظار بر اساس شماره پیگیری،
+    مبلغ و تاریخ (با فاصله حداکثر window_days روز) و تایید گروهی تراکنش‌های تطبیق یافته.
+    خطی که دقیقاً یک تراکنش آزاد پیدا کند تطبیق می‌خورد؛ بیش از یکی «مبهم» و هیچ «تطبیق نیافته» گزارش می‌شود.
+    با apply=False فقط گزارش ساخته می‌شود.
+    """
+    report = {'lines': 0, 'matched': 0, 'verified': 0, 'skipped': 0, 'unmatched': [], 'ambiguous': [], 'invalid': []}
+    claimed = {}
+    for batch in chunks(read_statement(lines, columns), BATCH_SIZE):
+        entries = []
+        for entry in batch:
+            report['lines'] += 1
+            if 'error' in entry:
+                report['invalid'].append(entry)
+            elif entry.get('skipped'):
+                report['skipped'] += 1
+            else:
+                entries.append(entry)
+        if not entries:
+            continue
+        matches = _match_batch(entries, window_days, claimed, report)
+        report['matched'] += len(matches)
+        if apply and matches:
+            report['verified'] += _verify(matches, author)
+    return report
@@ -1,10 +1,12 @@
 # api/serializers.py
 
+from django.db.models import OuterRef, Prefetch, Subquery
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 from .models import (
-    User, Course, Term, Apollonyar, Group, MedalDef, DiscountCode,
+    User, Course, Term, Apollonyar, Group, MedalDef, Medal, DiscountCode,
     AssignmentDef, CallDef, Profile, AssignmentSubmissionFile, AssignmentSubmission, Assignment,
-    Call, Note, Transaction, TransactionNote, Installment
+    Call, Note, Transaction, TransactionNote, Installment, Log, ProfileLedger, UserLedger
     )
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
@@ -86,11 +88,79 @@ class OTPVerifySerializer(serializers.Serializer):
     code = serializers.CharField(max_length=6)
 
 
+def parse_field_list(raw):
+    """تبدیل مقدار 'a,b,c' به مجموعه نام‌ها؛ اگر پارامتر ارسال نشده باشد None برمی‌گرداند."""
+    if raw is None:
+        return None
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class DynamicFieldsMixin:
+    """
+    پشتیبانی از ?fields= و ?expand= در سریالایزرهای لیستی.
+    - fields: فقط ستون‌های نام برده شده (به همراه id) ساخته می‌شوند و متد get_ بقیه اجرا نمی‌شود.
+    - expand: روابط سنگین Meta.expandable_fields به صورت پیش‌فرض حذف هستند و فقط با expand
+      (یا نام بردن صریح در fields) اضافه می‌شوند.
+    related_fields مشخص می‌کند هر ستون به کدام select_related نیاز دارد تا setup_eager_loading
+    فقط join های ستون‌های درخواست شده را انجام دهد.
+    """
+    related_fields = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = self.requested_field_names(fields, expand)
+        if wanted.issuperset(self.Meta.fields):
+            return
+        for name in list(self.fields):
+            if name not in wanted:
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_field_names(cls, fields=None, expand=None):
+        all_names = set(cls.Meta.fields)
+        expandable = set(getattr(cls.Meta, 'expandable_fields', ()))
+        expand = set(expand or ())
+
+        unknown = set(fields or ()) - all_names
+        if unknown:
+            raise serializers.ValidationError({'fields': f"ستون نامعتبر: {', '.join(sorted(unknown))}"})
+        unknown = expand - expandable
+        if unknown:
+            raise serializers.ValidationError({'expand': f"رابطه نامعتبر: {', '.join(sorted(unknown))}"})
+
+        if fields is None:
+            return (all_names - expandable) | expand
+        return (set(fields) | {'id'} | expand) & all_names
+
+    @classmethod
+    def select_related_for(cls, queryset, wanted, prefix=''):
+        paths = sorted({path for name in wanted for path in cls.related_fields.get(name, ())})
+        if not paths:
+            return queryset
+        return queryset.select_related(*[prefix + path for path in paths])
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    آدرس نسخه‌های کوچک یک تصویر (api/images.py) به شکل {"small": {"webp": url, "jpeg": url}, ...}؛
+    تا زمانی که نسخه‌ها ساخته نشده‌اند None برمی‌گرداند.
+    """
+    def to_representation(self, value):
+        if not value:
+            return None
+        return {
+            label: {fmt: default_storage.url(name) for fmt, name in formats.items()}
+            for label, formats in value.items()
+        }
+
+
 class UserSerializerForProfile(serializers.ModelSerializer):
     """سریالایزر خلاصه‌ای از کاربر برای نمایش در پروفایل."""
+    photoThumbnails = ImageVariantsField(source='photo_variants')
+
     class Meta:
         model = User
-        fields = ['id', 'first_name', 'last_name', 'phone_number', 'email', 'photo']
+        fields = ['id', 'first_name', 'last_name', 'phone_number', 'email', 'photo', 'photoThumbnails']
 
 class CourseSerializerForProfile(serializers.ModelSerializer):
     """سریالایزر خلاصه‌ای از دوره."""
@@ -119,7 +189,7 @@ class ApollonyarSerializerForProfile(serializers.ModelSerializer):
 
 # --- سریالایزر اصلی پروفایل ---
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     سریالایزر کامل برای نمایش لیست یا جزئیات پروفایل هنرجویان.
     این سریالایزر اطلاعات را از مدل‌های مختلف جمع‌آوری می‌کند.
@@ -179,6 +249,34 @@ class ProfileSerializer(serializers.ModelSerializer):
             'earnedMedalIds', 'actionLogs', 'enrolledCourses', 'watchTime',
             'totalWatchTime', 'score'
         ]
+
+    related_fields = {
+        'user': ('user',), 'name': ('user',), 'phone': ('user',),
+        'birthYear': ('user',), 'city': ('user',),
+        'term': ('term',), 'termStartDate': ('term',), 'termEndDate': ('term',),
+        'totalCourseFee': ('term',), 'courseId': ('term',),
+        'enrolledCourses': ('term__course',),
+        'group': ('group',),
+        'apollonyar': ('apollonyar',), 'apollonyarTelegramId': ('apollonyar',),
+        'sales_representative': ('sales_representative',),
+    }
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, prefix='', fields=None, expand=None):
+        """
+        بارگذاری یکجای روابط مورد نیاز این سریالایزر برای کل صفحه.
+        prefix برای وقتی است که پروفایل داخل سریالایزر دیگری (مثلاً 'profile__') نمایش داده می‌شود.
+        با این کار تعداد کوئری‌ها به تعداد ردیف‌ها بستگی ندارد و فقط روابط ستون‌های درخواست شده join می‌شوند.
+        """
+        wanted = cls.requested_field_names(fields, expand)
+        queryset = cls.select_related_for(queryset, wanted, prefix)
+        if 'earnedMedalIds' in wanted:
+            # فقط شناسه تعریف مدال لازم است؛ join روی MedalDef انجام نمی‌شود
+            queryset = queryset.prefetch_related(Prefetch(
+                prefix + 'medals',
+                queryset=Medal.objects.only('id', 'profile_id', 'medal_def_id'),
+            ))
+        return queryset
     
     def get_name(self, obj):
         if obj.user:
@@ -249,10 +347,10 @@ class ProfileSerializer(serializers.ModelSerializer):
         return obj.apollonyar.telegram_id if obj.apollonyar else None
     
     def get_apollonyarId(self, obj):
-        return obj.apollonyar.id if obj.apollonyar else None
+        return obj.apollonyar_id
     
     def get_courseId(self, obj):
-        return obj.term.course.id if obj.term and obj.term.course else None
+        return obj.term.course_id if obj.term else None
     
     def get_totalCourseFee(self, obj):
         # محاسبه کل مبلغ دوره بر اساس اقساط
@@ -261,15 +359,12 @@ class ProfileSerializer(serializers.ModelSerializer):
         return 0
     
     def get_earnedMedalIds(self, obj):
-        # دریافت مدال‌های کسب شده توسط پروفایل
-        from .models import Medal
-        medals = Medal.objects.filter(profile=obj)
-        return [medal.medal_def.id for medal in medals]
+        # دریافت مدال‌های کسب شده توسط پروفایل (از prefetch در setup_eager_loading)
+        return [medal.medal_def_id for medal in obj.medals.all()]
     
     def get_actionLogs(self, obj):
-        # دریافت لاگ‌های مربوط به این پروفایل
-        from .models import Log
-        logs = Log.objects.all().order_by('-timestamp')[:20]  # آخرین 20 لاگ
+        # آخرین 20 لاگ همین هنرجو (ایندکس profile, timestamp)؛ تاریخچه کامل از /api/profiles/{id}/logs/
+        logs = obj.logs.select_related('issuer_apollonyar').order_by('-timestamp', '-id')[:20]
         return LogSerializer(logs, many=True).data
     
     def get_enrolledCourses(self, obj):
@@ -299,6 +394,14 @@ class ProfileSerializer(serializers.ModelSerializer):
     def get_score(self, obj):
         return obj.stars if obj.stars else 0
 
+class ProfileListSerializer(ProfileSerializer):
+    """
+    نسخه لیستی پروفایل (لیست هنرجویان و پروفایل‌های تو در تو).
+    لاگ‌ها در لیست جاسازی نمی‌شوند و به صورت تنبل از /api/profiles/{id}/logs/ خوانده می‌شوند.
+    """
+    class Meta(ProfileSerializer.Meta):
+        fields = [field for field in ProfileSerializer.Meta.fields if field != 'actionLogs']
+
 class CourseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
@@ -338,17 +441,39 @@ class MedalDefSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'title', 'description', 'icon']
     
     def get_icon(self, obj):
-        # اگر آیکون آپلود شده باشد، URL آن را برگردان
+        # اگر آیکون آپلود شده باشد، URL نسخه پاک‌سازی شده (SVG) یا کوچک شده (تصاویر دیگر) آن را برگردان
         if obj.icon and hasattr(obj.icon, 'url'):
+            variants = obj.icon_variants or {}
+            if 'svg' in variants:
+                return default_storage.url(variants['svg'])
+            if 'small' in variants:
+                return default_storage.url(variants['small']['webp'])
             return obj.icon.url
         
         # اگر آیکون آپلود نشده باشد، آیکون پیش‌فرض بر اساس نام مدال برگردان
         return 'fa-solid fa-award'
 
+class MedalSerializer(serializers.ModelSerializer):
+    """سریالایزر برای نمایش مدال‌های اعطا شده به یک پروفایل."""
+    medalId = serializers.IntegerField(source='medal_def_id', read_only=True)
+    title = serializers.CharField(source='medal_def.title', read_only=True)
+    giver = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Medal
+        fields = ['id', 'medalId', 'title', 'description', 'timestamp', 'giver']
+
+    def get_giver(self, obj):
+        if obj.giver_apollonyar:
+            return f"{obj.giver_apollonyar.first_name} {obj.giver_apollonyar.last_name}".strip()
+        return "نامشخص"
+
 class DiscountCodeSerializer(serializers.ModelSerializer):
     class Meta:
         model = DiscountCode
         fields = '__all__'
+        # شمارنده فقط با UPDATE شرطی api.discounts.redeem تغییر می‌کند تا ویرایش فرم آن را بازنویسی نکند
+        read_only_fields = ['usage_count']
 
 class AssignmentDefSerializer(serializers.ModelSerializer):
     class Meta:
@@ -364,7 +489,10 @@ class AssignmentSubmissionFileSerializer(serializers.ModelSerializer):
     """سریالایزر برای نمایش فایل‌های ارسالی یک تکلیف."""
     class Meta:
         model = AssignmentSubmissionFile
-        fields = ['id', 'file', 'description']
+        fields = ['id', 'file', 'description', 'preview', 'waveform', 'duration', 'mediaStatus']
+        extra_kwargs = {'preview': {'read_only': True}, 'waveform': {'read_only': True}, 'duration': {'read_only': True}}
+
+    mediaStatus = serializers.CharField(source='media_status', read_only=True)
 
 class AssignmentSubmissionSerializer(serializers.ModelSerializer):
     """سریالایزر برای نمایش تاریخچه ارسال‌های یک تکلیف."""
@@ -378,7 +506,19 @@ class AssignmentSubmissionSerializer(serializers.ModelSerializer):
             'assessment_timestamp', 'assessor_apollonyar', 'files'
         ]
 
-class AssignmentSerializer(serializers.ModelSerializer):
+def with_latest_submission(queryset):
+    """
+    افزودن زمان ارسال، نمره و زمان ارزیابی آخرین ارسال هر تکلیف به queryset تکالیف با Subquery.
+    هر Subquery از ایندکس (assignment, submission_timestamp, id) فقط یک ردیف می‌خواند.
+    """
+    latest = AssignmentSubmission.objects.filter(assignment=OuterRef('pk')).order_by('-submission_timestamp', '-id')
+    return queryset.annotate(
+        latest_submitted_at=Subquery(latest.values('submission_timestamp')[:1]),
+        latest_grade=Subquery(latest.values('grade')[:1]),
+        latest_assessed_at=Subquery(latest.values('assessment_timestamp')[:1]),
+    )
+
+class AssignmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     سریالایزر برای نمایش لیست تکالیف با اطلاعات کامل پروفایل.
     """
@@ -386,7 +526,7 @@ class AssignmentSerializer(serializers.ModelSerializer):
     submissions = AssignmentSubmissionSerializer(many=True, read_only=True)
     
     # اطلاعات پروفایل
-    profile = ProfileSerializer(read_only=True)
+    profile = ProfileListSerializer(read_only=True)
     
     # فیلدهای اضافی برای سازگاری با فرانت‌اند
     studentName = serializers.SerializerMethodField()
@@ -409,6 +549,31 @@ class AssignmentSerializer(serializers.ModelSerializer):
             'studentId', 'apollonyar', 'submissionDate', 'reviewDate', 
             'status', 'grade'
         ]
+        # پروفایل کامل فقط با ?expand=profile اضافه می‌شود
+        expandable_fields = ['profile']
+
+    related_fields = {
+        'assignment_def': ('assignment_def',), 'assignmentTitle': ('assignment_def',),
+        'studentName': ('profile__user',), 'phone': ('profile__user',),
+        'course': ('profile__term__course',), 'term': ('profile__term',),
+        'apollonyar': ('profile__apollonyar',),
+    }
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None, expand=None):
+        wanted = cls.requested_field_names(fields, expand)
+        queryset = cls.select_related_for(queryset, wanted)
+        if 'submissions' in wanted:
+            queryset = queryset.prefetch_related(Prefetch(
+                'submissions',
+                queryset=AssignmentSubmission.objects.select_related('assessor_apollonyar')
+                .prefetch_related('files').order_by('-submission_timestamp', '-id'),
+            ))
+        if wanted & {'submissionDate', 'reviewDate', 'status', 'grade'}:
+            queryset = with_latest_submission(queryset)
+        if 'profile' in wanted:
+            queryset = ProfileListSerializer.setup_eager_loading(queryset, prefix='profile__')
+        return queryset
     
     def get_studentName(self, obj):
         if obj.profile and obj.profile.user:
@@ -428,51 +593,81 @@ class AssignmentSerializer(serializers.ModelSerializer):
         return obj.profile.term.name if obj.profile and obj.profile.term else "نامشخص"
     
     def get_studentId(self, obj):
-        return obj.profile.id if obj.profile else None
+        return obj.profile_id
     
     def get_apollonyar(self, obj):
         if obj.profile and obj.profile.apollonyar:
             return f"{obj.profile.apollonyar.first_name} {obj.profile.apollonyar.last_name}".strip()
         return "نامشخص"
     
+    def _latest_submission(self, obj):
+        """
+        (زمان ارسال، نمره، زمان ارزیابی) آخرین ارسال تکلیف.
+        در لیست‌ها از annotate های with_latest_submission خوانده می‌شود؛ در غیر این صورت یک بار کوئری و روی obj ذخیره می‌شود.
+        """
+        if not hasattr(obj, 'latest_submitted_at'):
+            latest = obj.submissions.order_by('-submission_timestamp', '-id').first()
+            obj.latest_submitted_at = latest.submission_timestamp if latest else None
+            obj.latest_grade = latest.grade if latest else None
+            obj.latest_assessed_at = latest.assessment_timestamp if latest else None
+        return obj.latest_submitted_at, obj.latest_grade, obj.latest_assessed_at
+
     def get_submissionDate(self, obj):
-        submissions = obj.submissions.all()
-        if submissions.exists():
-            # آخرین submission را برمی‌گردانیم
-            latest_submission = submissions.first()
-            return latest_submission.submission_timestamp.strftime('%Y-%m-%d %H:%M')
-        return None
+        submitted_at, _, _ = self._latest_submission(obj)
+        return submitted_at.strftime('%Y-%m-%d %H:%M') if submitted_at else None
     
     def get_reviewDate(self, obj):
-        submissions = obj.submissions.all()
-        if submissions.exists():
-            latest_submission = submissions.first()
-            if latest_submission.assessment_timestamp:
-                return latest_submission.assessment_timestamp.strftime('%Y-%m-%d %H:%M')
+        submitted_at, _, assessed_at = self._latest_submission(obj)
+        if submitted_at and assessed_at:
+            return assessed_at.strftime('%Y-%m-%d %H:%M')
         return None
     
     def get_status(self, obj):
-        submissions = obj.submissions.all()
-        if submissions.exists():
-            latest_submission = submissions.first()
-            if latest_submission.grade is not None:
-                return "بررسی شده"
-            else:
-                return "در انتظار بررسی"
-        return "ارسال نشده"
+        submitted_at, grade, _ = self._latest_submission(obj)
+        if submitted_at is None:
+            return "ارسال نشده"
+        if grade is not None:
+            return "بررسی شده"
+        return "در انتظار بررسی"
     
     def get_grade(self, obj):
-        submissions = obj.submissions.all()
-        if submissions.exists():
-            latest_submission = submissions.first()
-            if latest_submission.grade is not None:
-                return latest_submission.grade
-        return None
+        _, grade, _ = self._latest_submission(obj)
+        return grade
 
-class CallSerializer(serializers.ModelSerializer):
+class ReviewQueueSerializer(serializers.ModelSerializer):
+    """سریالایزر صف بررسی: ارسال‌های نمره‌نخورده به همراه اطلاعات تکلیف و هنرجو."""
+    assignmentId = serializers.IntegerField(source='assignment_id', read_only=True)
+    assignmentTitle = serializers.CharField(source='assignment.assignment_def.title', read_only=True)
+    deadline = serializers.DateTimeField(source='assignment.deadline', read_only=True)
+    studentId = serializers.IntegerField(source='assignment.profile_id', read_only=True)
+    studentName = serializers.SerializerMethodField()
+    phone = serializers.CharField(source='assignment.profile.user.phone_number', read_only=True)
+    apollonyarId = serializers.IntegerField(source='assignment.profile.apollonyar_id', read_only=True)
+    claimedBy = serializers.IntegerField(source='claimed_by_id', read_only=True)
+    leaseExpiresAt = serializers.DateTimeField(source='lease_expires_at', read_only=True)
+    files = AssignmentSubmissionFileSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = AssignmentSubmission
+        fields = [
+            'id', 'submission_timestamp', 'assignmentId', 'assignmentTitle', 'deadline',
+            'studentId', 'studentName', 'phone', 'apollonyarId', 'claimedBy', 'leaseExpiresAt', 'files'
+        ]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related(
+            'assignment__assignment_def', 'assignment__profile__user'
+        ).prefetch_related('files')
+
+    def get_studentName(self, obj):
+        user = obj.assignment.profile.user
+        return f"{user.first_name} {user.last_name}".strip() or "نامشخص"
+
+class CallSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """سریالایزر برای نمایش لیست تماس‌ها با اطلاعات کامل پروفایل."""
     # اطلاعات پروفایل
-    profile = ProfileSerializer(read_only=True)
+    profile = ProfileListSerializer(read_only=True)
     # اطلاعات تماس‌گیرنده
     caller = ApollonyarSerializerForProfile(read_only=True) 
     # فقط عنوان تعریف تماس را نمایش می‌دهیم
@@ -497,6 +692,23 @@ class CallSerializer(serializers.ModelSerializer):
             'studentName', 'phone', 'topic', 'callStatus', 'hearts', 
             'course', 'term', 'studentId', 'apollonyar'
         ]
+        # پروفایل کامل فقط با ?expand=profile اضافه می‌شود
+        expandable_fields = ['profile']
+
+    related_fields = {
+        'caller': ('caller',), 'call_def': ('call_def',), 'topic': ('call_def',),
+        'studentName': ('profile__user',), 'phone': ('profile__user',), 'hearts': ('profile',),
+        'course': ('profile__term__course',), 'term': ('profile__term',),
+        'apollonyar': ('profile__apollonyar',),
+    }
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None, expand=None):
+        wanted = cls.requested_field_names(fields, expand)
+        queryset = cls.select_related_for(queryset, wanted)
+        if 'profile' in wanted:
+            queryset = ProfileListSerializer.setup_eager_loading(queryset, prefix='profile__')
+        return queryset
     
     def get_studentName(self, obj):
         if obj.profile and obj.profile.user:
@@ -528,7 +740,7 @@ class CallSerializer(serializers.ModelSerializer):
         return obj.profile.term.name if obj.profile and obj.profile.term else "نامشخص"
     
     def get_studentId(self, obj):
-        return obj.profile.id if obj.profile else None
+        return obj.profile_id
     
     def get_apollonyar(self, obj):
         if obj.profile and obj.profile.apollonyar:
@@ -588,9 +800,11 @@ class LogSerializer(serializers.ModelSerializer):
     timestamp_formatted = serializers.SerializerMethodField()
     
     class Meta:
-        from .models import Log
         model = Log
-        fields = ['id', 'action', 'timestamp', 'description', 'issuer_name', 'timestamp_formatted']
+        fields = [
+            'id', 'action', 'action_code', 'profile', 'timestamp', 'description',
+            'issuer_name', 'timestamp_formatted'
+        ]
     
     def get_issuer_name(self, obj):
         if obj.issuer_apollonyar:
@@ -636,7 +850,7 @@ class TransactionNoteSerializer(serializers.ModelSerializer):
         model = TransactionNote
         fields = ['id', 'note', 'timestamp', 'author_apollonyar']
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """سریالایزر کامل برای نمایش لیست و جزئیات تراکنش‌ها."""
     target_user = UserSerializerForProfile(read_only=True)
     notes = TransactionNoteSerializer(many=True, read_only=True)
@@ -649,6 +863,7 @@ class TransactionSerializer(serializers.ModelSerializer):
     paymentMethod = serializers.SerializerMethodField()
     status = serializers.SerializerMethodField()
     receiptImageUrl = serializers.SerializerMethodField()
+    receiptThumbnails = ImageVariantsField(source='receipt_variants')
 
     class Meta:
         model = Transaction
@@ -657,8 +872,20 @@ class TransactionSerializer(serializers.ModelSerializer):
             'payment_method', 'verification_status', 'verification_timestamp', 
             'receipt_image', 'created_at', 'updated_at',
             'type', 'amount', 'dateTime', 'trackingNumber', 'paymentMethod', 
-            'status', 'receiptImageUrl'
+            'status', 'receiptImageUrl', 'receiptThumbnails'
         ]
+
+    related_fields = {
+        'target_user': ('target_user',),
+    }
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, prefix='', fields=None, expand=None):
+        wanted = cls.requested_field_names(fields, expand)
+        queryset = cls.select_related_for(queryset, wanted, prefix)
+        if 'notes' in wanted:
+            queryset = queryset.prefetch_related(prefix + 'notes__author_apollonyar')
+        return queryset
     
     def get_type(self, obj):
         type_map = {
@@ -697,10 +924,10 @@ class TransactionSerializer(serializers.ModelSerializer):
             return obj.receipt_image.url
         return None
 
-class InstallmentSerializer(serializers.ModelSerializer):
+class InstallmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """سریالایزر برای نمایش لیست اقساط با اطلاعات کامل پروفایل."""
     # اطلاعات پروفایل
-    profile = ProfileSerializer(read_only=True)
+    profile = ProfileListSerializer(read_only=True)
     transaction = TransactionSerializer(read_only=True)
     
     # فیلدهای اضافی برای سازگاری با فرانت‌اند
@@ -724,6 +951,25 @@ class InstallmentSerializer(serializers.ModelSerializer):
             'studentName', 'phone', 'dueDate', 'amount', 'daysRemaining', 'paymentStatus',
             'term', 'course', 'apollonyar', 'lastContactDate', 'courseStatus', 'studentId'
         ]
+        # پروفایل و تراکنش کامل فقط با ?expand=profile,transaction اضافه می‌شوند
+        expandable_fields = ['profile', 'transaction']
+
+    related_fields = {
+        'studentName': ('profile__user',), 'phone': ('profile__user',),
+        'term': ('profile__term',), 'course': ('profile__term__course',),
+        'apollonyar': ('profile__apollonyar',), 'courseStatus': ('profile',),
+        'transaction': ('transaction',),
+    }
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None, expand=None):
+        wanted = cls.requested_field_names(fields, expand)
+        queryset = cls.select_related_for(queryset, wanted)
+        if 'transaction' in wanted:
+            queryset = TransactionSerializer.setup_eager_loading(queryset, prefix='transaction__')
+        if 'profile' in wanted:
+            queryset = ProfileListSerializer.setup_eager_loading(queryset, prefix='profile__')
+        return queryset
     
     def get_studentName(self, obj):
         if obj.profile and obj.profile.user:
@@ -782,4 +1028,68 @@ class InstallmentSerializer(serializers.ModelSerializer):
         return 'نامشخص'
     
     def get_studentId(self, obj):
-        return obj.profile.id if obj.profile else None
\ No newline at end of file
+        return obj.profile_id
+
+
+class InstallmentTrackingSerializer(serializers.ModelSerializer):
+    """
+    ردیف تخت لیست پیگیری اقساط؛ همه مقادیر از annotation های api.installments.tracking_queryset خوانده می‌شوند
+    و هیچ رابطه‌ای بارگذاری نمی‌شود.
+    """
+    studentId = serializers.IntegerField(source='profile_id', read_only=True)
+    studentName = serializers.CharField(source='student_name', read_only=True)
+    phone = serializers.CharField(read_only=True)
+    dueDate = serializers.DateField(source='due_date', format='%Y/%m/%d', read_only=True)
+    amount = serializers.FloatField(source='due_amount', read_only=True)
+    daysRemaining = serializers.SerializerMethodField()
+    isOverdue = serializers.BooleanField(source='is_overdue', read_only=True)
+    paymentStatus = serializers.CharField(source='payment_status', read_only=True)
+    term = serializers.CharField(source='term_name', read_only=True)
+    course = serializers.CharField(source='course_name', read_only=True)
+    apollonyarId = serializers.IntegerField(source='apollonyar_id', read_only=True)
+    apollonyar = serializers.CharField(source='apollonyar_name', read_only=True)
+    lastContactDate = serializers.DateTimeField(source='last_contact', read_only=True)
+    courseStatus = serializers.CharField(source='course_status', read_only=True)
+
+    class Meta:
+        model = Installment
+        fields = [
+            'id', 'status', 'studentId', 'studentName', 'phone', 'dueDate', 'amount', 'daysRemaining', 'isOverdue',
+            'paymentStatus', 'term', 'course', 'apollonyarId', 'apollonyar', 'lastContactDate', 'courseStatus',
+        ]
+
+    def get_daysRemaining(self, obj):
+        # تفاضل تاریخ‌ها در دیتابیس محاسبه شده و به صورت timedelta برگشته است
+        return obj.days_remaining.days
+
+
+class ProfileLedgerSerializer(serializers.ModelSerializer):
+    """خلاصه مالی یک پروفایل (api.ledger)."""
+    totalDue = serializers.FloatField(source='total_due', read_only=True)
+    paid = serializers.FloatField(read_only=True)
+    outstanding = serializers.FloatField(read_only=True)
+    overdue = serializers.FloatField(read_only=True)
+    nextDueDate = serializers.DateField(source='next_due_date', format='%Y/%m/%d', read_only=True)
+    updatedAt = serializers.DateTimeField(source='updated_at', read_only=True)
+
+    class Meta:
+        model = ProfileLedger
+        fields = ['totalDue', 'paid', 'outstanding', 'overdue', 'nextDueDate', 'updatedAt']
+
+
+class UserLedgerSerializer(serializers.ModelSerializer):
+    """خلاصه مالی یک هنرجو در همه پروفایل‌هایش؛ balance مثبت یعنی بدهی."""
+    totalDue = serializers.FloatField(source='total_due', read_only=True)
+    installmentsPaid = serializers.FloatField(source='installments_paid', read_only=True)
+    deposits = serializers.FloatField(read_only=True)
+    withdrawals = serializers.FloatField(read_only=True)
+    balance = serializers.FloatField(read_only=True)
+    overdue = serializers.FloatField(read_only=True)
+    nextDueDate = serializers.DateField(source='next_due_date', format='%Y/%m/%d', read_only=True)
+    updatedAt = serializers.DateTimeField(source='updated_at', read_only=True)
+
+    class Meta:
+        model = UserLedger
+        fields = [
+            'totalDue', 'installmentsPaid', 'deposits', 'withdrawals', 'balance', 'overdue', 'nextDueDate', 'updatedAt',
+        ]
\ No newline at end of file
@@ -0,0 +1,237 @@
+# api/signals.py
+
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .call_stats import apply_deltas, fold_stats, stat_key
+from .fanout import fan_out_assignment_defs, fan_out_profiles
+from .images import IMAGE_FIELDS, schedule_image_variants
+from .ledger import ledgers_changed
+from .models import (
+    Apollonyar, AssignmentDef, AssignmentDefTemplate, AssignmentSubmissionFile, Call, CallDef, Installment, MedalDef,
+    Profile, Transaction, UploadSession, User,
+)
+from .storage import add_references
+from .tasks import run_in_background
+from .transcoding import schedule_media_processing
+
+
+# === ساخت خودکار تکالیف ===
+
+@receiver(post_save, sender=AssignmentDef)
+def assignment_def_created(sender, instance, created, **kwargs):
+    """تعریف تکلیف جدید برای همه هنرجویان ترم آن تکلیف می‌سازد."""
+    if created and not kwargs.get('raw'):
+        run_in_background(fan_out_assignment_defs, [instance.id])
+
+
+@receiver(post_init, sender=Profile)
+def remember_profile_term(sender, instance, **kwargs):
+    # اگر term_id بارگذاری نشده باشد (only/defer) نباید با دسترسی به آن کوئری اضافه زده شود
+    instance._loaded_term_id = instance.__dict__.get('term_id')
+
+
+@receiver(post_save, sender=Profile)
+def profile_joined_term(sender, instance, created, update_fields=None, **kwargs):
+    """پروفایلی که به ترمی اضافه می‌شود تکالیف آن ترم را دریافت می‌کند."""
+    if kwargs.get('raw') or not instance.term_id:
+        return
+    if update_fields is not None and 'term' not in update_fields and 'term_id' not in update_fields:
+        return
+    if created or instance.term_id != instance._loaded_term_id:
+        run_in_background(fan_out_profiles, [instance.id])
+    instance._loaded_term_id = instance.term_id
+
+
+# === پردازش فایل‌های صوتی/تصویری ===
+
+@receiver(post_save, sender=AssignmentSubmissionFile)
+def submission_file_created(sender, instance, created, **kwargs):
+    """ساخت پیش‌نمایش و waveform فایل ارسالی جدید در پس‌زمینه."""
+    if created and not kwargs.get('raw'):
+        schedule_media_processing([instance.id])
+
+
+# === شمارش ارجاع فایل‌های storage محتوا-محور ===
+# bulk_create و update() این سیگنال‌ها را اجرا نمی‌کنند؛ در آن مسیرها add_references صریحاً صدا زده می‌شود
+
+def _file_name(value):
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_init, sender=AssignmentDefTemplate)
+@receiver(post_init, sender=AssignmentSubmissionFile)
+@receiver(post_init, sender=UploadSession)
+def remember_blob(sender, instance, **kwargs):
+    instance._loaded_blob = _file_name(instance.__dict__.get('file'))
+
+
+@receiver(post_save, sender=AssignmentDefTemplate)
+@receiver(post_save, sender=AssignmentSubmissionFile)
+@receiver(post_save, sender=UploadSession)
+def blob_referenced(sender, instance, created, **kwargs):
+    """ثبت ارجاع به فایل جدید و آزاد کردن ارجاع فایل قبلی در صورت تعویض فایل."""
+    if kwargs.get('raw'):
+        return
+    name = _file_name(instance.file)
+    if name != instance._loaded_blob:
+        add_references([name])
+        add_references([instance._loaded_blob], -1)
+        instance._loaded_blob = name
+
+
+@receiver(post_delete, sender=AssignmentDefTemplate)
+@receiver(post_delete, sender=AssignmentSubmissionFile)
+@receiver(post_delete, sender=UploadSession)
+def blob_released(sender, instance, **kwargs):
+    add_references([instance._loaded_blob], -1)
+
+
+# === نسخه‌های کوچک تصاویر (عکس کاربر، رسید، آیکون مدال) ===
+
+@receiver(post_init, sender=User)
+@receiver(post_init, sender=Transaction)
+@receiver(post_init, sender=MedalDef)
+def remember_image(sender, instance, **kwargs):
+    field = IMAGE_FIELDS[sender][0]
+    instance._loaded_image = _file_name(instance.__dict__.get(field))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Transaction)
+@receiver(post_save, sender=MedalDef)
+def image_changed(sender, instance, update_fields=None, **kwargs):
+    """پس از آپلود یا تعویض تصویر، نسخه‌های کوچک آن در پس‌زمینه ساخته می‌شوند."""
+    field = IMAGE_FIELDS[sender][0]
+    # فیلدی که بارگذاری نشده (only/defer) یا در update_fields نیست تغییر نکرده است
+    if kwargs.get('raw') or field not in instance.__dict__:
+        return
+    if update_fields is not None and field not in update_fields:
+        return
+    name = _file_name(instance.__dict__.get(field))
+    if name != instance._loaded_image:
+        schedule_image_variants(sender, instance.pk)
+        instance._loaded_image = name
+
+
+# === جدول خلاصه آمار روزانه تماس‌ها ===
+# bulk_create تماس‌ها (api.worklist) این سیگنال‌ها را اجرا نمی‌کند و record_calls را صریحاً صدا می‌زند
+
+CALL_STAT_FIELDS = ('call_timestamp', 'caller_id', 'call_def_id', 'type', 'status')
+
+
+@receiver(post_init, sender=Call)
+def remember_call_stat(sender, instance, **kwargs):
+    instance._loaded_stat = {name: instance.__dict__[name] for name in CALL_STAT_FIELDS if name in instance.__dict__}
+
+
+@receiver(post_save, sender=Call)
+def call_stat_changed(sender, instance, created, **kwargs):
+    """تماس جدید یک واحد به ردیف خلاصه خود اضافه می‌کند؛ تغییر وضعیت (یا نوع، زمان و ...) آن را به ردیف جدید منتقل می‌کند."""
+    if kwargs.get('raw'):
+        return
+    current = {name: instance.__dict__[name] for name in CALL_STAT_FIELDS if name in instance.__dict__}
+    loaded = {} if created else dict(instance._loaded_stat)
+    missing = [name for name in CALL_STAT_FIELDS if name not in current or (not created and name not in loaded)]
+    if missing:
+        # فیلدهای بارگذاری نشده (only/defer) ذخیره نشده‌اند؛ مقدارشان قبل و بعد همان مقدار دیتابیس است
+        stored = Call.objects.filter(pk=instance.pk).values(*missing).first() or {}
+        current = {**stored, **current}
+        loaded = {**stored, **loaded}
+    new_key = stat_key(current)
+    old_key = None if created else stat_key(loaded)
+    if new_key != old_key:
+        apply_deltas({new_key: 1, old_key: -1})
+    instance._loaded_stat = current
+
+
+@receiver(post_delete, sender=Call)
+def call_stat_removed(sender, instance, **kwargs):
+    if set(instance._loaded_stat) == set(CALL_STAT_FIELDS):
+        apply_deltas({stat_key(instance._loaded_stat): -1})
+
+
+@receiver(pre_delete, sender=Apollonyar)
+def caller_stats_released(sender, instance, **kwargs):
+    fold_stats('caller_id', instance.pk)
+
+
+@receiver(pre_delete, sender=CallDef)
+def call_def_stats_released(sender, instance, **kwargs):
+    fold_stats('call_def_id', instance.pk)
+
+
+# === خلاصه مالی پروفایل‌ها و کاربران ===
+# bulk_create/bulk_update اقساط (api.installments) و update() تراکنش‌ها (api.reconciliation) ledgers_changed را صریحاً صدا می‌زنند
+
+# ستون‌هایی که در خلاصه مالی اثر دارند؛ ذخیره‌هایی با update_fields بدون این ستون‌ها (مثلاً نسخه‌های رسید) نادیده گرفته می‌شوند
+LEDGER_FIELDS = {
+    Installment: {'profile', 'profile_id', 'due_amount', 'due_date', 'status'},
+    Transaction: {'target_user', 'target_user_id', 'amount', 'type', 'verification_status'},
+}
+
+
+def _ledger_unchanged(sender, update_fields, **kwargs):
+    return kwargs.get('raw') or (update_fields is not None and not LEDGER_FIELDS[sender] & set(update_fields))
+
+
+def _origin_model(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+@receiver(post_init, sender=Installment)
+@receiver(post_init, sender=Transaction)
+@receiver(post_init, sender=Profile)
+def remember_ledger_owner(sender, instance, **kwargs):
+    field = 'profile_id' if sender is Installment else 'target_user_id' if sender is Transaction else 'user_id'
+    instance._loaded_owner = instance.__dict__.get(field)
+
+
+@receiver(post_save, sender=Installment)
+def installment_ledger_changed(sender, instance, update_fields=None, **kwargs):
+    """قسط جدید یا تغییر کرده خلاصه پروفایل خود (و پروفایل قبلی، اگر جابه‌جا شده باشد) را به‌روز می‌کند."""
+    if _ledger_unchanged(sender, update_fields, **kwargs):
+        return
+    ledgers_changed(profile_ids={instance.profile_id, instance._loaded_owner} - {None})
+    instance._loaded_owner = instance.profile_id
+
+
+@receiver(post_save, sender=Transaction)
+def transaction_ledger_changed(sender, instance, update_fields=None, **kwargs):
+    if _ledger_unchanged(sender, update_fields, **kwargs):
+        return
+    ledgers_changed(user_ids={instance.target_user_id, instance._loaded_owner} - {None})
+    instance._loaded_owner = instance.target_user_id
+
+
+@receiver(post_save, sender=Profile)
+def profile_owner_changed(sender, instance, created, **kwargs):
+    """انتقال پروفایل به کاربر دیگر اقساط آن را از خلاصه کاربر قبلی به کاربر جدید می‌برد."""
+    if kwargs.get('raw') or created or instance._loaded_owner is None or 'user_id' not in instance.__dict__:
+        return
+    if instance.user_id == instance._loaded_owner:
+        return
+    ledgers_changed(profile_ids=[instance.pk], user_ids=[instance._loaded_owner])
+    instance._loaded_owner = instance.user_id
+
+
+@receiver(post_delete, sender=Installment)
+@receiver(post_delete, sender=Transaction)
+def ledger_entry_removed(sender, instance, origin=None, **kwargs):
+    """
+    حذف قسط یا تراکنش خلاصه صاحب آن را به‌روز می‌کند. در حذف آبشاری (از پروفایل یا کاربر) صاحب و خلاصه‌اش
+    همراه آن حذف می‌شوند و نباید دوباره ساخته شوند.
+    """
+    if _origin_model(origin) is not sender:
+        return
+    if sender is Installment:
+        ledgers_changed(profile_ids=[instance.profile_id])
+    else:
+        ledgers_changed(user_ids=[instance.target_user_id])
+
+
+@receiver(post_delete, sender=Profile)
+def profile_ledger_removed(sender, instance, origin=None, **kwargs):
+    if _origin_model(origin) is not User:
+        ledgers_changed(user_ids=[instance.user_id])
@@ -0,0 +1,193 @@
+# api/storage.py
+
+import glob
+import hashlib
+import os
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import FileSystemStorage, storages
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+BLOB_PREFIX = 'blobs'
+HASH_BLOCK_SIZE = 64 * 1024
+
+
+def blob_storage():
+    """storage فیلدهای فایل الگو و فایل ارسالی (STORAGES['blobs'] در تنظیمات)."""
+    return storages['blobs']
+
+
+def hash_content(content):
+    """sha256 و حجم محتوای یک File؛ محتوا بلوک به بلوک خوانده می‌شود و در پایان به ابتدا برمی‌گردد."""
+    hasher = hashlib.sha256()
+    size = 0
+    for block in content.chunks(HASH_BLOCK_SIZE):
+        if isinstance(block, str):
+            block = block.encode()
+        hasher.update(block)
+        size += len(block)
+    content.seek(0)
+    return hasher.hexdigest(), size
+
+
+def derivative_name(name, suffix):
+    """نام فایل مشتق در کنار فایل اصلی، مثلاً submission_files/a.wav -> submission_files/a.wav.preview.m4a"""
+    return f'{name}.{suffix}'
+
+
+def blob_extension(name):
+    ext = os.path.splitext(name)[1].lower()
+    return ext if len(ext) <= 16 and ext[1:].isalnum() else ''
+
+
+# === آدرس‌های امضا شده ===
+
+def media_signature(name, expires):
+    return signing.Signer(salt='api.media').signature(f'{name}:{expires}')
+
+
+def signed_url(name, url):
+    """
+    افزودن امضا و زمان انقضا به آدرس فایل تا بدون هدر Authorization (مثلاً در <audio src>) قابل دریافت باشد.
+    زمان انقضا به ساعت گرد می‌شود تا آدرس در طول هر ساعت ثابت بماند و مرورگر بتواند آن را cache کند.
+    """
+    ttl = getattr(settings, 'MEDIA_URL_TTL_SECONDS', 6 * 3600)
+    expires = (int(time.time()) + ttl) // 3600 * 3600 + 3600
+    return f"{url}?{urlencode({'expires': expires, 'signature': media_signature(name, expires)})}"
+
+
+def verify_signature(name, expires, signature):
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    return expires > time.time() and signing.constant_time_compare(signature or '', media_signature(name, expires))
+
+
+class SignedFileSystemStorage(FileSystemStorage):
+    """FileSystemStorage با آدرس‌های امضا شده که توسط api.media با بررسی دسترسی ارائه می‌شوند."""
+
+    def url(self, name):
+        return signed_url(name, super().url(name))
+
+
+class ContentAddressedStorage(SignedFileSystemStorage):
+    """
+    storage محتوا-محور: نام هر فایل از sha256 محتوای آن ساخته می‌شود (blobs/ab/cd/<sha256>.ext).
+    محتوا قبل از نوشتن hash می‌شود؛ اگر همان محتوا قبلاً ذخیره شده باشد چیزی روی دیسک نوشته نمی‌شود
+    و همان نام برگردانده می‌شود. تعداد ارجاع هر فایل در StoredBlob نگه داشته می‌شود و فایل‌های بدون
+    ارجاع با collect_garbage (فرمان gc_blobs) حذف می‌شوند.
+    """
+
+    def blob_name(self, digest, ext=''):
+        return f'{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+    def get_available_name(self, name, max_length=None):
+        # نام نهایی در _save از روی محتوا تعیین می‌شود
+        return name
+
+    def _save(self, name, content):
+        digest, size = hash_content(content)
+        name = self.blob_name(digest, blob_extension(name))
+        self.register(name, digest, size)
+        if not self.exists(name):
+            # نوشتن در فایل موقت و جایگزینی اتمیک، تا نوشتن همزمان یک محتوا فایل نیمه‌کاره نسازد
+            temp_name = super()._save(f'{name}.{uuid.uuid4().hex}.tmp', content)
+            os.replace(self.path(temp_name), self.path(name))
+        return name
+
+    def reuse(self, digest, ext=''):
+        """نام فایلی با این sha256 اگر از قبل ذخیره شده باشد (بدون نیاز به خواندن دوباره محتوا)، در غیر این صورت None."""
+        name = self.blob_name(digest, ext)
+        if not self.exists(name):
+            return None
+        self.register(name, digest, self.size(name))
+        return name
+
+    def register(self, name, digest, size):
+        """
+        ثبت یا تمدید ردیف StoredBlob یک فایل. تمدید updated_at مانع می‌شود که GC فایلی را که همین حالا
+        دوباره آپلود شده ولی هنوز ردیف ارجاع‌دهنده‌اش ذخیره نشده حذف کند.
+        """
+        from .models import StoredBlob
+
+        with transaction.atomic():
+            if not StoredBlob.objects.filter(name=name).update(updated_at=timezone.now()):
+                StoredBlob.objects.get_or_create(name=name, defaults={'sha256': digest, 'size': size})
+
+
+# === شمارش ارجاع ===
+
+def is_blob(name):
+    return bool(name) and name.startswith(f'{BLOB_PREFIX}/')
+
+
+def add_references(names, delta=1):
+    """افزایش (یا با delta منفی کاهش) تعداد ارجاع فایل‌ها؛ فایل‌های خارج از storage محتوا-محور نادیده گرفته می‌شوند."""
+    from .models import StoredBlob
+
+    for name, count in Counter(name for name in names if is_blob(name)).items():
+        blobs = StoredBlob.objects.filter(name=name)
+        if delta < 0:
+            blobs = blobs.filter(ref_count__gte=count * -delta)
+        blobs.update(ref_count=F('ref_count') + count * delta, updated_at=timezone.now())
+
+
+def referencing_fields():
+    """(مدل، نام فیلد) همه فیلدهایی که فایلشان در storage محتوا-محور است."""
+    from .models import AssignmentDefTemplate, AssignmentSubmissionFile, UploadSession
+
+    return [(AssignmentDefTemplate, 'file'), (AssignmentSubmissionFile, 'file'), (UploadSession, 'file')]
+
+
+def recount_references():
+    """محاسبه دوباره تعداد ارجاع همه فایل‌ها از روی جدول‌ها؛ خروجی: تعداد ردیف‌های اصلاح شده."""
+    from .models import StoredBlob
+
+    counts = Counter()
+    for model, field in referencing_fields():
+        names = model.objects.filter(**{f'{field}__startswith': f'{BLOB_PREFIX}/'}).values_list(field, flat=True)
+        counts.update(names.iterator(chunk_size=2000))
+
+    fixed = 0
+    for blob in StoredBlob.objects.only('name', 'ref_count').iterator(chunk_size=2000):
+        if blob.ref_count != counts.get(blob.name, 0):
+            StoredBlob.objects.filter(name=blob.name).update(ref_count=counts.get(blob.name, 0))
+            fixed += 1
+    return fixed
+
+
+def collect_garbage(grace=None):
+    """
+    حذف فایل‌هایی که هیچ ارجاعی ندارند و در مدت grace (پیش‌فرض BLOB_GC_GRACE_HOURS) دوباره استفاده نشده‌اند،
+    به همراه فایل‌های مشتق کنار آن‌ها (پیش‌نمایش و waveform). خروجی: (تعداد فایل‌ها، حجم آزاد شده)
+    """
+    from .models import StoredBlob
+
+    grace = grace if grace is not None else timedelta(hours=getattr(settings, 'BLOB_GC_GRACE_HOURS', 24))
+    cutoff = timezone.now() - grace
+    storage = blob_storage()
+    removed, freed = 0, 0
+    candidates = StoredBlob.objects.filter(ref_count=0, updated_at__lt=cutoff).values_list('name', flat=True)
+    for name in list(candidates.iterator(chunk_size=2000)):
+        with transaction.atomic():
+            # قفل ردیف و بررسی دوباره: ممکن است فایل در همین فاصله دوباره آپلود یا ارجاع داده شده باشد
+            blob = StoredBlob.objects.select_for_update().filter(name=name, ref_count=0, updated_at__lt=cutoff).first()
+            if blob is None:
+                continue
+            for path in [storage.path(name), *glob.glob(glob.escape(storage.path(name)) + '.*')]:
+                if os.path.exists(path):
+                    os.remove(path)
+            blob.delete()
+        removed += 1
+        freed += blob.size
+    return removed, freed
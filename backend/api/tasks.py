@@ -0,0 +1,87 @@
+# api/tasks.py
+
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+# executor مشترک کارهای پس‌زمینه (در طول عمر پروسه ساخته و نگه داشته می‌شود)
+_background_executor = None
+# pool پروسه‌ها برای کارهای سنگین CPU (ffmpeg، NumPy و Pillow) که در thread ها به خاطر GIL موازی نمی‌شوند
+_process_pool = None
+
+
+def _with_connection_cleanup(func):
+    """هر thread اتصال دیتابیس جداگانه دارد؛ پس از پایان کار باید بسته شود."""
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()
+    return wrapper
+
+
+def run_parallel(jobs, max_workers=None):
+    """
+    اجرای همزمان چند تابع مستقل (مثلاً چند کوئری فقط-خواندنی) در thread های جدا.
+    jobs یک دیکشنری نام -> تابع بدون آرگومان است و نتیجه با همان کلیدها برگردانده می‌شود.
+    """
+    if not jobs:
+        return {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(jobs)) as executor:
+        futures = {name: executor.submit(_with_connection_cleanup(job)) for name, job in jobs.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def _run_logged(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception("کار پس‌زمینه %s با خطا متوقف شد", getattr(func, '__name__', func))
+        raise
+
+
+def _get_background_executor():
+    global _background_executor
+    if _background_executor is None:
+        _background_executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'BACKGROUND_TASK_WORKERS', 2),
+            thread_name_prefix='apollon-task',
+        )
+    return _background_executor
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    اجرای func در worker پس‌زمینه پس از commit شدن تراکنش جاری، تا درخواست HTTP منتظر آن نماند
+    و worker داده‌های ذخیره شده را ببیند. با BACKGROUND_TASKS_EAGER=True همان لحظه و همزمان اجرا می‌شود.
+    صف در حافظه همین پروسه است و با restart یا deploy خالی می‌شود؛ هر کاری که اینجا فرستاده می‌شود باید
+    یک فرمان مدیریتی جبرانی داشته باشد که به صورت دوره‌ای اجرا شود (مثلاً fanout_assignments).
+    """
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        transaction.on_commit(lambda: func(*args, **kwargs))
+        return
+    job = _with_connection_cleanup(_run_logged)
+    transaction.on_commit(lambda: _get_background_executor().submit(job, func, args, kwargs))
+
+
+def _get_process_pool():
+    global _process_pool
+    if _process_pool is None:
+        # در روش‌های spawn/forkserver پروسه‌های جدید Django را از ابتدا بارگذاری می‌کنند
+        _process_pool = ProcessPoolExecutor(
+            max_workers=getattr(settings, 'MEDIA_PROCESS_WORKERS', 2), initializer=django.setup
+        )
+    return _process_pool
+
+
+def run_in_process(func, *args):
+    """
+    اجرای یک تابع CPU-bound در pool پروسه‌ها و انتظار برای نتیجه آن (از داخل کارهای پس‌زمینه صدا زده می‌شود).
+    func و آرگومان‌ها باید قابل pickle باشند و func نباید به ORM دسترسی داشته باشد.
+    """
+    return _get_process_pool().submit(func, *args).result()
@@ -0,0 +1,35 @@
+# api/tests/factories.py
+
+from datetime import date
+from itertools import count
+
+from api.models import Apollonyar, Course, Profile, Term, User
+
+
+_numbers = count(1)
+
+
+def make_user(**extra):
+    number = next(_numbers)
+    return User.objects.create_user(
+        phone_number=f'0912{number:07d}', password='x', first_name=f'user{number}', last_name='test', **extra
+    )
+
+
+def make_apollonyar(**extra):
+    number = next(_numbers)
+    return Apollonyar.objects.create(
+        first_name=f'apollonyar{number}', last_name='test', phone_number=f'0913{number:07d}', password='x', **extra
+    )
+
+
+def make_term(course=None, **extra):
+    course = course or Course.objects.create(name=f'course{next(_numbers)}')
+    extra.setdefault('start_date', date(2025, 1, 1))
+    extra.setdefault('end_date', date(2025, 6, 1))
+    return Term.objects.create(course=course, price=1000, name=f'term{next(_numbers)}', **extra)
+
+
+def make_profile(user=None, term=None, **extra):
+    term = term or make_term()
+    return Profile.objects.create(user=user or make_user(), course=term.course, term=term, **extra)
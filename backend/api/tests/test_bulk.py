@@ -0,0 +1,29 @@
+# api/tests/test_bulk.py
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .factories import make_profile, make_user
+
+
+class BulkChangeEndpointTests(TestCase):
+    def setUp(self):
+        self.profiles = [make_profile(), make_profile()]
+        self.client = APIClient()
+
+    def bulk_change(self, user):
+        self.client.force_authenticate(user)
+        return self.client.post('/api/profiles/bulk_change/', {
+            'operation': 'status', 'value': 'suspended', 'profileIds': [profile.id for profile in self.profiles],
+        }, format='json')
+
+    def test_students_cannot_change_profiles(self):
+        self.assertEqual(self.bulk_change(self.profiles[0].user).status_code, 403)
+        self.profiles[1].refresh_from_db()
+        self.assertEqual(self.profiles[1].status, 'active')
+
+    def test_staff_change_every_listed_profile(self):
+        self.assertEqual(self.bulk_change(make_user(is_staff=True)).status_code, 200)
+        for profile in self.profiles:
+            profile.refresh_from_db()
+            self.assertEqual(profile.status, 'suspended')
@@ -0,0 +1,46 @@
+# api/tests/test_call_stats.py
+
+from django.test import TestCase
+from django.utils import timezone
+
+from api.call_stats import apply_deltas, call_stats, rebuild_stats, stat_key
+from api.models import Call, CallDailyStat
+
+from .factories import make_apollonyar, make_profile
+
+
+class CallStatsTests(TestCase):
+    def setUp(self):
+        self.profile = make_profile()
+        self.caller = make_apollonyar()
+
+    def call(self, **values):
+        values.setdefault('type', 'course')
+        return Call.objects.create(profile=self.profile, call_timestamp=timezone.now(), **values)
+
+    def totals(self):
+        return {(row['status'], row.get('callerId')): row['total'] for row in call_stats(['caller', 'status'])}
+
+    def test_rows_without_caller_share_one_stat_row(self):
+        self.call()
+        self.call()
+        key = stat_key(self.call())
+        apply_deltas({key: 1})
+        self.assertEqual(CallDailyStat.objects.filter(caller__isnull=True, call_def__isnull=True).count(), 1)
+        self.assertEqual(self.totals(), {('pending', None): 4})
+
+    def test_status_change_moves_the_count(self):
+        call = self.call(caller=self.caller)
+        call.status = 'successful'
+        call.save()
+        self.assertEqual(self.totals(), {('successful', self.caller.id): 1})
+        call.delete()
+        self.assertEqual(self.totals(), {})
+
+    def test_rebuild_matches_incremental_rows(self):
+        self.call()
+        self.call(caller=self.caller, status='lost')
+        incremental = self.totals()
+        CallDailyStat.objects.all().delete()
+        rebuild_stats()
+        self.assertEqual(self.totals(), incremental)
@@ -0,0 +1,74 @@
+# api/tests/test_discounts.py
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from api.discounts import redeem
+from api.models import DiscountCode, DiscountRedemption
+
+from .factories import make_profile
+
+
+class RedeemTests(TestCase):
+    def setUp(self):
+        self.discount = DiscountCode.objects.create(code='SPRING', max_usage=2, cash_price=100, installment_price=150)
+
+    def usage_count(self):
+        self.discount.refresh_from_db()
+        return self.discount.usage_count
+
+    def test_redeems_until_max_usage(self):
+        first = redeem('SPRING', make_profile())
+        self.assertEqual(first.amount, 100)
+        self.assertEqual(redeem(' SPRING ', make_profile(), kind='installment').amount, 150)
+        with self.assertRaises(ValidationError):
+            redeem('SPRING', make_profile())
+        self.assertEqual(self.usage_count(), 2)
+        self.assertEqual(self.discount.redemptions.count(), 2)
+
+    def test_rejects_expired_code(self):
+        DiscountCode.objects.filter(pk=self.discount.pk).update(expiration_date=timezone.now() - timedelta(minutes=1))
+        with self.assertRaisesMessage(ValidationError, 'منقضی'):
+            redeem('SPRING', make_profile())
+        self.assertEqual(self.usage_count(), 0)
+
+    def test_duplicate_redemption_rolls_back_the_increment(self):
+        profile = make_profile()
+        redeem('SPRING', profile)
+        with self.assertRaisesMessage(ValidationError, 'قبلاً'):
+            redeem('SPRING', profile)
+        self.assertEqual(self.usage_count(), 1)
+        # ظرفیت برگشت داده شده برای پروفایل دیگری قابل استفاده است
+        redeem('SPRING', make_profile())
+        self.assertEqual(self.usage_count(), 2)
+
+    def test_rejects_unknown_code_and_kind(self):
+        for code, kind in (('NOPE', 'cash'), ('SPRING', 'barter')):
+            with self.assertRaises(ValidationError):
+                redeem(code, make_profile(), kind=kind)
+        self.assertEqual(self.usage_count(), 0)
+
+
+class RedeemEndpointTests(TestCase):
+    def setUp(self):
+        DiscountCode.objects.create(code='SPRING', max_usage=5, cash_price=100)
+        self.profile = make_profile()
+        self.client = APIClient()
+        self.client.force_authenticate(self.profile.user)
+
+    def post(self, profile):
+        return self.client.post('/api/discounts/redeem/', {'code': 'SPRING', 'profileId': profile.id}, format='json')
+
+    def test_student_redeems_for_own_profile(self):
+        response = self.post(self.profile)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['profileId'], self.profile.id)
+
+    def test_student_cannot_redeem_for_another_profile(self):
+        self.assertEqual(self.post(make_profile()).status_code, 404)
+        self.assertFalse(DiscountRedemption.objects.exists())
+        self.assertEqual(DiscountCode.objects.get(code='SPRING').usage_count, 0)
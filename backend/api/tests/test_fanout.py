@@ -0,0 +1,26 @@
+# api/tests/test_fanout.py
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api.fanout import fan_out_terms
+from api.models import Assignment, AssignmentDef
+
+from .factories import make_profile, make_term
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class FanOutTests(TestCase):
+    def setUp(self):
+        self.term = make_term()
+        self.profiles = [make_profile(term=self.term) for _ in range(3)]
+        # ساخت تعریف تکلیف در سیگنال، fan-out را پس از commit اجرا می‌کند که در TestCase رخ نمی‌دهد
+        self.assignment_def = AssignmentDef.objects.create(term=self.term, title='hw', deadline=timezone.now())
+
+    def test_counts_only_inserted_rows(self):
+        Assignment.objects.create(
+            profile=self.profiles[0], assignment_def=self.assignment_def, deadline=self.assignment_def.deadline,
+        )
+        self.assertEqual(fan_out_terms([self.term.id]), 2)
+        self.assertEqual(fan_out_terms([self.term.id]), 0)
+        self.assertEqual(Assignment.objects.filter(assignment_def=self.assignment_def).count(), 3)
@@ -0,0 +1,132 @@
+# api/tests/test_grading.py
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from api.grading import claim_submissions, held_by_other, release_submissions
+from api.models import Apollonyar, Assignment, AssignmentDef, AssignmentSubmission
+
+from .factories import make_apollonyar, make_profile, make_user
+
+
+class GradingQueueTests(TestCase):
+    def setUp(self):
+        self.first, self.second = make_apollonyar(), make_apollonyar()
+        profile = make_profile()
+        self.assignment_def = AssignmentDef.objects.create(term=profile.term, title='hw', deadline=timezone.now())
+        assignment = Assignment.objects.create(
+            profile=profile, assignment_def=self.assignment_def, deadline=self.assignment_def.deadline,
+        )
+        self.submissions = [AssignmentSubmission.objects.create(assignment=assignment) for _ in range(4)]
+        self.ids = [submission.id for submission in self.submissions]
+
+    def test_claims_oldest_first_and_hides_them_from_others(self):
+        ids, expires_at = claim_submissions(self.first, 2)
+        self.assertEqual(ids, self.ids[:2])
+        self.assertGreater(expires_at, timezone.now())
+        other_ids, _ = claim_submissions(self.second, 10)
+        self.assertEqual(other_ids, self.ids[2:])
+        self.assertEqual(claim_submissions(make_apollonyar(), 10)[0], [])
+
+    def test_reclaim_by_holder_extends_the_lease(self):
+        claim_submissions(self.first, 2)
+        AssignmentSubmission.objects.filter(id__in=self.ids[:2]).update(
+            lease_expires_at=timezone.now() + timedelta(seconds=5)
+        )
+        ids, expires_at = claim_submissions(self.first, 2)
+        self.assertEqual(ids, self.ids[:2])
+        self.assertEqual(
+            set(AssignmentSubmission.objects.filter(id__in=ids).values_list('lease_expires_at', flat=True)),
+            {expires_at},
+        )
+
+    def test_expired_lease_can_be_claimed_by_someone_else(self):
+        claim_submissions(self.first, 1)
+        AssignmentSubmission.objects.filter(id=self.ids[0]).update(
+            lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        ids, _ = claim_submissions(self.second, 1)
+        self.assertEqual(ids, [self.ids[0]])
+        self.assertEqual(AssignmentSubmission.objects.get(id=self.ids[0]).claimed_by, self.second)
+
+    def test_graded_submissions_are_not_claimable(self):
+        AssignmentSubmission.objects.filter(id=self.ids[0]).update(grade=18)
+        ids, _ = claim_submissions(self.first, 10)
+        self.assertEqual(ids, self.ids[1:])
+
+    def test_filters_by_assignment_def(self):
+        other_def = AssignmentDef.objects.create(
+            term=self.assignment_def.term, title='hw2', deadline=timezone.now(),
+        )
+        self.assertEqual(claim_submissions(self.first, 10, other_def.id)[0], [])
+        self.assertEqual(claim_submissions(self.first, 10, self.assignment_def.id)[0], self.ids)
+
+    def test_rejects_limit_out_of_range(self):
+        for limit in (0, 51):
+            with self.assertRaises(ValidationError):
+                claim_submissions(self.first, limit)
+
+    def test_only_the_holder_can_release(self):
+        claim_submissions(self.first, 2)
+        self.assertEqual(release_submissions(self.second, self.ids[:2]), 0)
+        self.assertEqual(claim_submissions(self.second, 10)[0], self.ids[2:])
+        self.assertEqual(release_submissions(self.first, self.ids[:2]), 2)
+        released = AssignmentSubmission.objects.get(id=self.ids[0])
+        self.assertIsNone(released.claimed_by)
+        self.assertIsNone(released.lease_expires_at)
+
+    def test_held_by_other(self):
+        submission = self.submissions[0]
+        now = timezone.now()
+        self.assertFalse(held_by_other(submission, self.first, now))
+        submission.claimed_by, submission.lease_expires_at = self.first, now + timedelta(minutes=1)
+        self.assertFalse(held_by_other(submission, self.first, now))
+        self.assertTrue(held_by_other(submission, self.second, now))
+        submission.lease_expires_at = now - timedelta(seconds=1)
+        self.assertFalse(held_by_other(submission, self.second, now))
+
+
+class GradeEndpointTests(TestCase):
+    def setUp(self):
+        staff = make_user(is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(staff)
+        # get_apollonyar_for_user ارزیاب کاربر را با شماره تلفن پیدا می‌کند
+        self.assessor = Apollonyar.objects.create(
+            first_name='a', last_name='b', phone_number=staff.phone_number, password='x',
+        )
+        self.other = make_apollonyar()
+        profile = make_profile()
+        assignment_def = AssignmentDef.objects.create(term=profile.term, title='hw', deadline=timezone.now())
+        assignment = Assignment.objects.create(
+            profile=profile, assignment_def=assignment_def, deadline=assignment_def.deadline,
+        )
+        self.submission = AssignmentSubmission.objects.create(assignment=assignment)
+
+    def grade(self):
+        return self.client.post(f'/api/submissions/{self.submission.id}/grade/', {'grade': 17}, format='json')
+
+    def test_conflict_while_another_assessor_holds_the_lease(self):
+        claim_submissions(self.other, 1)
+        self.assertEqual(self.grade().status_code, 409)
+        self.submission.refresh_from_db()
+        self.assertIsNone(self.submission.grade)
+
+    def test_grading_after_lease_expiry_succeeds_and_clears_the_lease(self):
+        claim_submissions(self.other, 1)
+        AssignmentSubmission.objects.filter(id=self.submission.id).update(
+            lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(self.grade().status_code, 200)
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.grade, 17)
+        self.assertEqual(self.submission.assessor_apollonyar, self.assessor)
+        self.assertIsNone(self.submission.claimed_by)
+
+    def test_holder_can_grade(self):
+        claim_submissions(self.assessor, 1)
+        self.assertEqual(self.grade().status_code, 200)
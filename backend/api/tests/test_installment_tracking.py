@@ -0,0 +1,103 @@
+# api/tests/test_installment_tracking.py
+
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.installments import tracking_queryset
+from api.models import Apollonyar, Installment
+
+from .factories import make_apollonyar, make_profile, make_user
+
+
+class TrackingQuerysetTests(TestCase):
+    today = date(2025, 3, 10)
+
+    def setUp(self):
+        self.apollonyar = make_apollonyar()
+        self.profile = make_profile(apollonyar=self.apollonyar)
+        self.late = self.installment(date(2025, 3, 1))
+        self.soon = self.installment(date(2025, 3, 15))
+        self.later = self.installment(date(2025, 4, 20))
+        self.paid_late = self.installment(date(2025, 2, 1), status='paid')
+
+    def installment(self, due_date, profile=None, **extra):
+        return Installment.objects.create(
+            profile=profile or self.profile, due_amount=500, due_date=due_date, **extra
+        )
+
+    def ids(self, **filters):
+        return set(tracking_queryset(today=self.today, **filters).values_list('id', flat=True))
+
+    def test_days_remaining_and_overdue_flag(self):
+        rows = {row.id: row for row in tracking_queryset(today=self.today)}
+        self.assertEqual(rows[self.late.id].days_remaining.days, -9)
+        self.assertEqual(rows[self.soon.id].days_remaining.days, 5)
+        self.assertTrue(rows[self.late.id].is_overdue)
+        self.assertFalse(rows[self.soon.id].is_overdue)
+        # قسط پرداخت شده حتی با سررسید گذشته معوق حساب نمی‌شود
+        self.assertFalse(rows[self.paid_late.id].is_overdue)
+
+    def test_overdue_returns_only_pending_past_due(self):
+        self.assertEqual(self.ids(overdue=True), {self.late.id})
+
+    def test_due_within_a_week(self):
+        self.assertEqual(self.ids(due_within=7), {self.soon.id})
+        self.assertEqual(self.ids(due_within=60), {self.soon.id, self.later.id})
+
+    def test_filters_by_apollonyar_and_status(self):
+        other = self.installment(date(2025, 3, 12), profile=make_profile(apollonyar=make_apollonyar()))
+        self.assertNotIn(other.id, self.ids(apollonyar_id=self.apollonyar.id))
+        self.assertEqual(len(self.ids(apollonyar_id=self.apollonyar.id)), 4)
+        self.assertEqual(self.ids(status='paid'), {self.paid_late.id})
+
+
+class TrackingEndpointTests(TestCase):
+    def setUp(self):
+        staff = make_user(is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(staff)
+        # get_apollonyar_for_user آپولون‌یار کاربر را با شماره تلفن پیدا می‌کند
+        self.mine = Apollonyar.objects.create(
+            first_name='a', last_name='b', phone_number=staff.phone_number, password='x',
+        )
+        today = timezone.localdate()
+        own, foreign = make_profile(apollonyar=self.mine), make_profile(apollonyar=make_apollonyar())
+        self.overdue = Installment.objects.create(profile=own, due_amount=500, due_date=today - timedelta(days=3))
+        self.this_week = Installment.objects.create(profile=foreign, due_amount=500, due_date=today + timedelta(days=2))
+        self.next_month = Installment.objects.create(profile=own, due_amount=500, due_date=today + timedelta(days=30))
+
+    def rows(self, **params):
+        response = self.client.get('/api/installments/tracking/', params)
+        self.assertEqual(response.status_code, 200)
+        return {row['id']: row for row in response.data['results']}
+
+    def test_all_rows_with_days_remaining(self):
+        rows = self.rows()
+        self.assertEqual(set(rows), {self.overdue.id, self.this_week.id, self.next_month.id})
+        self.assertEqual(rows[self.overdue.id]['daysRemaining'], -3)
+        self.assertTrue(rows[self.overdue.id]['isOverdue'])
+        self.assertEqual(rows[self.this_week.id]['daysRemaining'], 2)
+
+    def test_overdue_filter(self):
+        self.assertEqual(set(self.rows(overdue=1)), {self.overdue.id})
+
+    def test_due_week_filter(self):
+        self.assertEqual(set(self.rows(due='week')), {self.this_week.id})
+
+    def test_mine_filter(self):
+        self.assertEqual(set(self.rows(mine=1)), {self.overdue.id, self.next_month.id})
+
+    def test_follows_next_page(self):
+        response = self.client.get('/api/installments/tracking/', {'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        rest = self.client.get(response.data['next'])
+        ids = [row['id'] for row in response.data['results'] + rest.data['results']]
+        self.assertCountEqual(ids, [self.overdue.id, self.this_week.id, self.next_month.id])
+        self.assertIsNone(rest.data['next'])
+
+    def test_rejects_invalid_apollonyar(self):
+        response = self.client.get('/api/installments/tracking/', {'apollonyar': 'x'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,179 @@
+# api/tests/test_installments.py
+
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from api.installments import apply_installment_plans, parse_plan
+from api.models import Installment, Transaction
+
+from .factories import make_profile, make_user
+
+
+def plan_row(installment=None, **values):
+    row = {'amount': 500, 'dueDate': '2025-02-01', 'paymentStatus': 'در انتظار'}
+    if installment is not None:
+        row.update({
+            'id': f'installment_{installment.id}',
+            'amount': str(installment.due_amount),
+            'dueDate': installment.due_date.isoformat(),
+            'paymentStatus': installment.status,
+            'transactionId': installment.transaction_id,
+        })
+    row.update(values)
+    return row
+
+
+class ParsePlanTests(TestCase):
+    def test_parses_ids_labels_and_dates(self):
+        rows = parse_plan([
+            {'id': 'installment_7', 'amount': '1,200', 'dueDate': '2025/03/01', 'paymentStatus': 'پرداخت شده'},
+            {'id': 'new_1', 'amount': 300, 'dueDate': '2025-04-01', 'transactionId': '9'},
+        ])
+        self.assertEqual(rows[0]['id'], 7)
+        self.assertEqual(rows[0]['due_amount'], Decimal('1200.00'))
+        self.assertEqual(rows[0]['due_date'], date(2025, 3, 1))
+        self.assertEqual(rows[0]['status'], 'paid')
+        self.assertIsNone(rows[1]['id'])
+        self.assertEqual(rows[1]['status'], 'pending')
+        self.assertEqual(rows[1]['transaction_id'], 9)
+
+    def test_converts_jalali_dates(self):
+        rows = parse_plan([
+            {'amount': 1, 'dueDate': '1403/05/10'},
+            {'amount': 1, 'dueDate': '۱۴۰۳/۱۲/۳۰'},
+            {'amount': 1, 'dueDate': '2024/07/31'},
+        ])
+        self.assertEqual([row['due_date'] for row in rows], [date(2024, 7, 31), date(2025, 3, 20), date(2024, 7, 31)])
+
+    def test_rejects_invalid_rows(self):
+        with self.assertRaises(ValidationError):
+            parse_plan({'amount': 1})
+        with self.assertRaises(ValidationError):
+            parse_plan([{'amount': 'x', 'dueDate': '2025-01-01'}])
+        with self.assertRaises(ValidationError):
+            parse_plan([{'amount': 1, 'dueDate': 'tomorrow'}])
+        # سال‌های کمتر از ۱۷۰۰ فقط به عنوان تاریخ شمسی معتبر پذیرفته می‌شوند
+        for raw in ('1403/07/31', '1403/13/01', '0999-01-01'):
+            with self.assertRaises(ValidationError):
+                parse_plan([{'amount': 1, 'dueDate': raw}])
+
+
+class ApplyInstallmentPlansTests(TestCase):
+    def setUp(self):
+        self.profile = make_profile()
+        self.first = Installment.objects.create(profile=self.profile, due_amount=500, due_date=date(2025, 1, 1))
+        self.second = Installment.objects.create(profile=self.profile, due_amount=500, due_date=date(2025, 2, 1))
+
+    def apply(self, rows, profile=None):
+        profile = profile or self.profile
+        return apply_installment_plans({profile: parse_plan(rows)})[profile.id]
+
+    def test_unchanged_plan_writes_nothing(self):
+        before = Installment.objects.get(id=self.first.id).updated_at
+        summary = self.apply([plan_row(self.first), plan_row(self.second)])
+        self.assertEqual(summary, {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 2})
+        self.assertEqual(Installment.objects.get(id=self.first.id).updated_at, before)
+
+    def test_edited_installment_keeps_its_id(self):
+        summary = self.apply([plan_row(self.first, amount=750, paymentStatus='paid'), plan_row(self.second)])
+        self.assertEqual(summary['updated'], 1)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.due_amount, Decimal('750.00'))
+        self.assertEqual(self.first.status, 'paid')
+
+    def test_installments_missing_from_plan_are_removed(self):
+        summary = self.apply([plan_row(self.second)])
+        self.assertEqual(summary['deleted'], 1)
+        self.assertFalse(Installment.objects.filter(id=self.first.id).exists())
+
+    def test_rows_without_id_are_added(self):
+        summary = self.apply([plan_row(self.first), plan_row(self.second), plan_row(dueDate='2025-03-01')])
+        self.assertEqual(summary['created'], 1)
+        self.assertEqual(self.profile.installments.count(), 3)
+
+    def test_plans_for_several_profiles_apply_together(self):
+        other = make_profile()
+        result = apply_installment_plans({
+            self.profile: parse_plan([plan_row(self.first)]),
+            other: parse_plan([plan_row(), plan_row(dueDate='2025-03-01')]),
+        })
+        self.assertEqual(result[self.profile.id]['deleted'], 1)
+        self.assertEqual(result[other.id]['created'], 2)
+
+    def test_rejects_transaction_of_another_student(self):
+        foreign = Transaction.objects.create(
+            target_user=make_profile().user, amount=500, type='deposit', payment_method='card',
+        )
+        with self.assertRaises(ValidationError):
+            self.apply([plan_row(self.first, transactionId=foreign.id), plan_row(self.second)])
+        self.first.refresh_from_db()
+        self.assertIsNone(self.first.transaction_id)
+
+    def test_accepts_own_transaction(self):
+        own = Transaction.objects.create(
+            target_user=self.profile.user, amount=500, type='deposit', payment_method='card',
+        )
+        self.apply([plan_row(self.first, transactionId=own.id, paymentStatus='paid'), plan_row(self.second)])
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.transaction_id, own.id)
+
+    def test_rejects_installment_of_another_profile(self):
+        foreign = Installment.objects.create(profile=make_profile(), due_amount=500, due_date=date(2025, 1, 1))
+        with self.assertRaises(ValidationError):
+            self.apply([plan_row(self.first), plan_row(self.second), plan_row(foreign)])
+        foreign.refresh_from_db()
+        self.assertNotEqual(foreign.profile_id, self.profile.id)
+
+    def test_error_rolls_back_the_whole_plan(self):
+        rows = [plan_row(self.first, amount=900), plan_row(dueDate='2025-05-01')]
+        with mock.patch.object(Installment.objects, 'bulk_create', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                self.apply(rows)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.due_amount, Decimal('500.00'))
+        self.assertTrue(Installment.objects.filter(id=self.second.id).exists())
+        self.assertEqual(self.profile.installments.count(), 2)
+
+
+class BulkInstallmentsEndpointTests(TestCase):
+    def setUp(self):
+        self.profile = make_profile()
+        self.installment = Installment.objects.create(profile=self.profile, due_amount=500, due_date=date(2025, 1, 1))
+        self.client = APIClient()
+
+    def post(self, user):
+        self.client.force_authenticate(user)
+        return self.client.post('/api/profiles/bulk_installments/', {
+            'plans': [{'profileId': self.profile.id, 'installments': [plan_row(dueDate='2025-03-01')]}],
+        }, format='json')
+
+    def test_students_cannot_replace_plans(self):
+        self.assertEqual(self.post(self.profile.user).status_code, 403)
+        self.assertTrue(Installment.objects.filter(id=self.installment.id).exists())
+
+    def test_staff_replace_plans(self):
+        response = self.post(make_user(is_staff=True))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][self.profile.id], {'created': 1, 'updated': 0, 'deleted': 1, 'unchanged': 0})
+
+
+class InstallmentPlanEndpointTests(TestCase):
+    def test_returns_every_installment_beyond_the_feed_page(self):
+        profile = make_profile()
+        Installment.objects.bulk_create([
+            Installment(profile=profile, due_amount=100, due_date=date(2025, 1, 1) + timedelta(days=day))
+            for day in range(60)
+        ])
+        client = APIClient()
+        client.force_authenticate(make_user(is_staff=True))
+        feed = client.get(f'/api/profiles/{profile.id}/payments/')
+        self.assertEqual(len(feed.data['results']), 50)
+        plan = client.get(f'/api/profiles/{profile.id}/installment_plan/').data['results']
+        self.assertEqual(len(plan), 60)
+        self.assertEqual(plan[0]['dueDate'], '2025/01/01')
+        self.assertTrue(all(row['id'].startswith('installment_') for row in plan))
@@ -0,0 +1,163 @@
+# api/tests/test_ledger.py
+
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.ledger import batched_refresh, ledgers_changed, verify_ledgers
+from api.models import Installment, ProfileLedger, Transaction, UserLedger
+
+from .factories import make_profile, make_user
+
+
+class LedgerTestCase(TestCase):
+    def setUp(self):
+        self.profile = make_profile()
+        self.user = self.profile.user
+        self.today = timezone.localdate()
+
+    def installment(self, amount=500, days=10, profile=None, **extra):
+        return Installment.objects.create(
+            profile=profile or self.profile, due_amount=amount, due_date=self.today + timedelta(days=days), **extra
+        )
+
+    def profile_ledger(self, profile=None):
+        return ProfileLedger.objects.get(profile=profile or self.profile)
+
+    def user_ledger(self, user=None):
+        return UserLedger.objects.get(user=user or self.user)
+
+
+class RefreshOnSaveTests(LedgerTestCase):
+    def test_installment_changes_refresh_profile_and_user(self):
+        first = self.installment(days=-5)
+        self.installment(amount=300, days=20)
+        ledger = self.profile_ledger()
+        self.assertEqual(ledger.total_due, Decimal('800.00'))
+        self.assertEqual(ledger.overdue, Decimal('500.00'))
+        self.assertEqual(ledger.next_due_date, self.today + timedelta(days=20))
+        self.assertEqual(self.user_ledger().balance, Decimal('800.00'))
+
+        first.status = 'paid'
+        first.save()
+        ledger = self.profile_ledger()
+        self.assertEqual((ledger.paid, ledger.overdue, ledger.outstanding), (Decimal('500.00'), 0, Decimal('300.00')))
+
+    def test_moving_an_installment_refreshes_both_profiles(self):
+        moved = self.installment()
+        other = make_profile()
+        moved.profile = other
+        moved.save()
+        self.assertEqual(self.profile_ledger().total_due, 0)
+        self.assertEqual(self.profile_ledger(other).total_due, Decimal('500.00'))
+
+    def test_verified_deposit_refreshes_user_balance(self):
+        self.installment()
+        deposit = Transaction.objects.create(target_user=self.user, amount=200, type='deposit', payment_method='card')
+        self.assertEqual(self.user_ledger().deposits, 0)
+        deposit.verification_status = 'valid'
+        deposit.save()
+        ledger = self.user_ledger()
+        self.assertEqual((ledger.deposits, ledger.balance), (Decimal('200.00'), Decimal('300.00')))
+
+    def test_saves_without_ledger_fields_are_ignored(self):
+        deposit = Transaction.objects.create(target_user=self.user, amount=200, type='deposit', payment_method='card')
+        with mock.patch('api.signals.ledgers_changed') as changed:
+            deposit.save(update_fields=['receipt_variants'])
+        changed.assert_not_called()
+
+    def test_deleted_installment_refreshes_profile(self):
+        self.installment().delete()
+        self.assertEqual(self.profile_ledger().total_due, 0)
+
+
+class CascadeDeleteTests(LedgerTestCase):
+    def test_profile_delete_refreshes_only_the_user(self):
+        self.installment()
+        other = make_profile(user=self.user)
+        self.installment(amount=100, profile=other)
+        profile_id = self.profile.id
+        with mock.patch('api.signals.ledgers_changed', wraps=ledgers_changed) as changed:
+            self.profile.delete()
+        # حذف آبشاری اقساط از سیگنال قسط نادیده گرفته می‌شود و فقط خلاصه کاربر به‌روز می‌شود
+        changed.assert_called_once_with(user_ids=[self.user.id])
+        self.assertFalse(ProfileLedger.objects.filter(profile_id=profile_id).exists())
+        self.assertEqual(self.user_ledger().total_due, Decimal('100.00'))
+
+    def test_user_delete_does_not_recreate_ledgers(self):
+        self.installment()
+        Transaction.objects.create(
+            target_user=self.user, amount=200, type='deposit', payment_method='card', verification_status='valid',
+        )
+        user_id, profile_id = self.user.id, self.profile.id
+        with mock.patch('api.signals.ledgers_changed') as changed:
+            self.user.delete()
+        changed.assert_not_called()
+        self.assertFalse(UserLedger.objects.filter(user_id=user_id).exists())
+        self.assertFalse(ProfileLedger.objects.filter(profile_id=profile_id).exists())
+
+
+class BatchedRefreshTests(LedgerTestCase):
+    def test_refreshes_once_at_the_end_of_the_block(self):
+        other = make_profile()
+        with mock.patch('api.ledger.refresh_ledgers') as refresh:
+            with batched_refresh():
+                self.installment()
+                self.installment(profile=other)
+                with batched_refresh():
+                    self.installment(days=30)
+                refresh.assert_not_called()
+        refresh.assert_called_once_with({self.profile.id, other.id}, set())
+
+    def test_applies_the_collected_changes(self):
+        with batched_refresh():
+            self.installment()
+            self.installment(amount=250)
+        self.assertEqual(self.profile_ledger().total_due, Decimal('750.00'))
+
+    def test_error_in_the_block_skips_the_refresh(self):
+        with mock.patch('api.ledger.refresh_ledgers') as refresh:
+            with self.assertRaises(RuntimeError):
+                with batched_refresh():
+                    self.installment()
+                    raise RuntimeError('boom')
+        refresh.assert_not_called()
+        # بعد از خطا حالت جمع‌آوری پاک شده و تغییرات بعدی دوباره همان لحظه اعمال می‌شوند
+        self.installment()
+        self.assertEqual(self.profile_ledger().total_due, Decimal('1000.00'))
+
+
+class VerifyLedgersTests(LedgerTestCase):
+    def test_reports_and_fixes_drift(self):
+        self.installment()
+        ProfileLedger.objects.filter(profile=self.profile).update(total_due=1)
+        UserLedger.objects.filter(user=self.user).delete()
+        report = verify_ledgers()
+        [profile_drift] = [item for item in report['profiles'] if item['profile_id'] == self.profile.id]
+        stored, expected = profile_drift['fields']['total_due']
+        self.assertEqual((Decimal(stored), Decimal(expected)), (1, 500))
+        self.assertIn({'user_id': self.user.id, 'missing': True}, report['users'])
+
+        verify_ledgers(fix=True)
+        self.assertEqual(self.profile_ledger().total_due, Decimal('500.00'))
+        self.assertEqual(self.user_ledger().total_due, Decimal('500.00'))
+        self.assertEqual(verify_ledgers(), {'profiles': [], 'users': []})
+
+    def test_missing_all_zero_rows_are_not_drift(self):
+        make_user()
+        self.assertEqual(verify_ledgers(), {'profiles': [], 'users': []})
+
+
+class LedgerEndpointTests(LedgerTestCase):
+    def test_creates_missing_rows_instead_of_serving_defaults(self):
+        client = APIClient()
+        client.force_authenticate(make_user(is_staff=True))
+        self.assertFalse(ProfileLedger.objects.filter(profile=self.profile).exists())
+        response = client.get(f'/api/profiles/{self.profile.id}/ledger/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.profile_ledger().as_of, self.today)
+        self.assertTrue(UserLedger.objects.filter(user=self.user).exists())
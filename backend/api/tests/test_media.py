@@ -0,0 +1,51 @@
+# api/tests/test_media.py
+
+import os
+import shutil
+import tempfile
+
+from django.test import Client, TestCase, override_settings
+
+from api.media import can_access, clean_name
+from api.models import Transaction
+
+from .factories import make_user
+
+
+class MediaAccessTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_SENDFILE=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for name in ('receipts/x.jpg', 'user_photos/me.jpg'):
+            os.makedirs(os.path.join(self.media_root, os.path.dirname(name)), exist_ok=True)
+            with open(os.path.join(self.media_root, name), 'wb') as output:
+                output.write(b'secret')
+
+        self.owner, self.student = make_user(), make_user()
+        Transaction.objects.create(
+            target_user=self.owner, amount=100, type='deposit', payment_method='card', receipt_image='receipts/x.jpg',
+        )
+        self.client = Client()
+        self.client.force_login(self.student)
+
+    def test_clean_name(self):
+        self.assertEqual(clean_name('receipts/x.jpg'), 'receipts/x.jpg')
+        for name in ('user_photos/../receipts/x.jpg', '/receipts/x.jpg', 'user_photos/./me.jpg',
+                     'user_photos//me.jpg', 'user_photos\\..\\receipts\\x.jpg', '..', ''):
+            self.assertIsNone(clean_name(name), name)
+
+    def test_public_and_own_files(self):
+        self.assertEqual(self.client.get('/media/user_photos/me.jpg').status_code, 200)
+        self.assertEqual(self.client.get('/media/receipts/x.jpg').status_code, 403)
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get('/media/receipts/x.jpg').status_code, 200)
+
+    def test_traversal_through_a_public_folder_is_rejected(self):
+        for path in ('/media/user_photos/../receipts/x.jpg', '/media/user_photos/%2e%2e/receipts/x.jpg'):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 404, path)
+            self.assertNotIn(b'secret', b''.join(getattr(response, 'streaming_content', [response.content])))
+        self.assertFalse(can_access(self.student, 'user_photos/../receipts/x.jpg'))
@@ -0,0 +1,62 @@
+# api/tests/test_profile_stats.py
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Installment, Medal, MedalDef, Profile
+from api.profile_stats import profile_stats
+
+from .factories import make_apollonyar, make_profile, make_term, make_user
+
+
+class ProfileStatsTests(TestCase):
+    def setUp(self):
+        self.apollonyar = make_apollonyar()
+        self.term = make_term()
+        self.medal = MedalDef.objects.create(title='ستاره', description='-', icon='medal_icons/star.svg')
+        self.active = make_profile(term=self.term, apollonyar=self.apollonyar)
+        self.self_study = make_profile(term=self.term, apollonyar=self.apollonyar, type='self-study')
+        self.overdue = make_profile(term=self.term, apollonyar=self.apollonyar, status='suspended')
+        self.optout = make_profile(term=self.term, apollonyar=self.apollonyar, status='optout')
+        self.other = make_profile()
+        Installment.objects.create(
+            profile=self.overdue, due_amount=500, due_date=timezone.localdate() - timedelta(days=3),
+        )
+        for profile in (self.active, self.active, self.optout, self.other):
+            Medal.objects.create(profile=profile, medal_def=self.medal)
+
+    def test_counts_per_apollonyar_and_term(self):
+        rows = {(row['apollonyarId'], row['termId']): row for row in profile_stats(['apollonyar', 'term'])}
+        self.assertEqual(rows[(self.apollonyar.id, self.term.id)], {
+            'apollonyarId': self.apollonyar.id, 'termId': self.term.id,
+            'total': 4, 'active': 2, 'activeTermBased': 1, 'suspended': 1, 'suspendedOverdue': 1, 'optout': 1,
+            'medals': {self.medal.id: 2},
+        })
+        self.assertEqual(rows[(None, self.other.term_id)]['medals'], {self.medal.id: 1})
+
+    def test_without_group_by_returns_one_total_row(self):
+        [row] = profile_stats([])
+        self.assertEqual((row['total'], row['medals']), (5, {self.medal.id: 3}))
+        [row] = profile_stats([], Profile.objects.filter(status='active'))
+        self.assertEqual((row['total'], row['medals']), (3, {self.medal.id: 2}))
+
+    def test_endpoint_applies_the_list_filters(self):
+        client = APIClient()
+        client.force_authenticate(make_user(is_staff=True))
+        response = client.get('/api/profiles/stats/', {'group_by': 'status', 'apollonyar': self.apollonyar.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row['status']: row['total'] for row in response.data}, {'active': 2, 'suspended': 1, 'optout': 1})
+        self.assertEqual(client.get('/api/profiles/stats/', {'group_by': 'phone'}).status_code, 400)
+
+    def test_search_filter_matches_name_and_phone(self):
+        client = APIClient()
+        client.force_authenticate(make_user(is_staff=True))
+        user = self.active.user
+        user.first_name = 'Shirin'
+        user.save()
+        for search in ('shirin', 'Shirin TEST', user.phone_number):
+            response = client.get('/api/profiles/', {'search': search})
+            self.assertEqual([row['id'] for row in response.data['results']], [self.active.id], search)
@@ -0,0 +1,162 @@
+# api/tests/test_reconciliation.py
+
+import io
+from datetime import date, timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Transaction
+from api.reconciliation import (
+    check_encoding, jalali_to_gregorian, parse_statement_date, read_statement, reconcile,
+)
+
+from .factories import make_user
+
+
+def statement(*rows, header='reference,amount,date'):
+    return io.StringIO('\n'.join((header,) + rows) + '\n')
+
+
+class ReadStatementTests(TestCase):
+    def test_jalali_and_gregorian_dates(self):
+        self.assertEqual(jalali_to_gregorian(1403, 1, 1), date(2024, 3, 20))
+        self.assertEqual(jalali_to_gregorian(1403, 12, 30), date(2025, 3, 20))
+        self.assertEqual(parse_statement_date('۱۴۰۳/۰۷/۰۱ ۱۲:۳۰'), date(2024, 9, 22))
+        self.assertEqual(parse_statement_date('2024/09/22'), date(2024, 9, 22))
+        with self.assertRaises(ValueError):
+            parse_statement_date('دیروز')
+
+    def test_resolves_persian_header_aliases(self):
+        lines = statement('۱۲۳,"۱,۵۰۰",1403/07/01', header='کد پیگیری,بستانکار,تاریخ')
+        [entry] = read_statement(lines)
+        self.assertEqual(entry['reference'], '123')
+        self.assertEqual(str(entry['amount']), '1500')
+        self.assertEqual(entry['date'], date(2024, 9, 22))
+
+    def test_explicit_column_names(self):
+        lines = statement('1,credit,9', header='ref_no,credit_rial,day')
+        with self.assertRaises(ValueError):
+            list(read_statement(lines))
+        lines = statement('r1,100,2024-01-01', header='ref_no,credit_rial,day')
+        [entry] = read_statement(lines, {'reference': 'ref_no', 'amount': 'credit_rial', 'date': 'day'})
+        self.assertEqual(entry['reference'], 'r1')
+
+    def test_invalid_skipped_and_broken_lines(self):
+        oversized = 'r3,"' + 'x' * 200_000 + '",2024-01-01'
+        entries = list(read_statement(statement(
+            'r1,-5,2024-01-01', ',100,2024-01-01', 'r2', oversized, 'r4,1,2024-01-01',
+        )))
+        self.assertIn('error', entries[0])
+        self.assertTrue(entries[1]['skipped'])
+        self.assertIn('error', entries[2])
+        # ردیف خراب CSV (بزرگ‌تر از field_size_limit) فقط همان خط را نامعتبر می‌کند
+        self.assertIn('error', entries[3])
+        self.assertEqual([entry['line'] for entry in entries], [2, 3, 4, 5, 6])
+        self.assertEqual(entries[4]['reference'], 'r4')
+
+
+class ReconcileTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.today = timezone.localdate()
+
+    def deposit(self, reference, amount=100, **extra):
+        extra.setdefault('payment_method', 'card')
+        return Transaction.objects.create(
+            target_user=self.user, amount=amount, type='deposit', reference_number=reference, **extra
+        )
+
+    def line(self, reference, amount=100, days=0):
+        return f'{reference},{amount},{(self.today + timedelta(days=days)).isoformat()}'
+
+    def reasons(self, report):
+        return {row['reference']: row['reason'] for row in report['unmatched'] + report['ambiguous']}
+
+    def test_matches_and_verifies(self):
+        matched = self.deposit('r1')
+        report = reconcile(statement(self.line('r1')))
+        self.assertEqual((report['matched'], report['verified']), (1, 1))
+        matched.refresh_from_db()
+        self.assertEqual(matched.verification_status, 'valid')
+        self.assertEqual(matched.notes.count(), 1)
+
+    def test_dry_run_verifies_nothing(self):
+        pending = self.deposit('r1')
+        report = reconcile(statement(self.line('r1')), apply=False)
+        self.assertEqual((report['matched'], report['verified']), (1, 0))
+        pending.refresh_from_db()
+        self.assertEqual(pending.verification_status, 'pending')
+
+    def test_unmatched_reasons(self):
+        self.deposit('amount', amount=200)
+        self.deposit('late')
+        self.deposit('done', verification_status='valid')
+        self.deposit('gateway', payment_method='gateway')
+        report = reconcile(statement(
+            self.line('amount'), self.line('late', days=10), self.line('done'), self.line('missing'), self.line('gateway'),
+        ))
+        self.assertEqual(self.reasons(report), {
+            'amount': 'amount_mismatch', 'late': 'date_out_of_window', 'done': 'already_verified',
+            'missing': 'not_found', 'gateway': 'not_found',
+        })
+        self.assertEqual(report['verified'], 0)
+
+    def test_two_free_transactions_are_ambiguous(self):
+        first, second = self.deposit('r1'), self.deposit('r1')
+        report = reconcile(statement(self.line('r1')))
+        self.assertEqual(report['matched'], 0)
+        [row] = report['ambiguous']
+        self.assertEqual(row['reason'], 'multiple_transactions')
+        self.assertCountEqual(row['transactions'], [first.id, second.id])
+
+    def test_each_transaction_is_claimed_by_one_line(self):
+        self.deposit('r1')
+        report = reconcile(statement(self.line('r1'), self.line('r1')))
+        self.assertEqual(report['matched'], 1)
+        [row] = report['unmatched']
+        self.assertEqual((row['line'], row['reason'], row['matchedLine']), (3, 'duplicate_line', 2))
+
+    def test_duplicate_lines_pick_the_remaining_transaction(self):
+        self.deposit('r1')
+        self.deposit('r1', amount=150)
+        report = reconcile(statement(self.line('r1'), self.line('r1', amount=150)))
+        self.assertEqual(report['verified'], 2)
+
+
+class ReconcileEndpointTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(make_user(is_staff=True))
+        self.pending = Transaction.objects.create(
+            target_user=make_user(), amount=100, type='deposit', payment_method='card', reference_number='r1',
+        )
+
+    def upload(self, content):
+        return self.client.post('/api/transactions/reconcile/', {
+            'file': SimpleUploadedFile('statement.csv', content, content_type='text/csv'),
+        }, format='multipart')
+
+    def test_verifies_uploaded_statement(self):
+        day = timezone.localdate().isoformat()
+        response = self.upload(f'reference,amount,date\nr1,100,{day}\n'.encode())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['verified'], 1)
+
+    def test_bad_encoding_is_rejected_before_anything_is_verified(self):
+        day = timezone.localdate().isoformat()
+        valid = ''.join(f'x{number},1,{day}\n' for number in range(1500))
+        content = f'reference,amount,date\nr1,100,{day}\n{valid}'.encode() + 'مبلغ'.encode('cp1256') + b',1,x\n'
+        response = self.upload(content)
+        self.assertEqual(response.status_code, 400)
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.verification_status, 'pending')
+
+    def test_check_encoding_rewinds_the_stream(self):
+        stream = io.BytesIO('\ufeffreference'.encode())
+        check_encoding(stream, block_size=4)
+        self.assertEqual(stream.tell(), 0)
+        with self.assertRaises(ValueError):
+            check_encoding(io.BytesIO(b'ok\xff'))
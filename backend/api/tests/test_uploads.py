@@ -0,0 +1,125 @@
+# api/tests/test_uploads.py
+
+import hashlib
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from api.models import Assignment, AssignmentDef, AssignmentDefTemplate
+from api.uploads import create_session, finalize_submission
+
+from .factories import make_profile, make_user
+
+
+class UploadTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, UPLOAD_STAGING_DIR=f'{self.media_root}/staging',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        profile = make_profile()
+        self.owner = profile.user
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        assignment_def = AssignmentDef.objects.create(term=profile.term, title='hw', deadline=timezone.now())
+        self.template = AssignmentDefTemplate.objects.create(
+            assignment_def=assignment_def, title='t', file='assignment_templates/t.pdf',
+        )
+        self.assignment = Assignment.objects.create(
+            profile=profile, assignment_def=assignment_def, deadline=assignment_def.deadline,
+        )
+        self.content = b'0123456789' * 3
+
+    def start(self, **extra):
+        return create_session(
+            self.owner, self.assignment, self.template, 'song.mp3',
+            total_size=len(self.content), chunk_size=10, **extra,
+        )
+
+    def put(self, session, index, body, checksum=None):
+        headers = {'HTTP_X_CHUNK_SHA256': checksum} if checksum else {}
+        return self.client.put(
+            f'/api/uploads/{session.id}/chunks/{index}/', data=body,
+            content_type='application/octet-stream', **headers,
+        )
+
+    def upload_all(self, session):
+        for index in range(session.total_chunks):
+            self.assertEqual(self.put(session, index, self.content[index * 10:(index + 1) * 10]).status_code, 200)
+
+    def test_complete_upload_assembles_the_file(self):
+        session = self.start(sha256=hashlib.sha256(self.content).hexdigest())
+        self.upload_all(session)
+        response = self.client.post(f'/api/uploads/{session.id}/complete/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'assembled')
+        session.refresh_from_db()
+        with session.file.open('rb') as assembled:
+            self.assertEqual(assembled.read(), self.content)
+
+    def test_rejects_chunk_of_wrong_size(self):
+        session = self.start()
+        self.assertEqual(self.put(session, 0, b'short').status_code, 400)
+        self.assertEqual(self.put(session, 0, b'x' * 11).status_code, 400)
+        self.assertEqual(session.chunks.count(), 0)
+
+    def test_rejects_empty_body(self):
+        session = self.start()
+        self.assertEqual(self.put(session, 0, b'').status_code, 400)
+
+    def test_rejects_checksum_mismatch(self):
+        session = self.start()
+        self.assertEqual(self.put(session, 0, self.content[:10], checksum='0' * 64).status_code, 400)
+        digest = hashlib.sha256(self.content[:10]).hexdigest()
+        self.assertEqual(self.put(session, 0, self.content[:10], checksum=digest).status_code, 200)
+
+    def test_rejects_index_out_of_range(self):
+        session = self.start()
+        self.assertEqual(self.put(session, 3, self.content[:10]).status_code, 400)
+
+    def test_complete_reports_missing_chunks(self):
+        session = self.start()
+        self.put(session, 1, self.content[10:20])
+        response = self.client.post(f'/api/uploads/{session.id}/complete/')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['missingChunks'], [0, 2])
+
+    def test_complete_rejects_whole_file_checksum_mismatch(self):
+        session = self.start(sha256='0' * 64)
+        self.upload_all(session)
+        self.assertEqual(self.client.post(f'/api/uploads/{session.id}/complete/').status_code, 400)
+
+    def test_finalize_creates_submission_from_assembled_sessions(self):
+        session = self.start()
+        self.upload_all(session)
+        self.client.post(f'/api/uploads/{session.id}/complete/')
+        submission = finalize_submission(self.assignment, self.owner, [session.id])
+        self.assertEqual(submission.files.count(), 1)
+        session.refresh_from_db()
+        self.assertEqual(session.status, 'submitted')
+
+    def test_finalize_rejects_unassembled_session(self):
+        session = self.start()
+        with self.assertRaises(ValidationError):
+            finalize_submission(self.assignment, self.owner, [session.id])
+
+    def test_finalize_rejects_foreign_session(self):
+        session = self.start()
+        self.upload_all(session)
+        self.client.post(f'/api/uploads/{session.id}/complete/')
+        with self.assertRaises(ValidationError):
+            finalize_submission(self.assignment, make_user(), [session.id])
+        other = make_profile(term=self.assignment.profile.term)
+        other_assignment = Assignment.objects.create(
+            profile=other, assignment_def=self.assignment.assignment_def, deadline=self.assignment.deadline,
+        )
+        with self.assertRaises(ValidationError):
+            finalize_submission(other_assignment, self.owner, [session.id])
@@ -0,0 +1,172 @@
+# api/transcoding.py
+
+import json
+import mimetypes
+import subprocess
+
+from django.conf import settings
+
+from .models import AssignmentSubmissionFile
+from .storage import blob_storage, derivative_name
+from .tasks import run_in_background, run_in_process
+
+
+# نمونه‌برداری صوت برای محاسبه waveform (مونو، 16 بیتی)
+WAVEFORM_SAMPLE_RATE = 8000
+# هر پنجره 50 میلی‌ثانیه یک peak می‌دهد؛ در پایان به حداکثر WAVEFORM_POINTS نقطه کاهش می‌یابد
+WAVEFORM_WINDOW = WAVEFORM_SAMPLE_RATE // 20
+WAVEFORM_POINTS = 1000
+PCM_BLOCK_SIZE = WAVEFORM_WINDOW * 2 * 256
+
+
+def media_kind(name):
+    """'audio'، 'video' یا None بر اساس پسوند فایل."""
+    content_type, _ = mimetypes.guess_type(name)
+    if content_type and content_type.split('/')[0] in ('audio', 'video'):
+        return content_type.split('/')[0]
+    return None
+
+
+# === توابع اجرا شونده در pool پروسه‌ها (بدون دسترسی به ORM) ===
+
+def compute_peaks(pcm_stream, points=WAVEFORM_POINTS):
+    """
+    محاسبه peak های waveform از stream صوت PCM مونو 16 بیتی به صورت بلوک به بلوک.
+    خروجی: (لیست peak های نرمال شده بین 0 و 1، مدت به ثانیه)
+    """
+    import numpy as np
+
+    window_peaks = []
+    carry = np.empty(0, dtype=np.int16)
+    total_samples = 0
+    leftover = b''
+    while True:
+        block = pcm_stream.read(PCM_BLOCK_SIZE)
+        if not block:
+            break
+        block = leftover + block
+        usable = len(block) - len(block) % 2
+        leftover = block[usable:]
+        samples = np.concatenate([carry, np.frombuffer(block[:usable], dtype='<i2')])
+        total_samples += usable // 2
+        full = len(samples) - len(samples) % WAVEFORM_WINDOW
+        if full:
+            windows = np.abs(samples[:full].astype(np.int32)).reshape(-1, WAVEFORM_WINDOW)
+            window_peaks.append(windows.max(axis=1))
+        carry = samples[full:]
+    if len(carry):
+        window_peaks.append(np.array([np.abs(carry.astype(np.int32)).max()]))
+
+    if not window_peaks:
+        return [], 0.0
+    peaks = np.concatenate(window_peaks)
+    if len(peaks) > points:
+        # کاهش به تعداد نقاط ثابت با بیشینه هر بازه
+        edges = np.linspace(0, len(peaks), points, endpoint=False).astype(np.int64)
+        peaks = np.maximum.reduceat(peaks, edges)
+    peaks = peaks / 32768.0
+    return [round(float(peak), 3) for peak in peaks], total_samples / WAVEFORM_SAMPLE_RATE
+
+
+def render_media(source_path, preview_path, waveform_path, kind, ffmpeg='ffmpeg'):
+    """
+    ساخت نسخه پیش‌نمایش فشرده و فایل JSON waveform برای یک فایل صوتی/تصویری.
+    خروجی مدت فایل به ثانیه است.
+    """
+    if kind == 'video':
+        preview_args = [
+            '-vf', 'scale=-2:min(480\\,ih)', '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '28',
+            '-c:a', 'aac', '-b:a', '96k', '-movflags', '+faststart',
+        ]
+    else:
+        preview_args = ['-vn', '-ac', '1', '-c:a', 'aac', '-b:a', '96k', '-movflags', '+faststart']
+    subprocess.run(
+        [ffmpeg, '-nostdin', '-v', 'error', '-y', '-i', source_path, *preview_args, preview_path],
+        check=True, capture_output=True,
+    )
+
+    # صوت به صورت PCM خام از stdout خوانده می‌شود و هیچ‌وقت کامل در حافظه نیست
+    decoder = subprocess.Popen(
+        [ffmpeg, '-nostdin', '-v', 'error', '-i', source_path, '-vn', '-ac', '1',
+         '-ar', str(WAVEFORM_SAMPLE_RATE), '-f', 's16le', '-'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    try:
+        peaks, duration = compute_peaks(decoder.stdout)
+    finally:
+        decoder.stdout.close()
+        decoder.wait()
+
+    with open(waveform_path, 'w') as out:
+        json.dump({'sampleRate': WAVEFORM_SAMPLE_RATE, 'duration': duration, 'peaks': peaks}, out)
+    return duration
+
+
+# === هماهنگ‌کننده (در worker پس‌زمینه api.tasks اجرا می‌شود) ===
+
+def process_submission_file(file_id):
+    """
+    ساخت پیش‌نمایش و waveform یک فایل ارسالی در pool پروسه‌ها و ثبت نتیجه روی ردیف آن.
+    فقط storage محلی (مبتنی بر FileSystemStorage) پشتیبانی می‌شود چون ffmpeg به مسیر فایل نیاز دارد.
+    """
+    submission_file = AssignmentSubmissionFile.objects.filter(id=file_id).first()
+    if submission_file is None:
+        return
+    kind = media_kind(submission_file.file.name)
+    if kind is None:
+        AssignmentSubmissionFile.objects.filter(id=file_id).update(media_status='skipped')
+        return
+    AssignmentSubmissionFile.objects.filter(id=file_id).update(media_status='processing', media_error='')
+
+    storage = blob_storage()
+    name = submission_file.file.name
+    preview_name = derivative_name(name, 'preview.mp4' if kind == 'video' else 'preview.m4a')
+    waveform_name = derivative_name(name, 'waveform.json')
+    # فایل‌های تکراری در storage محتوا-محور یک نام دارند؛ مشتق‌های ساخته شده قبلی دوباره استفاده می‌شوند
+    if storage.exists(preview_name) and storage.exists(waveform_name):
+        with storage.open(waveform_name, 'r') as waveform:
+            duration = json.load(waveform)['duration']
+        AssignmentSubmissionFile.objects.filter(id=file_id).update(
+            media_status='ready', preview=preview_name, waveform=waveform_name, duration=duration,
+        )
+        return
+
+    try:
+        duration = run_in_process(
+            render_media,
+            storage.path(name),
+            storage.path(preview_name),
+            storage.path(waveform_name),
+            kind,
+            getattr(settings, 'FFMPEG_BINARY', 'ffmpeg'),
+        )
+    except Exception as e:
+        error = e.stderr.decode(errors='replace')[-1000:] if isinstance(e, subprocess.CalledProcessError) and e.stderr else str(e)
+        for derived in (preview_name, waveform_name):
+            if storage.exists(derived):
+                storage.delete(derived)
+        AssignmentSubmissionFile.objects.filter(id=file_id).update(media_status='failed', media_error=error)
+        return
+
+    AssignmentSubmissionFile.objects.filter(id=file_id).update(
+        media_status='ready', preview=preview_name, waveform=waveform_name, duration=duration,
+    )
+
+
+def schedule_media_processing(file_ids):
+    """ثبت پردازش فایل‌ها در صف پس‌زمینه پس از commit تراکنش جاری."""
+    for file_id in file_ids:
+        run_in_background(process_submission_file, file_id)
+
+
+def pending_media_ids(include_failed=False):
+    statuses = ['pending', 'failed'] if include_failed else ['pending']
+    return list(AssignmentSubmissionFile.objects.filter(media_status__in=statuses).values_list('id', flat=True))
+
+
+def process_pending(include_failed=False):
+    """پردازش همزمان (بدون صف) همه فایل‌های در انتظار؛ برای فرمان مدیریتی."""
+    ids = pending_media_ids(include_failed)
+    for file_id in ids:
+        process_submission_file(file_id)
+    return len(ids)
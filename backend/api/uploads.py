@@ -0,0 +1,204 @@
+# api/uploads.py
+
+import hashlib
+import math
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from rest_framework.exceptions import ValidationError
+
+from .models import AssignmentSubmission, AssignmentSubmissionFile, UploadChunk, UploadSession
+from .storage import add_references, blob_extension
+from .transcoding import schedule_media_processing
+
+
+# حجم هر بار خواندن از بدنه درخواست یا فایل تکه؛ هیچ‌وقت کل تکه یا فایل در حافظه نگه داشته نمی‌شود
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+def staging_dir(session):
+    return Path(settings.UPLOAD_STAGING_DIR) / str(session.id)
+
+
+def chunk_path(session, index):
+    return staging_dir(session) / f'{index}.part'
+
+
+def expected_chunk_size(session, index):
+    if index == session.total_chunks - 1:
+        return session.total_size - session.chunk_size * (session.total_chunks - 1)
+    return session.chunk_size
+
+
+def create_session(owner, assignment, template, filename, total_size, chunk_size, sha256='', description=None):
+    """ایجاد جلسه آپلود پس از بررسی حجم فایل و تکه‌ها."""
+    if template.assignment_def_id != assignment.assignment_def_id:
+        raise ValidationError({'templateId': 'فایل الگو متعلق به این تکلیف نیست'})
+    if not 0 < total_size <= settings.UPLOAD_MAX_FILE_SIZE:
+        raise ValidationError({'size': 'حجم فایل نامعتبر است'})
+    if not 0 < chunk_size <= settings.UPLOAD_MAX_CHUNK_SIZE:
+        raise ValidationError({'chunkSize': f'حجم هر تکه باید حداکثر {settings.UPLOAD_MAX_CHUNK_SIZE} بایت باشد'})
+    return UploadSession.objects.create(
+        owner=owner,
+        assignment=assignment,
+        template=template,
+        description=description,
+        filename=get_valid_filename(os.path.basename(filename)) or 'upload',
+        total_size=total_size,
+        chunk_size=chunk_size,
+        total_chunks=math.ceil(total_size / chunk_size),
+        sha256=(sha256 or '').lower(),
+        expires_at=timezone.now() + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS),
+    )
+
+
+def receive_chunk(session, index, stream, checksum):
+    """
+    ذخیره یک تکه از stream بدنه درخواست به صورت بلوک به بلوک و بررسی حجم و sha256 آن.
+    ارسال دوباره یک تکه (مثلاً پس از قطع شدن اتصال) تکه قبلی را جایگزین می‌کند.
+    """
+    if session.status != 'open':
+        raise ValidationError({'error': 'این جلسه آپلود بسته شده است'})
+    if not 0 <= index < session.total_chunks:
+        raise ValidationError({'index': 'شماره تکه نامعتبر است'})
+    expected = expected_chunk_size(session, index)
+    if stream is None:
+        # DRF برای بدنه خالی (Content-Length: 0) به جای stream مقدار None می‌دهد
+        raise ValidationError({'error': f'حجم تکه {index} باید {expected} بایت باشد'})
+
+    directory = staging_dir(session)
+    directory.mkdir(parents=True, exist_ok=True)
+    hasher = hashlib.sha256()
+    size = 0
+    fd, tmp_name = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                block = stream.read(min(STREAM_BLOCK_SIZE, expected + 1 - size))
+                if not block:
+                    break
+                size += len(block)
+                if size > expected:
+                    break
+                hasher.update(block)
+                out.write(block)
+        if size != expected:
+            raise ValidationError({'error': f'حجم تکه {index} باید {expected} بایت باشد'})
+        digest = hasher.hexdigest()
+        if checksum and checksum.lower() != digest:
+            raise ValidationError({'error': f'checksum تکه {index} مطابقت ندارد'})
+        os.replace(tmp_name, chunk_path(session, index))
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+
+    UploadChunk.objects.update_or_create(session=session, index=index, defaults={'size': size, 'sha256': digest})
+    return digest
+
+
+def received_indexes(session):
+    return list(session.chunks.order_by('index').values_list('index', flat=True))
+
+
+def assemble(session):
+    """
+    سرهم کردن تکه‌ها به ترتیب، بررسی sha256 کل فایل (در صورت اعلام) و ذخیره در storage.
+    فقط وقتی همه تکه‌ها رسیده باشند انجام می‌شود. خروجی: لیست تکه‌های جا مانده (خالی یعنی موفق).
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status != 'open':
+            return []
+        missing = sorted(set(range(session.total_chunks)) - set(received_indexes(session)))
+        if missing:
+            return missing
+
+        # ابتدا فقط checksum کل فایل از روی تکه‌ها محاسبه می‌شود؛ اگر همین محتوا قبلاً ذخیره شده باشد
+        # فایل دوباره نوشته نمی‌شود (storage محتوا-محور)
+        hasher = hashlib.sha256()
+        for index in range(session.total_chunks):
+            with open(chunk_path(session, index), 'rb') as part:
+                while True:
+                    block = part.read(STREAM_BLOCK_SIZE)
+                    if not block:
+                        break
+                    hasher.update(block)
+        if session.sha256 and session.sha256 != hasher.hexdigest():
+            raise ValidationError({'error': 'checksum فایل کامل مطابقت ندارد'})
+
+        storage = session.file.storage
+        existing = storage.reuse(hasher.hexdigest(), blob_extension(session.filename))
+        if existing:
+            session.file.name = existing
+        else:
+            with tempfile.TemporaryFile(dir=staging_dir(session)) as assembled:
+                for index in range(session.total_chunks):
+                    with open(chunk_path(session, index), 'rb') as part:
+                        shutil.copyfileobj(part, assembled, STREAM_BLOCK_SIZE)
+                assembled.seek(0)
+                session.file.save(session.filename, File(assembled), save=False)
+
+        session.sha256 = hasher.hexdigest()
+        session.status = 'assembled'
+        session.save(update_fields=['file', 'sha256', 'status', 'updated_at'])
+        session.chunks.all().delete()
+    shutil.rmtree(staging_dir(session), ignore_errors=True)
+    return []
+
+
+def finalize_submission(assignment, owner, session_ids):
+    """
+    ساخت AssignmentSubmission از فایل‌های سرهم شده چند جلسه آپلود.
+    اگر حتی یکی از فایل‌ها هنوز کامل نشده باشد ارسال ثبت نمی‌شود.
+    """
+    with transaction.atomic():
+        sessions = list(UploadSession.objects.select_for_update().filter(id__in=session_ids, owner=owner))
+        if len(sessions) != len(set(session_ids)):
+            raise ValidationError({'uploadIds': 'برخی از جلسه‌های آپلود یافت نشدند'})
+        for session in sessions:
+            if session.assignment_id != assignment.id:
+                raise ValidationError({'uploadIds': 'جلسه آپلود متعلق به این تکلیف نیست'})
+            if session.status != 'assembled':
+                raise ValidationError({'uploadIds': f'آپلود فایل {session.filename} کامل نشده است'})
+
+        submission = AssignmentSubmission.objects.create(assignment=assignment)
+        files = AssignmentSubmissionFile.objects.bulk_create([
+            AssignmentSubmissionFile(
+                submission=submission,
+                template_id=session.template_id,
+                file=session.file.name,
+                description=session.description,
+            )
+            for session in sessions
+        ])
+        # bulk_create سیگنال post_save را اجرا نمی‌کند؛ ارجاع فایل‌ها و پردازش رسانه صریحاً ثبت می‌شوند
+        add_references([submission_file.file.name for submission_file in files])
+        schedule_media_processing([submission_file.id for submission_file in files])
+        UploadSession.objects.filter(id__in=[session.id for session in sessions]).update(
+            status='submitted', updated_at=timezone.now()
+        )
+    return submission
+
+
+def purge_expired_sessions(now=None):
+    """
+    حذف جلسه‌های منقضی شده‌ای که به ارسال تبدیل نشده‌اند به همراه تکه‌های آن‌ها در پوشه staging.
+    ارجاع فایل سرهم شده با حذف جلسه آزاد می‌شود و خود فایل (اگر ارجاع دیگری نداشته باشد) توسط gc_blobs حذف می‌شود.
+    """
+    now = now or timezone.now()
+    expired = UploadSession.objects.filter(status__in=['open', 'assembled'], expires_at__lt=now)
+    count = 0
+    for session in expired.iterator():
+        shutil.rmtree(staging_dir(session), ignore_errors=True)
+        count += 1
+    expired.delete()
+    return count
@@ -6,7 +6,7 @@ from .views import (
     CourseViewSet, TermViewSet, ApollonyarViewSet, GroupViewSet, MedalDefViewSet,
     DiscountCodeViewSet, AssignmentDefViewSet, CallDefViewSet, ProfileViewSet,
     AssignmentViewSet, AssignmentSubmissionViewSet, TransactionViewSet, InstallmentViewSet,
-    CallViewSet, LogViewSet
+    CallViewSet, LogViewSet, UploadSessionViewSet
 )
 from rest_framework_simplejwt.views import (
     TokenRefreshView,
@@ -30,6 +30,7 @@ router.register(r'transactions', TransactionViewSet, basename='transaction')
 router.register(r'installments', InstallmentViewSet, basename='installment')
 router.register(r'calls', CallViewSet, basename='call')
 router.register(r'logs', LogViewSet, basename='log')
+router.register(r'uploads', UploadSessionViewSet, basename='upload')
 
 
 urlpatterns = [
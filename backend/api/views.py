@@ -1,28 +1,60 @@
 # api/views.py
 
+import io
 import random
+from datetime import date
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from django.views.decorators.http import require_safe
 from django.utils import timezone
 from rest_framework import generics, status, viewsets, permissions
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from .serializers import (
     MyTokenObtainPairSerializer, OTPRequestSerializer, OTPVerifySerializer,
     UserRegistrationSerializer, CourseSerializer, TermSerializer,
     ApollonyarSerializer, GroupSerializer, MedalDefSerializer, DiscountCodeSerializer,
-    AssignmentDefSerializer, CallDefSerializer, ProfileSerializer,
-    AssignmentSerializer, CallSerializer, NoteSerializer,
+    AssignmentDefSerializer, CallDefSerializer, ProfileSerializer, ProfileListSerializer,
+    MedalSerializer,
+    AssignmentSerializer, AssignmentSubmissionSerializer, CallSerializer, NoteSerializer,
     CallCreateSerializer, NoteCreateSerializer,
     AssignmentSubmissionCreateSerializer, AssignmentGradeSerializer,
-    TransactionSerializer, InstallmentSerializer
+    TransactionSerializer, InstallmentSerializer, InstallmentTrackingSerializer, LogSerializer, ReviewQueueSerializer,
+    ProfileLedgerSerializer, UserLedgerSerializer, parse_field_list
     )
 from .models import (
     User, OTPCode, Course, Term, Apollonyar, Group,
     MedalDef, DiscountCode, AssignmentDef, CallDef, Profile,
-    Assignment, AssignmentSubmission, Transaction, Installment, Call, Log
+    Assignment, AssignmentSubmission, Transaction, Installment, Call, Log, Medal,
+    AssignmentDefTemplate, UploadSession, ProfileLedger, UserLedger
     )
+from .filters import ProfileFilterBackend, PROFILE_FILTER_PARAMS, filter_profiles
+from .pagination import (
+    ProfileCursorPagination, LogCursorPagination, PaymentsFeedPagination, ReviewQueuePagination,
+    CallWorklistPagination, InstallmentTrackingPagination
+)
+from .payments import build_payments_feed, installment_plan_rows, serialize_payment
+from .installments import parse_plan, apply_installment_plans, tracking_queryset
+from .bulk import PROFILE_OPERATIONS, bulk_change_profiles
+from .discounts import redeem
+from .deadlines import parse_shift, shift_deadlines
+from .grading import claim_submissions, release_submissions, held_by_other
+from .uploads import create_session, receive_chunk, received_indexes, assemble, finalize_submission
+from .exports import ZipRenderer, archive_name, stream_submissions_zip
+from .media import SERVED_PREFIXES, can_access, clean_name, request_user, serve_media
+from .storage import verify_signature
+from .tasks import run_parallel
+from .worklist import worklist_for
+from .call_stats import GROUP_FIELDS, call_stats
+from .profile_stats import PROFILE_GROUP_FIELDS, profile_stats
+from .reconciliation import MATCH_WINDOW_DAYS, check_encoding, reconcile
+from .ledger import refresh_ledgers
 
 class UserRegistrationView(generics.CreateAPIView):
     """
@@ -70,17 +102,65 @@ def get_apollonyar_for_user(user):
     from .models import Apollonyar
     return Apollonyar.objects.first()
 
-def log_action(apollonyar, action, description=""):
+def log_action(apollonyar, action, description="", profile=None, action_code='', actor=None):
     """
     ثبت یک اقدام در جدول لاگ
+    profile و action_code مرجع ساختاریافته لاگ هستند تا تاریخچه هر هنرجو از ایندکس (profile, timestamp) خوانده شود
     """
     from .models import Log
-    Log.objects.create(
+    return Log.objects.create(
         action=action,
+        action_code=action_code,
+        profile=profile,
         issuer_apollonyar=apollonyar,
+        actor=actor,
         description=description
     )
 
+def shift_deadlines_response(request, assignment_defs, label):
+    """بخش مشترک اکشن‌های جابجایی مهلت ترم و تعریف تکلیف."""
+    delta, exclude_groups, exclude_profiles = parse_shift(request.data)
+    updated, students = shift_deadlines(
+        assignment_defs, delta,
+        exclude_group_ids=exclude_groups,
+        exclude_profile_ids=exclude_profiles,
+        label=label,
+        reason=request.data.get('reason', ''),
+        apollonyar=get_apollonyar_for_user(request.user),
+        actor=request.user,
+    )
+    return Response({
+        'message': 'مهلت تکالیف با موفقیت جابجا شد',
+        'updatedAssignments': updated,
+        'students': students,
+    }, status=status.HTTP_200_OK)
+
+class SparseFieldsetMixin:
+    """
+    پارامترهای ?fields= و ?expand= را به سریالایزر و setup_eager_loading آن می‌رساند
+    تا ستون‌های درخواست نشده نه محاسبه شوند و نه روابط آن‌ها join شوند.
+    فقط روی درخواست‌های خواندنی اعمال می‌شود.
+    """
+
+    def get_sparse_fieldset(self):
+        if self.request is None or self.request.method not in permissions.SAFE_METHODS:
+            return None, None
+        if getattr(self, 'action', None) not in ('list', 'retrieve'):
+            return None, None
+        params = self.request.query_params
+        return parse_field_list(params.get('fields')), parse_field_list(params.get('expand'))
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields, expand = self.get_sparse_fieldset()
+        return self.get_serializer_class().setup_eager_loading(queryset, fields=fields, expand=expand)
+
+    def get_serializer(self, *args, **kwargs):
+        fields, expand = self.get_sparse_fieldset()
+        kwargs.setdefault('fields', fields)
+        kwargs.setdefault('expand', expand)
+        return super().get_serializer(*args, **kwargs)
+
 class OTPRequestView(generics.GenericAPIView):
     """
     یک کد OTP برای شماره تلفن داده شده ایجاد و (فعلا) در کنسول چاپ می‌کند.
@@ -187,6 +267,17 @@ class TermViewSet(viewsets.ModelViewSet):
     serializer_class = TermSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    # === جابجایی مهلت همه تکالیف ترم ===
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def shift_deadlines(self, request, pk=None):
+        """
+        جابجایی مهلت همه تکالیف یک ترم با یک UPDATE.
+        آدرس: POST /api/terms/{id}/shift_deadlines/
+        بدنه: {"days": 3, "hours": 0, "excludeGroupIds": [], "excludeProfileIds": [], "reason": ""}
+        """
+        term = self.get_object()
+        return shift_deadlines_response(request, AssignmentDef.objects.filter(term=term), f"ترم {term.name}")
+
 class ApollonyarViewSet(viewsets.ModelViewSet):
     """API برای مدیریت آپولون‌یارها"""
     queryset = Apollonyar.objects.all()
@@ -211,25 +302,149 @@ class DiscountCodeViewSet(viewsets.ModelViewSet):
     serializer_class = DiscountCodeSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @action(detail=False, methods=['post'])
+    def redeem(self, request):
+        """
+        استفاده از کد تخفیف برای یک پروفایل.
+        آدرس: POST /api/discounts/redeem/
+        بدنه: {"code": "...", "profileId": 1, "kind": "cash" | "installment"}
+        هنرجو فقط برای پروفایل‌های خودش می‌تواند از کد استفاده کند.
+        """
+        try:
+            profile_id = int(request.data.get('profileId'))
+        except (TypeError, ValueError):
+            return Response({'error': 'profileId نامعتبر است'}, status=status.HTTP_400_BAD_REQUEST)
+        profiles = Profile.objects.all() if request.user.is_staff else Profile.objects.filter(user=request.user)
+        profile = profiles.filter(id=profile_id).first()
+        if profile is None:
+            return Response({'error': 'پروفایل پیدا نشد'}, status=status.HTTP_404_NOT_FOUND)
+        redemption = redeem(
+            request.data.get('code'), profile, kind=request.data.get('kind') or 'cash', redeemed_by=request.user,
+        )
+        return Response({
+            'id': redemption.id,
+            'code': redemption.discount_code.code,
+            'profileId': profile.id,
+            'kind': redemption.kind,
+            'amount': float(redemption.amount) if redemption.amount is not None else None,
+        }, status=status.HTTP_201_CREATED)
+
 class AssignmentDefViewSet(viewsets.ModelViewSet):
     """API برای مدیریت تعاریف تکالیف"""
     queryset = AssignmentDef.objects.all()
     serializer_class = AssignmentDefSerializer
     permission_classes = [permissions.IsAdminUser]
 
+    # === جابجایی مهلت تکالیف یک تعریف ===
+    @action(detail=True, methods=['post'])
+    def shift_deadline(self, request, pk=None):
+        """
+        جابجایی مهلت تکالیف ساخته شده از این تعریف برای همه هنرجویان (به جز استثناها).
+        آدرس: POST /api/assignment-defs/{id}/shift_deadline/
+        """
+        assignment_def = self.get_object()
+        return shift_deadlines_response(request, AssignmentDef.objects.filter(id=assignment_def.id), assignment_def.title)
+
+    # === دانلود همه فایل‌های ارسالی به صورت ZIP ===
+    @action(detail=True, methods=['get'], url_path='submissions.zip', url_name='submissions-zip',
+            renderer_classes=[JSONRenderer, ZipRenderer])
+    def submissions_zip(self, request, pk=None):
+        """
+        آرشیو ZIP همه فایل‌های ارسالی هنرجویان برای این تعریف تکلیف (برای نمره‌دهی آفلاین).
+        آدرس: GET /api/assignment-defs/{id}/submissions.zip/
+        آرشیو همزمان با ارسال پاسخ ساخته می‌شود و ارسال آن بلافاصله شروع می‌شود.
+        """
+        assignment_def = self.get_object()
+        response = StreamingHttpResponse(stream_submissions_zip(assignment_def), content_type='application/zip')
+        response['Content-Disposition'] = content_disposition_header(True, archive_name(assignment_def))
+        return response
+
 class CallDefViewSet(viewsets.ModelViewSet):
     """API برای مدیریت تعاریف تماس‌ها"""
     queryset = CallDef.objects.all()
     serializer_class = CallDefSerializer
     permission_classes = [permissions.IsAdminUser]
 
-class ProfileViewSet(viewsets.ModelViewSet):
+class ProfileViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """API برای مشاهده و مدیریت پروفایل هنرجویان"""
-    queryset = Profile.objects.select_related(
-        'user', 'course', 'term', 'group', 'apollonyar', 'sales_representative'
-    ).all()
+    queryset = Profile.objects.all()
     serializer_class = ProfileSerializer
     permission_classes = [permissions.IsAuthenticated] # تغییر: هر کاربر احراز هویت شده دسترسی دارد
+    # لیست پروفایل‌ها با cursor روی (created_at, id) صفحه‌بندی و سمت سرور فیلتر می‌شود
+    # مثال: /api/profiles/?status=active&term=3&ordering=-created_at&cursor=...
+    pagination_class = ProfileCursorPagination
+    filter_backends = [ProfileFilterBackend]
+
+    def get_serializer_class(self):
+        # لیست بدون لاگ‌ها سریالایز می‌شود؛ جزئیات فقط لاگ‌های همین هنرجو را دارد
+        if self.action == 'list':
+            return ProfileListSerializer
+        return ProfileSerializer
+
+    # === نمای کامل هنرجو در یک درخواست ===
+    @action(detail=True, methods=['get'])
+    def overview(self, request, pk=None):
+        """
+        پروفایل به همراه برش محدودی از تکالیف، تماس‌ها، یادداشت‌ها، مدال‌ها و پرداخت‌ها.
+        آدرس: /api/profiles/{id}/overview/?limit=10
+        هر برش حداکثر limit ردیف دارد و hasMore نشان می‌دهد که باید بقیه را از endpoint اختصاصی خواند.
+        تعداد کوئری‌ها ثابت است و در صورت فعال بودن PROFILE_OVERVIEW_PARALLEL برش‌ها همزمان خوانده می‌شوند.
+        """
+        profile = self.get_object()
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+        except ValueError:
+            return Response({'error': 'limit باید عدد باشد'}, status=status.HTTP_400_BAD_REQUEST)
+
+        def bounded(queryset, serializer_class):
+            rows = list(queryset[:limit + 1])
+            return {
+                'results': serializer_class(rows[:limit], many=True).data,
+                'hasMore': len(rows) > limit,
+            }
+
+        jobs = {
+            'assignments': lambda: bounded(
+                AssignmentSerializer.setup_eager_loading(profile.assignments.order_by('deadline', 'id')),
+                AssignmentSerializer,
+            ),
+            'calls': lambda: bounded(
+                CallSerializer.setup_eager_loading(profile.calls.order_by('-call_timestamp', '-id')),
+                CallSerializer,
+            ),
+            'notes': lambda: bounded(
+                profile.general_notes.select_related('author_apollonyar').order_by('-timestamp', '-id'),
+                NoteSerializer,
+            ),
+            'medals': lambda: bounded(
+                Medal.objects.filter(profile=profile).select_related('medal_def', 'giver_apollonyar').order_by('-timestamp', '-id'),
+                MedalSerializer,
+            ),
+            'payments': lambda: build_payments_feed(profile, limit=limit),
+        }
+        if getattr(settings, 'PROFILE_OVERVIEW_PARALLEL', False):
+            slices = run_parallel(jobs)
+        else:
+            slices = {name: job() for name, job in jobs.items()}
+
+        return Response({
+            'profile': self.get_serializer(profile).data,
+            **slices,
+        })
+
+    # === تاریخچه اقدامات هنرجو ===
+    @action(detail=True, methods=['get'])
+    def logs(self, request, pk=None):
+        """
+        دریافت تاریخچه اقدامات ثبت شده برای یک پروفایل خاص (صفحه‌بندی cursor).
+        آدرس: /api/profiles/{id}/logs/?cursor=...
+        """
+        profile = self.get_object()
+        logs = Log.objects.filter(profile=profile).select_related('issuer_apollonyar')
+        paginator = LogCursorPagination()
+        page = paginator.paginate_queryset(logs, request, view=self)
+        serializer = LogSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     # === اکشن جدید برای دریافت تکالیف ===
     @action(detail=True, methods=['get'])
@@ -239,7 +454,9 @@ class ProfileViewSet(viewsets.ModelViewSet):
         این اکشن در آدرس /api/profiles/{id}/assignments/ در دسترس خواهد بود.
         """
         profile = self.get_object() # پروفایل مورد نظر را بر اساس id پیدا می‌کند
-        assignments = profile.assignments.all().order_by('deadline') # تمام تکالیف مرتبط با این پروفایل
+        assignments = AssignmentSerializer.setup_eager_loading(
+            profile.assignments.all().order_by('deadline') # تمام تکالیف مرتبط با این پروفایل
+        )
         serializer = AssignmentSerializer(assignments, many=True)
         return Response(serializer.data)
 
@@ -251,7 +468,9 @@ class ProfileViewSet(viewsets.ModelViewSet):
         آدرس: /api/profiles/{id}/calls/
         """
         profile = self.get_object()
-        calls = profile.calls.all().order_by('-call_timestamp') # تماس‌های مرتبط، مرتب‌شده بر اساس جدیدترین
+        calls = CallSerializer.setup_eager_loading(
+            profile.calls.all().order_by('-call_timestamp') # تماس‌های مرتبط، مرتب‌شده بر اساس جدیدترین
+        )
         serializer = CallSerializer(calls, many=True)
         return Response(serializer.data)
 
@@ -287,7 +506,10 @@ class ProfileViewSet(viewsets.ModelViewSet):
             log_action(
                 caller_apollonyar,
                 "ثبت تماس",
-                f"تماس {call_type} برای هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) ثبت شد"
+                f"تماس {call_type} برای هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) ثبت شد",
+                profile=profile,
+                action_code='call_logged',
+                actor=request.user
             )
             
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -312,7 +534,10 @@ class ProfileViewSet(viewsets.ModelViewSet):
             log_action(
                 author_apollonyar,
                 "افزودن یادداشت",
-                f"یادداشت جدید برای هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) اضافه شد"
+                f"یادداشت جدید برای هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) اضافه شد",
+                profile=profile,
+                action_code='note_added',
+                actor=request.user
             )
             
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -322,50 +547,42 @@ class ProfileViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def payments(self, request, pk=None):
         """
-        دریافت لیست اقساط و تراکنش‌های یک پروفایل خاص.
-        آدرس: /api/profiles/{id}/payments/
+        دریافت لیست اقساط و تراکنش‌های یک پروفایل خاص (جدیدترین اول، صفحه‌بندی شده).
+        آدرس: /api/profiles/{id}/payments/?page_size=50&cursor=...
+        فید با یک کوئری UNION ALL در دیتابیس مرتب و محدود می‌شود.
         """
         profile = self.get_object()
-        installments = profile.installments.all().order_by('due_date')
-        transactions = Transaction.objects.filter(target_user=profile.user).order_by('-timestamp')
-        
-        # ترکیب اقساط و تراکنش‌ها برای نمایش در یک لیست
-        payments_data = []
-        
-        # اضافه کردن اقساط
-        for installment in installments:
-            payment_data = {
-                'id': f"installment_{installment.id}",
-                'type': 'قسط',
-                'amount': float(installment.due_amount),
-                'date': installment.due_date.strftime('%Y/%m/%d'),
-                'method': 'قسط',
-                'status': installment.get_status_display(),
-                'paymentStatus': installment.get_status_display(),
-                'transactionId': installment.transaction.id if installment.transaction else None,
-                'dueDate': installment.due_date.strftime('%Y/%m/%d')
-            }
-            payments_data.append(payment_data)
-        
-        # اضافه کردن تراکنش‌ها
-        for transaction in transactions:
-            payment_data = {
-                'id': f"transaction_{transaction.id}",
-                'type': transaction.get_type_display(),
-                'amount': float(transaction.amount),
-                'date': transaction.timestamp.strftime('%Y/%m/%d'),
-                'method': transaction.get_payment_method_display(),
-                'status': transaction.get_verification_status_display(),
-                'paymentStatus': transaction.get_verification_status_display(),
-                'transactionId': transaction.id,
-                'dueDate': None
-            }
-            payments_data.append(payment_data)
-        
-        # مرتب‌سازی بر اساس تاریخ
-        payments_data.sort(key=lambda x: x['date'], reverse=True)
-        
-        return Response(payments_data)
+        paginator = PaymentsFeedPagination()
+        rows = paginator.paginate_feed(profile, request)
+        return paginator.get_paginated_response([serialize_payment(row) for row in rows])
+
+    @action(detail=True, methods=['get'])
+    def installment_plan(self, request, pk=None):
+        """
+        همه اقساط یک پروفایل (بدون صفحه‌بندی، به ترتیب سررسید) برای فرم ویرایش اقساط.
+        آدرس: /api/profiles/{id}/installment_plan/
+        """
+        return Response({'results': installment_plan_rows(self.get_object())})
+
+    @action(detail=True, methods=['get'])
+    def ledger(self, request, pk=None):
+        """
+        خلاصه مالی پروفایل و هنرجوی آن (جمع اقساط، پرداخت شده، سررسید گذشته، سررسید بعدی و مانده حساب).
+        آدرس: /api/profiles/{id}/ledger/
+        مقادیر از جدول خلاصه خوانده می‌شوند و با هر تغییر اقساط و تراکنش‌ها به‌روز می‌شوند.
+        """
+        profile = self.get_object()
+        profile_ledger = ProfileLedger.objects.filter(profile=profile).first()
+        user_ledger = UserLedger.objects.filter(user_id=profile.user_id).first()
+        if profile_ledger is None or user_ledger is None:
+            # پروفایل یا هنرجوی ساخته شده بعد از مهاجرت که هنوز قسط یا تراکنشی ندارد؛ ردیف خلاصه همین حالا محاسبه می‌شود
+            refresh_ledgers(profile_ids=[profile.id], user_ids=[profile.user_id])
+            profile_ledger = ProfileLedger.objects.get(profile=profile)
+            user_ledger = UserLedger.objects.get(user_id=profile.user_id)
+        return Response({
+            'profile': ProfileLedgerSerializer(profile_ledger).data,
+            'user': UserLedgerSerializer(user_ledger).data,
+        })
 
     # === اکشن جدید برای به‌روزرسانی اقساط ===
     @action(detail=True, methods=['patch'])
@@ -373,28 +590,57 @@ class ProfileViewSet(viewsets.ModelViewSet):
         """
         به‌روزرسانی اقساط یک پروفایل خاص.
         آدرس: PATCH /api/profiles/{id}/update_installments/
+        اقساط بر اساس شناسه با وضعیت فعلی مقایسه می‌شوند و فقط ردیف‌های تغییر کرده نوشته می‌شوند.
         """
         profile = self.get_object()
-        installments_data = request.data.get('installments', [])
-        total_course_fee = request.data.get('totalCourseFee', 0)
-        
+        plan = parse_plan(request.data.get('installments', []))
+        summary = apply_installment_plans({profile: plan})
+        return Response({'message': 'اقساط با موفقیت به‌روزرسانی شد', **summary[profile.id]}, status=status.HTTP_200_OK)
+
+    # === به‌روزرسانی گروهی اقساط چند پروفایل ===
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def bulk_installments(self, request):
+        """
+        اعمال برنامه اقساط چند پروفایل در یک تراکنش.
+        آدرس: POST /api/profiles/bulk_installments/
+        بدنه: {"plans": [{"profileId": 1, "installments": [...]}, ...]}
+        """
+        plans = request.data.get('plans')
+        if not isinstance(plans, list) or not plans:
+            return Response({'error': 'plans الزامی است'}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            # حذف اقساط قبلی
-            profile.installments.all().delete()
-            
-            # ایجاد اقساط جدید
-            for installment_data in installments_data:
-                Installment.objects.create(
-                    profile=profile,
-                    due_amount=installment_data.get('amount', 0),
-                    due_date=installment_data.get('dueDate'),
-                    status=installment_data.get('paymentStatus', 'pending').lower().replace(' ', '_'),
-                    transaction_id=installment_data.get('transactionId') if installment_data.get('transactionId') else None
-                )
-            
-            return Response({'message': 'اقساط با موفقیت به‌روزرسانی شد'}, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            profile_ids = [int(plan['profileId']) for plan in plans]
+        except (KeyError, TypeError, ValueError):
+            return Response({'error': 'profileId نامعتبر است'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(set(profile_ids)) != len(profile_ids):
+            return Response({'error': 'هر پروفایل فقط یک بار می‌تواند در plans بیاید'}, status=status.HTTP_400_BAD_REQUEST)
+
+        profiles = Profile.objects.only('id', 'user_id').in_bulk(profile_ids)
+        missing = [profile_id for profile_id in profile_ids if profile_id not in profiles]
+        if missing:
+            return Response({'error': f"پروفایل‌های یافت نشده: {missing}"}, status=status.HTTP_404_NOT_FOUND)
+
+        summary = apply_installment_plans({
+            profiles[profile_id]: parse_plan(plan.get('installments', []))
+            for profile_id, plan in zip(profile_ids, plans)
+        })
+        return Response({'results': summary}, status=status.HTTP_200_OK)
+
+    # === آمار پروفایل‌ها (شمارش سمت سرور به جای دریافت کل لیست) ===
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """
+        تعداد پروفایل‌ها به تفکیک ستون‌های group_by (apollonyar, term, course, group, status, type)
+        همراه با تعداد دارندگان هر مدال. همان فیلترهای لیست پروفایل‌ها را می‌پذیرد.
+        آدرس: GET /api/profiles/stats/?group_by=apollonyar,term&status=active
+        """
+        params = request.query_params
+        group_by = [name.strip() for name in params.get('group_by', '').split(',') if name.strip()]
+        unknown = [name for name in group_by if name not in PROFILE_GROUP_FIELDS]
+        if unknown:
+            return Response({'error': f"ستون گروه‌بندی نامعتبر: {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+        profiles = filter_profiles(self.get_queryset(), params)
+        return Response(profile_stats(group_by, profiles))
 
     # === اکشن جدید برای اضافه کردن مدال ===
     @action(detail=True, methods=['post'])
@@ -429,7 +675,10 @@ class ProfileViewSet(viewsets.ModelViewSet):
                 log_action(
                     giver_apollonyar,
                     "اعطای مدال",
-                    f"مدال {medal_def.title} به هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) اعطا شد"
+                    f"مدال {medal_def.title} به هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) اعطا شد",
+                    profile=profile,
+                    action_code='medal_awarded',
+                    actor=request.user
                 )
                 
                 return Response({'message': 'مدال با موفقیت اضافه شد'}, status=status.HTTP_201_CREATED)
@@ -463,7 +712,10 @@ class ProfileViewSet(viewsets.ModelViewSet):
             log_action(
                 apollonyar,
                 "حذف مدال",
-                f"مدال {medal.medal_def.title} از هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) حذف شد"
+                f"مدال {medal.medal_def.title} از هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) حذف شد",
+                profile=profile,
+                action_code='medal_removed',
+                actor=request.user
             )
             
             medal.delete()
@@ -495,7 +747,10 @@ class ProfileViewSet(viewsets.ModelViewSet):
             log_action(
                 apollonyar,
                 "حذف یادداشت",
-                f"یادداشت از هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) حذف شد"
+                f"یادداشت از هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) حذف شد",
+                profile=profile,
+                action_code='note_removed',
+                actor=request.user
             )
             
             note.delete()
@@ -525,7 +780,7 @@ class ProfileViewSet(viewsets.ModelViewSet):
             
             # تغییر ترم
             profile.term = term
-            profile.save()
+            profile.save(update_fields=['term', 'updated_at'])
             
             # ثبت لاگ
             apollonyar = get_apollonyar_for_user(request.user)
@@ -535,7 +790,10 @@ class ProfileViewSet(viewsets.ModelViewSet):
             log_action(
                 apollonyar,
                 "تغییر ترم",
-                f"ترم هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) از {old_term_name} به {new_term_name} تغییر یافت"
+                f"ترم هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) از {old_term_name} به {new_term_name} تغییر یافت",
+                profile=profile,
+                action_code='term_changed',
+                actor=request.user
             )
             
             return Response({'message': 'ترم با موفقیت تغییر یافت'}, status=status.HTTP_200_OK)
@@ -564,7 +822,7 @@ class ProfileViewSet(viewsets.ModelViewSet):
             
             # تغییر آپولون‌یار
             profile.apollonyar = apollonyar
-            profile.save()
+            profile.save(update_fields=['apollonyar', 'updated_at'])
             
             # ثبت لاگ
             current_apollonyar = get_apollonyar_for_user(request.user)
@@ -574,7 +832,10 @@ class ProfileViewSet(viewsets.ModelViewSet):
             log_action(
                 current_apollonyar,
                 "تغییر آپولون‌یار",
-                f"آپولون‌یار هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) از {old_apollonyar_name} به {new_apollonyar_name} تغییر یافت"
+                f"آپولون‌یار هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) از {old_apollonyar_name} به {new_apollonyar_name} تغییر یافت",
+                profile=profile,
+                action_code='apollonyar_changed',
+                actor=request.user
             )
             
             return Response({'message': 'آپولون‌یار با موفقیت تغییر یافت'}, status=status.HTTP_200_OK)
@@ -609,7 +870,7 @@ class ProfileViewSet(viewsets.ModelViewSet):
         try:
             old_type = profile.get_type_display()
             profile.type = type_map[student_type]
-            profile.save()
+            profile.save(update_fields=['type', 'updated_at'])
             
             # ثبت لاگ
             apollonyar = get_apollonyar_for_user(request.user)
@@ -617,7 +878,10 @@ class ProfileViewSet(viewsets.ModelViewSet):
             log_action(
                 apollonyar,
                 "تغییر نوع هنرجو",
-                f"نوع هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) از {old_type} به {student_type} تغییر یافت"
+                f"نوع هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) از {old_type} به {student_type} تغییر یافت",
+                profile=profile,
+                action_code='type_changed',
+                actor=request.user
             )
             
             return Response({'message': 'نوع با موفقیت تغییر یافت'}, status=status.HTTP_200_OK)
@@ -651,7 +915,7 @@ class ProfileViewSet(viewsets.ModelViewSet):
         try:
             old_status = profile.get_status_display()
             profile.status = status_map[new_status]
-            profile.save()
+            profile.save(update_fields=['status', 'updated_at'])
             
             # ثبت لاگ
             apollonyar = get_apollonyar_for_user(request.user)
@@ -659,26 +923,65 @@ class ProfileViewSet(viewsets.ModelViewSet):
             log_action(
                 apollonyar,
                 "تغییر وضعیت هنرجو",
-                f"وضعیت هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) از {old_status} به {new_status} تغییر یافت"
+                f"وضعیت هنرجو {student_name} ({profile.user.phone_number if profile.user else 'نامشخص'}) از {old_status} به {new_status} تغییر یافت",
+                profile=profile,
+                action_code='status_changed',
+                actor=request.user
             )
             
             return Response({'message': 'وضعیت با موفقیت تغییر یافت'}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    # === تغییر گروهی وضعیت، نوع، ترم یا آپولون‌یار ===
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def bulk_change(self, request):
+        """
+        اعمال یک تغییر روی چند پروفایل در یک تراکنش (یک UPDATE و یک bulk_create برای لاگ‌ها).
+        آدرس: POST /api/profiles/bulk_change/
+        بدنه: {"operation": "status|type|term|apollonyar", "value": ..., "profileIds": [...]}
+        به جای profileIds می‌توان "filter" با همان پارامترهای فیلتر لیست پروفایل‌ها فرستاد (مثلاً {"group": 3}).
+        """
+        operation = request.data.get('operation')
+        if operation not in PROFILE_OPERATIONS:
+            return Response({'error': f"operation باید یکی از {', '.join(PROFILE_OPERATIONS)} باشد"}, status=status.HTTP_400_BAD_REQUEST)
+        if request.data.get('value') in (None, ''):
+            return Response({'error': 'value الزامی است'}, status=status.HTTP_400_BAD_REQUEST)
+
+        profile_ids = request.data.get('profileIds')
+        filters = request.data.get('filter')
+        if profile_ids:
+            try:
+                queryset = Profile.objects.filter(id__in=[int(profile_id) for profile_id in profile_ids])
+            except (TypeError, ValueError):
+                return Response({'error': 'profileIds باید لیستی از اعداد باشد'}, status=status.HTTP_400_BAD_REQUEST)
+        elif isinstance(filters, dict) and any(filters.get(name) not in (None, '') for name in PROFILE_FILTER_PARAMS):
+            # بدون فیلتر معتبر، تغییر روی همه پروفایل‌ها اعمال نمی‌شود
+            queryset = filter_profiles(Profile.objects.all(), {
+                name: str(value) for name, value in filters.items() if value not in (None, '')
+            })
+        else:
+            return Response({'error': 'profileIds یا filter الزامی است'}, status=status.HTTP_400_BAD_REQUEST)
+
+        changed = bulk_change_profiles(
+            queryset, operation, request.data['value'],
+            apollonyar=get_apollonyar_for_user(request.user),
+            actor=request.user,
+        )
+        return Response({'updated': len(changed), 'profileIds': changed}, status=status.HTTP_200_OK)
+
 class LogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet برای مشاهده لاگ اقدامات
     """
-    from .serializers import LogSerializer
     queryset = Log.objects.all().order_by('-timestamp')
     serializer_class = LogSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Log.objects.all().order_by('-timestamp')
+        return Log.objects.select_related('issuer_apollonyar').order_by('-timestamp')
 
-class AssignmentViewSet(viewsets.ReadOnlyModelViewSet):
+class AssignmentViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     API برای مشاهده تکالیف.
     فقط خواندنی است چون تکالیف به صورت خودکار برای هنرجویان ساخته می‌شوند.
@@ -688,14 +991,43 @@ class AssignmentViewSet(viewsets.ReadOnlyModelViewSet):
     # در فاز بعدی دسترسی‌ها را دقیق‌تر می‌کنیم (فقط هنرجوی مربوطه یا ادمین)
     permission_classes = [permissions.IsAuthenticated]
 
+    # === صف بررسی ارسال‌های نمره‌نخورده ===
+    @action(detail=False, methods=['get'], url_path='review-queue')
+    def review_queue(self, request):
+        """
+        لیست ارسال‌های نمره‌نخورده از قدیمی‌ترین به جدیدترین (صفحه‌بندی cursor).
+        آدرس: GET /api/assignments/review-queue/?apollonyar=&assignment_def=
+        """
+        queryset = AssignmentSubmission.objects.filter(grade__isnull=True)
+        for param, column in (('apollonyar', 'assignment__profile__apollonyar_id'), ('assignment_def', 'assignment__assignment_def_id')):
+            raw = request.query_params.get(param)
+            if raw:
+                try:
+                    queryset = queryset.filter(**{column: int(raw)})
+                except ValueError:
+                    return Response({'error': f'{param} باید عدد باشد'}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = ReviewQueuePagination()
+        page = paginator.paginate_queryset(ReviewQueueSerializer.setup_eager_loading(queryset), request, view=self)
+        return paginator.get_paginated_response(ReviewQueueSerializer(page, many=True).data)
+
     # اکشن سفارشی برای ارسال یک تکلیف جدید
     @action(detail=True, methods=['post'])
     def submit(self, request, pk=None):
         """
         ایجاد یک Submission جدید برای یک تکلیف خاص.
         آدرس: POST /api/assignments/{id}/submit/
+        فایل‌ها یا به صورت multipart در همین درخواست، یا با {"uploadIds": [...]} از جلسه‌های آپلود کامل شده ارسال می‌شوند.
         """
         assignment = self.get_object()
+        # فایل‌هایی که قبلاً با آپلود تکه‌تکه (/api/uploads/) کامل شده‌اند
+        if 'uploadIds' in request.data:
+            upload_ids = request.data.get('uploadIds')
+            if not isinstance(upload_ids, list) or not upload_ids:
+                return Response({'error': 'uploadIds باید لیستی از شناسه‌های آپلود باشد'}, status=status.HTTP_400_BAD_REQUEST)
+            submission = finalize_submission(assignment, request.user, upload_ids)
+            return Response(AssignmentSubmissionSerializer(submission).data, status=status.HTTP_201_CREATED)
+
         serializer = AssignmentSubmissionCreateSerializer(data=request.data)
         if serializer.is_valid():
             # assignment را به صورت خودکار به داده‌های سریالایزر اضافه می‌کنیم
@@ -738,7 +1070,10 @@ class AssignmentViewSet(viewsets.ReadOnlyModelViewSet):
             log_action(
                 apollonyar,
                 "تغییر مهلت تکلیف",
-                f"مهلت تکلیف {assignment_title} هنرجو {student_name} ({assignment.profile.user.phone_number if assignment.profile.user else 'نامشخص'}) از {old_date_str} به {new_date_str} تغییر یافت"
+                f"مهلت تکلیف {assignment_title} هنرجو {student_name} ({assignment.profile.user.phone_number if assignment.profile.user else 'نامشخص'}) از {old_date_str} به {new_date_str} تغییر یافت",
+                profile=assignment.profile,
+                action_code='deadline_changed',
+                actor=request.user
             )
             
             return Response({'message': 'مهلت تکلیف با موفقیت به‌روزرسانی شد'}, status=status.HTTP_200_OK)
@@ -759,20 +1094,133 @@ class AssignmentSubmissionViewSet(viewsets.GenericViewSet):
         """
         ثبت نمره و بازخورد برای یک Submission.
         آدرس: POST /api/submissions/{id}/grade/
+        اگر ارسال در صف نمره‌دهی توسط ارزیاب دیگری برداشته شده باشد خطای 409 برمی‌گردد؛ ثبت نمره lease را آزاد می‌کند.
         """
-        submission = self.get_object()
-        serializer = AssignmentGradeSerializer(instance=submission, data=request.data)
-        if serializer.is_valid():
-            serializer.save(
-                assessor_apollonyar=request.user.apollonyar, # فرض می‌کنیم آپولون‌یار لاگین کرده
-                assessment_timestamp=timezone.now()
-            )
-            return Response(serializer.data)
+        assessor = get_apollonyar_for_user(request.user)
+        with transaction.atomic():
+            submission = self.get_object()
+            submission = AssignmentSubmission.objects.select_for_update().get(pk=submission.pk)
+            if held_by_other(submission, assessor):
+                return Response({'error': 'این ارسال در حال بررسی توسط ارزیاب دیگری است'}, status=status.HTTP_409_CONFLICT)
+            serializer = AssignmentGradeSerializer(instance=submission, data=request.data)
+            if serializer.is_valid():
+                serializer.save(
+                    assessor_apollonyar=assessor,
+                    assessment_timestamp=timezone.now(),
+                    claimed_by=None,
+                    lease_expires_at=None,
+                )
+                return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class TransactionViewSet(viewsets.ModelViewSet):
+    # === صف نمره‌دهی ===
+    @action(detail=False, methods=['post'])
+    def claim(self, request):
+        """
+        برداشتن چند ارسال نمره‌نخورده (قدیمی‌ترین اول) برای ارزیاب فعلی با lease زمان‌دار.
+        آدرس: POST /api/submissions/claim/
+        بدنه: {"limit": 5, "assignmentDefId": null}
+        """
+        try:
+            limit = int(request.data.get('limit', 5))
+            assignment_def_id = int(request.data['assignmentDefId']) if request.data.get('assignmentDefId') else None
+        except (TypeError, ValueError):
+            return Response({'error': 'limit و assignmentDefId باید عدد باشند'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids, expires_at = claim_submissions(get_apollonyar_for_user(request.user), limit, assignment_def_id)
+        submissions = ReviewQueueSerializer.setup_eager_loading(
+            AssignmentSubmission.objects.filter(id__in=ids).order_by('submission_timestamp', 'id')
+        )
+        return Response({
+            'leaseExpiresAt': expires_at,
+            'results': ReviewQueueSerializer(submissions, many=True).data,
+        })
+
+    @action(detail=False, methods=['post'])
+    def release(self, request):
+        """
+        برگرداندن ارسال‌های برداشته شده به صف بدون ثبت نمره.
+        آدرس: POST /api/submissions/release/
+        بدنه: {"submissionIds": [...]}
+        """
+        try:
+            ids = [int(submission_id) for submission_id in request.data.get('submissionIds') or []]
+        except (TypeError, ValueError):
+            return Response({'error': 'submissionIds باید لیستی از اعداد باشد'}, status=status.HTTP_400_BAD_REQUEST)
+        released = release_submissions(get_apollonyar_for_user(request.user), ids)
+        return Response({'released': released})
+
+class UploadSessionViewSet(viewsets.GenericViewSet):
+    """
+    آپلود تکه‌تکه و قابل ادامه فایل‌های ارسالی تکالیف.
+    1. POST /api/uploads/ {assignmentId, templateId, filename, size, chunkSize, sha256?, description?}
+    2. PUT /api/uploads/{id}/chunks/{index}/ با بدنه خام تکه و هدر X-Chunk-Sha256
+    3. GET /api/uploads/{id}/ برای دیدن تکه‌های رسیده و ادامه آپلود پس از قطع اتصال
+    4. POST /api/uploads/{id}/complete/ برای سرهم کردن فایل
+    5. POST /api/assignments/{id}/submit/ {uploadIds: [...]} برای ثبت ارسال
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(owner=self.request.user)
+
+    def session_data(self, session):
+        return {
+            'id': session.id,
+            'status': session.status,
+            'filename': session.filename,
+            'size': session.total_size,
+            'chunkSize': session.chunk_size,
+            'totalChunks': session.total_chunks,
+            'receivedChunks': received_indexes(session) if session.status == 'open' else list(range(session.total_chunks)),
+            'sha256': session.sha256 or None,
+            'expiresAt': session.expires_at,
+        }
+
+    def create(self, request):
+        try:
+            assignment = Assignment.objects.get(id=request.data.get('assignmentId'))
+            template = AssignmentDefTemplate.objects.get(id=request.data.get('templateId'))
+            total_size = int(request.data.get('size'))
+            chunk_size = int(request.data.get('chunkSize') or settings.UPLOAD_MAX_CHUNK_SIZE)
+        except (Assignment.DoesNotExist, AssignmentDefTemplate.DoesNotExist, ValueError, TypeError):
+            return Response({'error': 'assignmentId, templateId و size معتبر الزامی است'}, status=status.HTTP_400_BAD_REQUEST)
+        if not request.data.get('filename'):
+            return Response({'error': 'filename الزامی است'}, status=status.HTTP_400_BAD_REQUEST)
+
+        session = create_session(
+            request.user, assignment, template,
+            filename=request.data['filename'],
+            total_size=total_size,
+            chunk_size=chunk_size,
+            sha256=request.data.get('sha256', ''),
+            description=request.data.get('description'),
+        )
+        return Response(self.session_data(session), status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        return Response(self.session_data(self.get_object()))
+
+    @action(detail=True, methods=['put'], url_path=r'chunks/(?P<index>\d+)')
+    def chunk(self, request, pk=None, index=None):
+        """دریافت یک تکه؛ بدنه درخواست مستقیماً و بلوک به بلوک روی دیسک نوشته می‌شود."""
+        session = self.get_object()
+        digest = receive_chunk(session, int(index), request.stream, request.headers.get('X-Chunk-Sha256', ''))
+        return Response({'index': int(index), 'sha256': digest})
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """سرهم کردن فایل پس از رسیدن همه تکه‌ها."""
+        session = self.get_object()
+        missing = assemble(session)
+        if missing:
+            return Response({'error': 'همه تکه‌ها نرسیده‌اند', 'missingChunks': missing}, status=status.HTTP_409_CONFLICT)
+        session.refresh_from_db()
+        return Response(self.session_data(session))
+
+class TransactionViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """API برای مدیریت تراکنش‌ها."""
-    queryset = Transaction.objects.select_related('target_user').prefetch_related('notes__author_apollonyar').all()
+    queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated] # تغییر: هر کاربر احراز هویت شده دسترسی دارد
 
@@ -797,18 +1245,139 @@ class TransactionViewSet(viewsets.ModelViewSet):
         
         return Response(TransactionSerializer(transaction).data)
 
-class InstallmentViewSet(viewsets.ModelViewSet):
+    # === تطبیق گروهی با صورت‌حساب بانکی ===
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def reconcile(self, request):
+        """
+        تطبیق فایل CSV صورت‌حساب بانکی با تراکنش‌های کارت به کارت و پایای در انتظار و تایید گروهی آن‌ها.
+        آدرس: POST /api/transactions/reconcile/ (multipart: file، dryRun، windowDays، referenceColumn، amountColumn، dateColumn)
+        خروجی: {lines, matched, verified, skipped, unmatched: [...], ambiguous: [...], invalid: [...]}
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'فایل صورت‌حساب ارسال نشده است'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            window_days = int(request.data.get('windowDays') or MATCH_WINDOW_DAYS)
+        except ValueError:
+            return Response({'error': 'windowDays باید عدد باشد'}, status=status.HTTP_400_BAD_REQUEST)
+        columns = {
+            'reference': request.data.get('referenceColumn'),
+            'amount': request.data.get('amountColumn'),
+            'date': request.data.get('dateColumn'),
+        }
+        stream = upload.open('rb')
+        try:
+            check_encoding(stream)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        lines = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        try:
+            report = reconcile(
+                lines,
+                apply=request.data.get('dryRun') not in ('1', 'true', True),
+                window_days=window_days,
+                columns=columns,
+                author=get_apollonyar_for_user(request.user),
+            )
+        except ValueError as error:
+            # فقط خطاهای سطر عنوان و تنظیمات به اینجا می‌رسند؛ خطای هر خط در گزارش (invalid) می‌آید
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        finally:
+            lines.detach()
+        return Response(report)
+
+class InstallmentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """API برای مدیریت اقساط."""
-    queryset = Installment.objects.select_related(
-        'profile__user', 'profile__course', 'transaction'
-    ).all()
+    queryset = Installment.objects.all()
     serializer_class = InstallmentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class CallViewSet(viewsets.ReadOnlyModelViewSet):
+    # === لیست پیگیری اقساط ===
+    @action(detail=False, methods=['get'])
+    def tracking(self, request):
+        """
+        ردیف‌های تخت صفحه پیگیری اقساط (صفحه‌بندی cursor، بدون کوئری جداگانه برای هر ردیف).
+        فیلترها: overdue=1، due=week، status، apollonyar (شناسه) و mine=1 برای آپولون‌یار کاربر جاری.
+        آدرس: GET /api/installments/tracking/?overdue=1
+        """
+        params = request.query_params
+        apollonyar_id = params.get('apollonyar')
+        if params.get('mine') in ('1', 'true'):
+            apollonyar_id = get_apollonyar_for_user(request.user).id
+        elif apollonyar_id is not None and not apollonyar_id.isdigit():
+            return Response({'error': 'شناسه آپولون‌یار نامعتبر است'}, status=status.HTTP_400_BAD_REQUEST)
+        installments = tracking_queryset(
+            overdue=params.get('overdue') in ('1', 'true'),
+            due_within=7 if params.get('due') == 'week' else None,
+            apollonyar_id=apollonyar_id,
+            status=params.get('status'),
+        )
+        paginator = InstallmentTrackingPagination()
+        page = paginator.paginate_queryset(installments, request, view=self)
+        return paginator.get_paginated_response(InstallmentTrackingSerializer(page, many=True).data)
+
+class CallViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """API برای مشاهده تماس‌ها."""
-    queryset = Call.objects.select_related(
-        'profile__user', 'caller', 'call_def'
-    ).all()
+    queryset = Call.objects.all()
     serializer_class = CallSerializer
-    permission_classes = [permissions.IsAuthenticated]
\ No newline at end of file
+    permission_classes = [permissions.IsAuthenticated]
+
+    # === صف تماس‌های کاربر جاری ===
+    @action(detail=False, methods=['get'])
+    def worklist(self, request):
+        """
+        تماس‌های در انتظار آپولون‌یار کاربر جاری در بازه‌های باز تعریف‌های تماس (صفحه‌بندی cursor).
+        تماس‌ها از قبل توسط فرمان generate_call_worklists ساخته شده‌اند.
+        آدرس: GET /api/calls/worklist/?fields=
+        """
+        apollonyar = get_apollonyar_for_user(request.user)
+        fields = parse_field_list(request.query_params.get('fields'))
+        paginator = CallWorklistPagination()
+        page = paginator.paginate_queryset(
+            CallSerializer.setup_eager_loading(worklist_for(apollonyar), fields=fields), request, view=self
+        )
+        return paginator.get_paginated_response(CallSerializer(page, many=True, fields=fields).data)
+
+    # === آمار تماس‌ها (از جدول خلاصه روزانه) ===
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """
+        تعداد تماس‌ها به تفکیک ستون‌های group_by (day, caller, call_def, term, type, status).
+        فیلترها: from و to (تاریخ)، caller، call_def، term، type، status و mine=1 برای آپولون‌یار کاربر جاری.
+        آدرس: GET /api/calls/stats/?group_by=caller,status&from=2025-01-01
+        """
+        params = request.query_params
+        group_by = [name.strip() for name in params.get('group_by', '').split(',') if name.strip()] or ['status']
+        unknown = [name for name in group_by if name not in GROUP_FIELDS]
+        if unknown:
+            return Response({'error': f"ستون گروه‌بندی نامعتبر: {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            day_from = date.fromisoformat(params['from']) if params.get('from') else None
+            day_to = date.fromisoformat(params['to']) if params.get('to') else None
+        except ValueError:
+            return Response({'error': 'تاریخ باید به شکل YYYY-MM-DD باشد'}, status=status.HTTP_400_BAD_REQUEST)
+        filters = {name: params.get(name) for name in ('caller', 'call_def', 'term', 'type', 'status')}
+        if params.get('mine') in ('1', 'true'):
+            filters['caller'] = get_apollonyar_for_user(request.user).id
+        return Response(call_stats(group_by, day_from=day_from, day_to=day_to, **filters))
+
+
+# === ارائه فایل‌ها (MEDIA_URL) ===
+@require_safe
+def media_file(request, name):
+    """
+    دریافت فایل‌های آپلود شده با بررسی دسترسی.
+    آدرس: GET {MEDIA_URL}{name}?expires=...&signature=...
+    آدرس‌های امضا شده (که serializer ها برمی‌گردانند) بدون توکن قابل دریافت هستند؛
+    در غیر این صورت توکن JWT کاربر و قوانین دسترسی api.media.can_access بررسی می‌شود.
+    """
+    # نام باید پیش از بررسی پیشوند و امضا نرمال باشد (جلوگیری از عبور از پوشه با ..)
+    if clean_name(name) is None or not name.startswith(SERVED_PREFIXES):
+        return JsonResponse({'error': 'فایل یافت نشد'}, status=404)
+    signed = verify_signature(name, request.GET.get('expires'), request.GET.get('signature'))
+    if not signed and not can_access(request_user(request), name):
+        return JsonResponse({'error': 'دسترسی به این فایل مجاز نیست'}, status=403)
+    response = serve_media(request, name)
+    if response is None:
+        return JsonResponse({'error': 'فایل یافت نشد'}, status=404)
+    return response
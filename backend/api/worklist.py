@@ -0,0 +1,96 @@
+# api/worklist.py
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .batching import CHUNK_SIZE, chunks
+from .call_stats import record_calls
+from .models import Call, CallDef, Profile
+
+
+def open_call_defs(now=None, include_generated=False):
+    """تعریف‌های تماسی که بازه موعدشان همین حالا باز است؛ به صورت پیش‌فرض فقط آن‌هایی که هنوز لیست کارشان ساخته نشده."""
+    now = now or timezone.now()
+    call_defs = CallDef.objects.filter(start_due_date__lte=now, end_due_date__gte=now)
+    if not include_generated:
+        call_defs = call_defs.filter(worklist_generated_at__isnull=True)
+    return call_defs
+
+
+def uncontacted_profiles(call_def):
+    """
+    پروفایل‌های فعال ترم تعریف تماس که آپولون‌یار دارند و هنوز برای آن تماسی ندارند:
+    نه تماسی با همین تعریف و نه تماس انجام شده‌ای (غیر از pending) از شروع بازه.
+    """
+    same_def = Call.objects.filter(profile=OuterRef('pk'), call_def=call_def)
+    contacted = Call.objects.filter(
+        profile=OuterRef('pk'), call_timestamp__gte=call_def.start_due_date
+    ).exclude(status='pending')
+    return (
+        Profile.objects.filter(term_id=call_def.term_id, status='active', apollonyar__isnull=False)
+        .exclude(Exists(same_def))
+        .exclude(Exists(contacted))
+    )
+
+
+def generate_worklist(call_def_id, now=None):
+    """
+    ساخت تماس‌های pending یک تعریف تماس برای هر هنرجو با تماس گیرنده آپولون‌یار او.
+    ردیف تعریف قفل می‌شود (SKIP LOCKED) تا اجرای همزمان دو scheduler تماس تکراری نسازد.
+    خروجی: تعداد تماس‌های ساخته شده (None اگر تعریف همزمان در حال پردازش باشد).
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        call_def = (
+            CallDef.objects.select_for_update(skip_locked=True)
+            .filter(id=call_def_id).only('id', 'term_id', 'start_due_date').first()
+        )
+        if call_def is None:
+            return None
+        rows = (
+            uncontacted_profiles(call_def)
+            .values_list('id', 'apollonyar_id').order_by('id').iterator(chunk_size=CHUNK_SIZE)
+        )
+        created = 0
+        for chunk in chunks(rows):
+            calls = Call.objects.bulk_create([
+                Call(
+                    profile_id=profile_id,
+                    call_def_id=call_def.id,
+                    caller_id=apollonyar_id,
+                    type='course',
+                    status='pending',
+                    call_timestamp=call_def.start_due_date,
+                )
+                for profile_id, apollonyar_id in chunk
+            ])
+            record_calls(calls)
+            created += len(chunk)
+        CallDef.objects.filter(id=call_def.id).update(worklist_generated_at=now)
+    return created
+
+
+def generate_worklists(now=None, include_generated=False):
+    """
+    ساخت لیست تماس همه بازه‌هایی که از اجرای قبلی تا کنون باز شده‌اند (اجرای دوره‌ای توسط فرمان generate_call_worklists).
+    با include_generated بازه‌های باز قبلاً پردازش شده هم دوباره بررسی می‌شوند (مثلاً برای هنرجویان تازه وارد).
+    خروجی: {شناسه تعریف تماس: تعداد تماس‌های ساخته شده}
+    """
+    now = now or timezone.now()
+    call_def_ids = list(open_call_defs(now, include_generated).order_by('start_due_date', 'id').values_list('id', flat=True))
+    results = {}
+    for call_def_id in call_def_ids:
+        created = generate_worklist(call_def_id, now)
+        if created is not None:
+            results[call_def_id] = created
+    return results
+
+
+def worklist_for(apollonyar, now=None):
+    """صف تماس‌های در انتظار یک آپولون‌یار در بازه‌های هنوز باز، از قدیمی‌ترین بازه (ایندکس caller, status, call_timestamp)."""
+    now = now or timezone.now()
+    return (
+        Call.objects.filter(caller=apollonyar, status='pending', call_def__end_due_date__gte=now)
+        .order_by('call_timestamp', 'id')
+    )
@@ -208,4 +208,49 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
     'SLIDING_TOKEN_LIFETIME': timedelta(minutes=5),
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
-}
\ No newline at end of file
+}
+# نمای کامل هنرجو (/api/profiles/{id}/overview/)
+# در صورت فعال بودن، برش‌های مختلف پروفایل به صورت همزمان و با اتصال‌های جداگانه دیتابیس خوانده می‌شوند
+PROFILE_OVERVIEW_PARALLEL = False
+
+# کارهای پس‌زمینه (api/tasks.py): تعداد worker و اجرای همزمان (برای توسعه و تست)
+BACKGROUND_TASK_WORKERS = 2
+BACKGROUND_TASKS_EAGER = False
+
+# صف نمره‌دهی: مدت اعتبار lease هر ارسال برداشته شده توسط ارزیاب (ثانیه)
+GRADING_LEASE_SECONDS = 900
+
+# فایل‌های آپلود شده
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# آپلود تکه‌تکه فایل‌های ارسالی (api/uploads.py)
+# تکه‌ها تا زمان سرهم شدن در این پوشه نگه داشته می‌شوند
+UPLOAD_STAGING_DIR = BASE_DIR / 'upload_staging'
+UPLOAD_MAX_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_MAX_FILE_SIZE = 2 * 1024 * 1024 * 1024
+UPLOAD_SESSION_TTL_HOURS = 24
+
+# پیش‌نمایش و waveform فایل‌های صوتی/تصویری ارسالی (api/transcoding.py)
+# ffmpeg باید روی سرور نصب باشد؛ پردازش رسانه‌ها و تصاویر در pool پروسه‌ها با این تعداد worker انجام می‌شود
+FFMPEG_BINARY = 'ffmpeg'
+MEDIA_PROCESS_WORKERS = 2
+
+# storage فایل‌های الگو و ارسالی: محتوا-محور و بدون تکرار (api/storage.py)
+# فایل‌های بدون ارجاع پس از این مهلت توسط فرمان gc_blobs حذف می‌شوند
+STORAGES = {
+    'default': {'BACKEND': 'api.storage.SignedFileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'blobs': {'BACKEND': 'api.storage.ContentAddressedStorage'},
+}
+BLOB_GC_GRACE_HOURS = 24
+
+# ارائه فایل‌ها (api/media.py): مدت اعتبار آدرس‌های امضا شده و سپردن ارسال فایل به وب‌سرور
+# MEDIA_SENDFILE: None (ارسال توسط Django)، 'x-accel-redirect' (nginx) یا 'x-sendfile' (Apache/lighttpd)
+# برای nginx یک location داخلی (internal) با alias به MEDIA_ROOT روی MEDIA_ACCEL_REDIRECT_PREFIX لازم است
+MEDIA_URL_TTL_SECONDS = 6 * 3600
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
+# نسخه‌های کوچک WebP/JPEG عکس کاربران، رسیدها و آیکون‌ها (api/images.py): نام اندازه -> حداکثر ضلع به پیکسل
+IMAGE_THUMBNAIL_SIZES = {'small': 160, 'large': 1024}
@@ -14,10 +14,15 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 
+from api.views import media_file
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    # فایل‌های آپلود شده با بررسی دسترسی، Range و درخواست‌های شرطی (api/media.py)
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:name>", media_file, name='media_file'),
 ]
@@ -76,10 +76,24 @@ export default {
     createDiscount(discountData) { return apiClient.post('/discounts/', discountData); },
     updateDiscount(discountId, discountData) { return apiClient.patch(`/discounts/${discountId}/`, discountData); },
     deleteDiscount(discountId) { return apiClient.delete(`/discounts/${discountId}/`); },
+    // استفاده از کد تخفیف برای یک پروفایل؛ کد منقضی یا پر شده با خطای 400 رد می‌شود
+    redeemDiscount(code, profileId, kind = 'cash') {
+        return apiClient.post('/discounts/redeem/', { code, profileId, kind });
+    },
 
     // --- Profiles & Students ---
-    getProfiles() {
-        return apiClient.get('/profiles/');
+    // لیست پروفایل‌ها صفحه‌بندی شده است: { results, next }
+    // params: status, type, term, group, course, apollonyar, debt, search, ordering, page_size, cursor
+    getProfiles(params = {}) {
+        return apiClient.get('/profiles/', { params });
+    },
+    getProfilesPage(nextUrl) {
+        return apiClient.get(nextUrl);
+    },
+    // آمار پروفایل‌ها به تفکیک group_by (apollonyar, term, course, group, status, type) با همان فیلترهای لیست:
+    // [{ apollonyarId, termId, total, active, activeTermBased, suspended, suspendedOverdue, optout, medals: { medalId: count } }]
+    getProfileStats(params = {}) {
+        return apiClient.get('/profiles/stats/', { params });
     },
     createProfile(profileData) {
         return apiClient.post('/profiles/', profileData);
@@ -111,6 +125,10 @@ export default {
     getAssignments() {
         return apiClient.get('/assignments/');
     },
+    // صف بررسی: ارسال‌های نمره‌نخورده از قدیمی‌ترین (صفحه‌بندی شده: { results, next })
+    getReviewQueue(params = {}) {
+        return apiClient.get('/assignments/review-queue/', { params });
+    },
     submitAssignment(assignmentId, submissionData) {
         // این بخش به دلیل آپلود فایل کمی پیچیده‌تر است و بعدا تکمیل می‌شود
         return apiClient.post(`/assignments/${assignmentId}/submit/`, submissionData, {
@@ -120,13 +138,37 @@ export default {
     gradeSubmission(submissionId, gradeData) {
         return apiClient.post(`/submissions/${submissionId}/grade/`, gradeData);
     },
+    // صف نمره‌دهی: برداشتن چند ارسال با lease و آزاد کردن آن‌ها بدون نمره
+    claimSubmissions(limit = 5, assignmentDefId = null) {
+        return apiClient.post('/submissions/claim/', { limit, assignmentDefId });
+    },
+    releaseSubmissions(submissionIds) {
+        return apiClient.post('/submissions/release/', { submissionIds });
+    },
 
     // --- Financial ---
     getTransactions() {
         return apiClient.get('/transactions/');
     },
-    getInstallments() {
-        return apiClient.get('/installments/');
+    // params.fields / params.expand: فقط ستون‌هایی که جدول نمایش می‌دهد از سرور خواسته می‌شود
+    getInstallments(params = {}) {
+        return apiClient.get('/installments/', { params });
+    },
+    // لیست تخت پیگیری اقساط (صفحه‌بندی شده: { results, next })؛ فیلترها: overdue، due=week، apollonyar، mine
+    getInstallmentTracking(params = {}) {
+        return apiClient.get('/installments/tracking/', { params });
+    },
+    getInstallmentTrackingPage(nextUrl) {
+        return apiClient.get(nextUrl);
+    },
+    // تطبیق فایل CSV صورت‌حساب بانکی با تراکنش‌های در انتظار: { lines, matched, verified, unmatched, ambiguous, invalid }
+    reconcileBankStatement(file, dryRun = false) {
+        const formData = new FormData();
+        formData.append('file', file);
+        formData.append('dryRun', dryRun ? 'true' : 'false');
+        return apiClient.post('/transactions/reconcile/', formData, {
+            headers: { 'Content-Type': 'multipart/form-data' }
+        });
     },
     verifyTransaction(transactionId, data) {
         return apiClient.patch(`/transactions/${transactionId}/`, data);
@@ -175,6 +217,17 @@ export default {
     updateAssignmentDueDate(assignmentId, dueDateData) {
         return apiClient.patch(`/assignments/${assignmentId}/update_due_date/`, dueDateData);
     },
+    // جابجایی گروهی مهلت: { days, hours, excludeGroupIds, excludeProfileIds, reason }
+    shiftTermDeadlines(termId, shiftData) {
+        return apiClient.post(`/terms/${termId}/shift_deadlines/`, shiftData);
+    },
+    shiftAssignmentDefDeadline(assignmentDefId, shiftData) {
+        return apiClient.post(`/assignment-defs/${assignmentDefId}/shift_deadline/`, shiftData);
+    },
+    // آرشیو ZIP همه فایل‌های ارسالی یک تعریف تکلیف (برای نمره‌دهی آفلاین)
+    downloadAssignmentDefSubmissions(assignmentDefId) {
+        return apiClient.get(`/assignment-defs/${assignmentDefId}/submissions.zip/`, { responseType: 'blob' });
+    },
     
     // Logs API
     getLogs() {
@@ -182,13 +235,38 @@ export default {
     },
 
     // --- Additional API functions ---
-    getCalls() {
-        return apiClient.get('/calls/');
+    getCalls(params = {}) {
+        return apiClient.get('/calls/', { params });
     },
+    // آمار تماس‌ها از جدول خلاصه روزانه: [{ callerId, termId, status, ..., total }]
+    getCallStats(params = {}) {
+        return apiClient.get('/calls/stats/', { params });
+    },
+    // صف تماس‌های در انتظار آپولون‌یار کاربر جاری (صفحه‌بندی شده: { results, next })
+    getMyCallWorklist(params = {}) {
+        return apiClient.get('/calls/worklist/', { params });
+    },
+    // فید پرداخت‌ها (صفحه‌بندی شده: { results, next })
     getProfilePayments(profileId) {
         return apiClient.get(`/profiles/${profileId}/payments/`);
     },
-    
+    getProfilePaymentsPage(nextUrl) {
+        return apiClient.get(nextUrl);
+    },
+    // همه اقساط پروفایل بدون صفحه‌بندی (برای فرم ویرایش اقساط؛ اقساطی که در برنامه ارسالی نباشند حذف می‌شوند)
+    getProfileInstallmentPlan(profileId) {
+        return apiClient.get(`/profiles/${profileId}/installment_plan/`);
+    },
+    // خلاصه مالی پروفایل و هنرجو: { profile: { totalDue, paid, outstanding, overdue, nextDueDate }, user: { ..., balance } }
+    getProfileLedger(profileId) {
+        return apiClient.get(`/profiles/${profileId}/ledger/`);
+    },
+    // نمای کامل هنرجو در یک درخواست: { profile, assignments, calls, notes, medals, payments }
+    // هر بخش به صورت { results, hasMore } است
+    getProfileOverview(profileId, limit = 10) {
+        return apiClient.get(`/profiles/${profileId}/overview/`, { params: { limit } });
+    },
+
     // --- Student Self Profile API methods ---
     getStudentProfile(studentId) {
         return apiClient.get(`/profiles/${studentId}/`);
@@ -196,11 +274,13 @@ export default {
     getStudentAssignments(studentId) {
         return apiClient.get(`/profiles/${studentId}/assignments/`);
     },
+    // فید پرداخت‌ها (صفحه‌بندی شده: { results, next })
     getStudentPayments(studentId) {
         return apiClient.get(`/profiles/${studentId}/payments/`);
     },
+    // تاریخچه اقدامات یک هنرجو (صفحه‌بندی شده: { results, next })
     getStudentActionLogs(studentId) {
-        return apiClient.get(`/profiles/${studentId}/action_logs/`);
+        return apiClient.get(`/profiles/${studentId}/logs/`);
     },
     getStudentMedals(studentId) {
         return apiClient.get(`/profiles/${studentId}/medals/`);